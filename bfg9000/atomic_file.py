@@ -0,0 +1,63 @@
+import errno
+import filecmp
+import os
+import uuid
+from contextlib import contextmanager
+
+# Generated files are written to a temporary file next to the real one and
+# then renamed into place, but only if their contents actually changed. This
+# way, readers never see a half-written file, and an unchanged file keeps its
+# old mtime, so nothing that depends on it is needlessly rebuilt.
+
+
+def _open_temp(filename):
+    # Create the temporary file ourselves instead of with mkstemp so that it
+    # gets the usual permissions (i.e. those allowed by the umask).
+    dirname, basename = os.path.split(filename)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        tmpname = os.path.join(dirname, '.{}.{}.tmp'.format(
+            basename, uuid.uuid4().hex[:8]
+        ))
+        try:
+            return os.open(tmpname, flags, 0o666), tmpname
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+
+def _same_contents(a, b):
+    try:
+        return filecmp.cmp(a, b, shallow=False)
+    except OSError:
+        return False
+
+
+def _replace(src, dst):
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    else:
+        # Python 2 can't atomically replace an existing file on Windows.
+        try:
+            os.rename(src, dst)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+            os.remove(dst)
+            os.rename(src, dst)
+
+
+@contextmanager
+def write_if_changed(filename, mode='w'):
+    fd, tmpname = _open_temp(filename)
+    try:
+        with os.fdopen(fd, mode) as out:
+            yield out
+
+        if _same_contents(tmpname, filename):
+            os.remove(tmpname)
+        else:
+            _replace(tmpname, filename)
+    finally:
+        if os.path.exists(tmpname):
+            os.remove(tmpname)
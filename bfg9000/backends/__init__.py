@@ -1,20 +1,81 @@
+import importlib
 from collections import OrderedDict
-from pkg_resources import iter_entry_points, DistributionNotFound
 
+try:
+    from importlib.metadata import entry_points
+except ImportError:  # pragma: no cover
+    entry_points = None
+
+_entry_points = None
 _backends = None
 
 
+def _load_entry_points():
+    global _entry_points
+
+    if _entry_points is None:
+        # pkg_resources is very slow to import, so use importlib.metadata if
+        # it's available.
+        if entry_points:
+            eps = entry_points()
+            if hasattr(eps, 'select'):
+                eps = eps.select(group='bfg9000.backends')
+            else:
+                eps = eps.get('bfg9000.backends', [])
+            errors = (ImportError,)
+        else:  # pragma: no cover
+            from pkg_resources import iter_entry_points, DistributionNotFound
+            eps = iter_entry_points('bfg9000.backends')
+            errors = (ImportError, DistributionNotFound)
+
+        _entry_points = OrderedDict()
+        for i in eps:
+            # The same distribution can show up more than once (e.g. if it's
+            # installed in development mode); just use the first one.
+            if i.name not in _entry_points:
+                _entry_points[i.name] = (i, errors)
+    return _entry_points
+
+
+def _load_backend(name):
+    entry_point, errors = _load_entry_points()[name]
+    try:
+        return entry_point.load()
+    except errors:
+        return None
+
+
+def backend_names():
+    return list(_load_entry_points().keys())
+
+
+def get_backend(name, module=None):
+    # Only load the backend we actually want, so that we don't have to import
+    # all of them (or check their versions).
+    if _backends is not None:
+        return _backends[name]
+    if module is not None:
+        # If we know which module the backend lives in (e.g. from a previous
+        # configure), import it directly; reading the entry points is slow.
+        try:
+            return importlib.import_module(module)
+        except ImportError:
+            pass
+    backend = _load_backend(name)
+    if backend is None:
+        raise KeyError(name)
+    return backend
+
+
 def list_backends():
     global _backends
 
     if _backends is None:
         backends = []
-        for i in iter_entry_points('bfg9000.backends'):
-            try:
-                backend = i.load()
-                backends.append((i.name, backend))
-            except DistributionNotFound:
-                pass
+        for name in _load_entry_points():
+            backend = _load_backend(name)
+            if backend is not None:
+                backends.append((name, backend))
 
         def sort_key(x):
             return x[1].priority if x[1].version() else 0
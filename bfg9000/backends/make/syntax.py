@@ -1,4 +1,5 @@
 import re
+import shutil
 from collections import namedtuple
 from enum import Enum
 from six import iteritems, string_types
@@ -7,6 +8,7 @@ from six.moves import cStringIO as StringIO
 from ... import path
 from ... import safe_str
 from ... import iterutils
+from ...memoize import lru_cache
 from ...platforms import platform_name
 
 # XXX: Make currently only supports sh-style shells.
@@ -31,6 +33,11 @@ _comment_tmpl = """
 
 
 class Writer(object):
+    # The same strings and paths tend to get written over and over (e.g.
+    # include directories and flags), so remember how we escaped the most
+    # recent ones.
+    _cache_size = 65536
+
     # Don't escape ":" if we're using Windows paths.
     __extra_escapes = '' if platform_name() == 'windows' else ':'
     __target_ex = re.compile(r'(\\*)([#?*\[\]~\s%{}])'.format(__extra_escapes))
@@ -40,6 +47,7 @@ class Writer(object):
         self.stream = stream
 
     @classmethod
+    @lru_cache(maxsize=_cache_size)
     def escape_str(cls, string, syntax):
         def repl(match):
             return match.group(1) * 2 + '\\' + match.group(2)
@@ -49,9 +57,9 @@ class Writer(object):
         result = string.replace('$', '$$')
 
         if syntax == Syntax.target:
-            return cls.__target_ex.sub(repl, result)
+            ex = cls.__target_ex
         elif syntax == Syntax.dependency:
-            return cls.__dep_ex.sub(repl, result)
+            ex = cls.__dep_ex
         elif syntax == Syntax.function:
             return result.replace(',', '$,')
         elif syntax in [Syntax.shell, Syntax.clean]:
@@ -59,6 +67,32 @@ class Writer(object):
         else:
             raise ValueError("unknown syntax '{}'".format(syntax))
 
+        # Most strings don't need escaping at all.
+        if not ex.search(result):
+            return result
+        return ex.sub(repl, result)
+
+    @classmethod
+    @lru_cache(maxsize=_cache_size)
+    def __escape_string(cls, string, syntax, shell_quote):
+        escaped = False
+        if shell_quote:
+            string, escaped = shell_quote(string)
+        return cls.escape_str(string, syntax), escaped
+
+    @classmethod
+    @lru_cache(maxsize=_cache_size)
+    def __escape_path(cls, thing, syntax):
+        shelly = syntax in [Syntax.function, Syntax.shell]
+        out = Writer(StringIO())
+        thing = thing.realize(path_vars, shelly)
+        escaped = out.write(thing, syntax, pshell.escape)
+
+        thing = out.stream.getvalue()
+        if shelly and escaped:
+            thing = pshell.quote_escaped(thing)
+        return thing, escaped
+
     def write_literal(self, string):
         self.stream.write(string)
 
@@ -71,20 +105,15 @@ class Writer(object):
             self.write_literal(thing.string)
             escaped = True
         elif isinstance(thing, string_types):
-            if shelly and shell_quote:
-                thing, escaped = shell_quote(thing)
-            self.write_literal(self.escape_str(thing, syntax))
+            thing, escaped = self.__escape_string(
+                thing, syntax, shell_quote if shelly else None
+            )
+            self.write_literal(thing)
         elif isinstance(thing, safe_str.jbos):
             for i in thing.bits:
                 escaped |= self.write(i, syntax, shell_quote)
         elif isinstance(thing, path.Path):
-            out = Writer(StringIO())
-            thing = thing.realize(path_vars, shelly)
-            escaped = out.write(thing, syntax, pshell.escape)
-
-            thing = out.stream.getvalue()
-            if shelly and escaped:
-                thing = pshell.quote_escaped(thing)
+            thing, escaped = self.__escape_path(thing, syntax)
             self.write_literal(thing)
         else:
             raise TypeError(type(thing))
@@ -225,7 +254,7 @@ path_vars.update({i: Variable(i.name) for i in path.InstallRoot})
 
 
 class Makefile(object):
-    def __init__(self, bfgfile):
+    def __init__(self, bfgfile, spool=None):
         self._bfgfile = bfgfile
 
         self._var_table = set()
@@ -233,7 +262,12 @@ class Makefile(object):
         self._target_variables = []
         self._defines = []
 
-        self._rules = []
+        # Rules are serialized to the spool as soon as they're added, since
+        # nothing can change them afterwards. This way, we only need to keep
+        # their targets around to detect duplicates, rather than the whole
+        # build graph. The variables and defines stay in memory, since they
+        # have to come before any rules that use them.
+        self._rules = Writer(spool or StringIO())
         self._targets = set()
         self._includes = []
 
@@ -280,7 +314,7 @@ class Makefile(object):
             if self.has_rule(i):
                 raise ValueError("rule for '{}' already exists".format(i))
             self._targets.add(i)
-        self._rules.append(Rule(
+        self._write_rule(self._rules, Rule(
             targets, iterutils.listify(deps), iterutils.listify(order_only),
             recipe, variables, phony
         ))
@@ -360,8 +394,9 @@ class Makefile(object):
         for name, value in self._defines:
             self._write_define(out, name, value)
 
-        for r in self._rules:
-            self._write_rule(out, r)
+        spool = self._rules.stream
+        spool.seek(0)
+        shutil.copyfileobj(spool, out.stream)
 
         for i in self._includes:
             out.write_literal(('-' if i.optional else '') + 'include ')
@@ -1,27 +1,29 @@
 import os
 import re
-import subprocess
+import tempfile
 from packaging.version import LegacyVersion
 
 from ... import path
+from ... import profiler
 from .syntax import *
+from ...atomic_file import write_if_changed
 from ...iterutils import listify
 from ...platforms import which
+from ...probe import ProbeCache
 
 
-def version(env=os.environ):
-    with open(os.devnull, 'wb') as devnull:
-        try:
-            make = which(env.get('MAKE', ['make', 'gmake']), env)
-            output = subprocess.check_output(
-                '{} --version'.format(make),
-                shell=True, universal_newlines=True, stderr=devnull
-            )
-            m = re.match(r'GNU Make ([\d\.]+)', output)
-            if m:
-                return LegacyVersion(m.group(1))
-        except IOError:
-            pass
+def version(env=os.environ, probes=None):
+    if probes is None:
+        probes = ProbeCache()
+
+    try:
+        make = which(env.get('MAKE', ['make', 'gmake']), env)
+        output = probes.check_output(make, '--version', env)
+        m = re.match(r'GNU Make ([\d\.]+)', output)
+        if m:
+            return LegacyVersion(m.group(1))
+    except IOError:
+        pass
     return None
 
 
@@ -53,20 +55,36 @@ def post_rule(fn):
 
 
 def write(env, build_inputs):
-    buildfile = Makefile(build_inputs.bfgpath.string(env.path_roots))
+    # Spool the rules to a temporary file so that we don't need to hold the
+    # entire build graph in memory.
+    with tempfile.TemporaryFile('w+') as spool:
+        return _write(env, build_inputs, spool)
+
+
+def _write(env, build_inputs, spool):
+    buildfile = Makefile(build_inputs.bfgpath.string(env.path_roots), spool)
     buildfile.variable(path_vars[path.Root.srcdir], env.srcdir, Section.path)
     for i in path.InstallRoot:
         buildfile.variable(path_vars[i], env.install_dirs[i], Section.path)
 
     for i in _pre_rules:
-        i(build_inputs, buildfile, env)
+        with profiler.span('rule', i.__name__):
+            i(build_inputs, buildfile, env)
     for e in build_inputs.edges():
-        _rule_handlers[type(e)](e, build_inputs, buildfile, env)
+        with profiler.span('rule', type(e).__name__):
+            _rule_handlers[type(e)](e, build_inputs, buildfile, env)
     for i in _post_rules:
-        i(build_inputs, buildfile, env)
+        with profiler.span('rule', i.__name__):
+            i(build_inputs, buildfile, env)
 
-    with open(path.Path('Makefile').string(env.path_roots), 'w') as out:
+    filename = path.Path('Makefile').string(env.path_roots)
+    with write_if_changed(filename) as out:
         buildfile.write(out)
+    # Make has no equivalent to Ninja's `restat`, so if the Makefile didn't
+    # change, touch it anyway so that Make doesn't keep trying to regenerate
+    # it.
+    os.utime(filename, None)
+    return [filename]
 
 
 def cmd_var(cmd, buildfile):
@@ -1,26 +1,27 @@
 import os
 import re
-import subprocess
 from packaging.version import LegacyVersion
 
 from ... import path
+from ... import profiler
 from .syntax import *
+from ...atomic_file import write_if_changed
 from ...platforms import which
+from ...probe import ProbeCache
 
 
-def version(env=os.environ):
-    with open(os.devnull, 'wb') as devnull:
-        try:
-            msbuild = which(env.get('MSBUILD', ['msbuild', 'xbuild']), env)
-            output = subprocess.check_output(
-                '{} /version'.format(msbuild),
-                shell=True, universal_newlines=True, stderr=devnull
-            )
-            m = re.search(r'([\d\.]+)$', output)
-            if m:
-                return LegacyVersion(m.group(1))
-        except IOError:
-            pass
+def version(env=os.environ, probes=None):
+    if probes is None:
+        probes = ProbeCache()
+
+    try:
+        msbuild = which(env.get('MSBUILD', ['msbuild', 'xbuild']), env)
+        output = probes.check_output(msbuild, '/version', env)
+        m = re.search(r'([\d\.]+)$', output)
+        if m:
+            return LegacyVersion(m.group(1))
+    except IOError:
+        pass
     return None
 
 
@@ -42,16 +43,20 @@ def write(env, build_inputs):
     solution = Solution(uuids)
 
     for e in build_inputs.edges():
-        _rule_handlers[type(e)](e, build_inputs, solution, env)
+        with profiler.span('rule', type(e).__name__):
+            _rule_handlers[type(e)](e, build_inputs, solution, env)
 
     # XXX: Handle default builds. Default builds go first in the solution. This
     # also means we'd need to support aliases so that we can have multiple
     # builds be the default.
     sln_file = path.Path(build_inputs['project'].name + '.sln')
-    with open(sln_file.string(env.path_roots), 'w') as out:
+    filenames = [sln_file.string(env.path_roots)]
+    with write_if_changed(filenames[0]) as out:
         solution.write(out)
     for p in solution:
+        filenames.append(p.path.string(env.path_roots))
         path.makedirs(p.path.parent().string(env.path_roots), exist_ok=True)
-        with open(p.path.string(env.path_roots), 'w') as out:
+        with write_if_changed(filenames[-1]) as out:
             p.write(out)
     uuids.save()
+    return filenames
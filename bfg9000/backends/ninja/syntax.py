@@ -1,4 +1,8 @@
+import hashlib
+import os
+import posixpath
 import re
+import shutil
 from collections import namedtuple, OrderedDict
 from enum import Enum
 from itertools import chain
@@ -10,10 +14,11 @@ from ... import path
 from ... import safe_str
 from ... import shell
 from ... import iterutils
+from ...memoize import lru_cache
 from ...platforms import platform_name
 
 __all__ = ['NinjaFile', 'Section', 'Syntax', 'Writer', 'Variable', 'var',
-           'Commands', 'path_vars']
+           'Commands', 'path_vars', 'subninja_dir']
 
 Rule = namedtuple('Rule', ['command', 'depfile', 'deps', 'generator', 'pool',
                            'restat'])
@@ -29,25 +34,79 @@ _comment_tmpl = """
 # {}
 """.strip()
 
+# Where to put the subninja files when splitting the build statements up by
+# output directory.
+subninja_dir = '.bfg_ninja'
+
 
 class Writer(object):
+    # The same strings and paths tend to get written over and over (e.g.
+    # include directories and flags), so remember how we escaped the most
+    # recent ones.
+    _cache_size = 65536
+
+    __output_ex = re.compile(r'([:$ ])')
+    __input_ex = re.compile(r'([$ ])')
+
     def __init__(self, stream):
         self.stream = stream
 
-    @staticmethod
-    def escape_str(string, syntax):
+    @classmethod
+    @lru_cache(maxsize=_cache_size)
+    def escape_str(cls, string, syntax):
         if '\n' in string:
             raise ValueError('illegal newline')
 
         if syntax == Syntax.output:
-            return re.sub(r'([:$ ])', r'$\1', string)
+            ex = cls.__output_ex
         elif syntax == Syntax.input:
-            return re.sub(r'([$ ])', r'$\1', string)
+            ex = cls.__input_ex
         elif syntax in [Syntax.shell, Syntax.clean]:
             return string.replace('$', '$$')
         else:
             raise ValueError("unknown syntax '{}'".format(syntax))
 
+        # Most strings don't need escaping at all.
+        if not ex.search(string):
+            return string
+        return ex.sub(r'$\1', string)
+
+    @classmethod
+    @lru_cache(maxsize=_cache_size)
+    def __escape_string(cls, string, syntax, shell_quote):
+        escaped = False
+        if shell_quote:
+            string, escaped = shell_quote(string)
+        return cls.escape_str(string, syntax), escaped
+
+    @classmethod
+    @lru_cache(maxsize=_cache_size)
+    def __escape_path(cls, thing, syntax):
+        shelly = syntax == Syntax.shell
+        out = Writer(StringIO())
+        thing = thing.realize(path_vars, shelly)
+        escaped = out.write(thing, syntax, shell.escape)
+
+        thing = out.stream.getvalue()
+        if shelly and escaped:
+            thing = shell.quote_escaped(thing)
+        return thing, escaped
+
+    @classmethod
+    def escape(cls, thing, syntax):
+        # Like write(), but just return the escaped string. This only supports
+        # the non-shell syntaxes, since they don't need quoting.
+        thing = safe_str.safe_str(thing)
+        if isinstance(thing, safe_str.escaped_str):
+            return thing.string
+        elif isinstance(thing, string_types):
+            return cls.escape_str(thing, syntax)
+        elif isinstance(thing, safe_str.jbos):
+            return ''.join(cls.escape(i, syntax) for i in thing.bits)
+        elif isinstance(thing, path.Path):
+            return cls.__escape_path(thing, syntax)[0]
+        raise TypeError(type(thing))
+
     def write_literal(self, string):
         self.stream.write(string)
 
@@ -60,20 +119,15 @@ class Writer(object):
             self.write_literal(thing.string)
             escaped = True
         elif isinstance(thing, string_types):
-            if shelly and shell_quote:
-                thing, escaped = shell_quote(thing)
-            self.write_literal(self.escape_str(thing, syntax))
+            thing, escaped = self.__escape_string(
+                thing, syntax, shell_quote if shelly else None
+            )
+            self.write_literal(thing)
         elif isinstance(thing, safe_str.jbos):
             for i in thing.bits:
                 escaped |= self.write(i, syntax, shell_quote)
         elif isinstance(thing, path.Path):
-            out = Writer(StringIO())
-            thing = thing.realize(path_vars, shelly)
-            escaped = out.write(thing, syntax, shell.escape)
-
-            thing = out.stream.getvalue()
-            if shelly and escaped:
-                thing = shell.quote_escaped(thing)
+            thing, escaped = self.__escape_path(thing, syntax)
             self.write_literal(thing)
         else:
             raise TypeError(type(thing))
@@ -166,19 +220,30 @@ path_vars.update({i: Variable(i.name) for i in path.InstallRoot})
 
 
 class NinjaFile(object):
-    def __init__(self, bfgfile):
+    def __init__(self, bfgfile, spool=None, split=False):
         self._bfgfile = bfgfile
 
         self._min_version = None
         self._var_table = set()
         self._variables = {i: [] for i in Section}
 
+        self._pools = OrderedDict()
         self._rules = OrderedDict()
 
-        self._builds = []
+        # Build statements are serialized to the spool as soon as they're
+        # added, since nothing can change them afterwards. This way, we only
+        # need to keep the (escaped) names of their outputs around to detect
+        # duplicates, rather than the whole build graph.
+        self._builds = Writer(spool or StringIO())
         self._build_outputs = set()
         self._defaults = []
 
+        # When splitting, remember where each output directory's build
+        # statements are in the spool so we can write them to their own files.
+        self._split = split
+        self._chunks = OrderedDict()
+        self._last_dir = None
+
     def min_version(self, version):
         if ( self._min_version is None or
              LegacyVersion(version) > LegacyVersion(self._min_version) ):
@@ -197,6 +262,24 @@ class NinjaFile(object):
     def has_variable(self, name):
         return var(name) in self._var_table
 
+    def pool(self, name, depth):
+        if re.search('\W', name) or name == 'console':
+            raise ValueError('pool name contains invalid characters')
+        if self._pools.get(name, depth) != depth:
+            raise ValueError("pool '{}' already exists".format(name))
+
+        self.min_version('1.1')
+        self._pools[name] = depth
+
+    def has_pool(self, name):
+        return name in self._pools
+
+    def _check_pool(self, pool):
+        if pool == 'console':
+            self.min_version('1.5')
+        elif not self.has_pool(pool):
+            raise ValueError("unknown pool '{}'".format(pool))
+
     def rule(self, name, command, depfile=None, deps=None, generator=False,
              pool=None, restat=False):
         if not isinstance(command, Commands):
@@ -207,10 +290,7 @@ class NinjaFile(object):
                 command = iterutils.first(command)
 
         if pool is not None:
-            if pool == 'console':
-                self.min_version('1.5')
-            else:
-                raise ValueError("unknown pool '{}'".format(pool))
+            self._check_pool(pool)
 
         if re.search('\W', name):
             raise ValueError('rule name contains invalid characters')
@@ -230,20 +310,73 @@ class NinjaFile(object):
             raise ValueError("unknown rule '{}'".format(rule))
 
         variables = {var(k): v for k, v in iteritems(variables or {})}
+        if var('pool') in variables:
+            self._check_pool(variables[var('pool')])
 
-        outputs = iterutils.listify(output)
+        outputs = [self._output_name(i) for i in iterutils.listify(output)]
         for i in outputs:
-            if self.has_build(i):
+            if i in self._build_outputs:
                 raise ValueError("build for '{}' already exists".format(i))
             self._build_outputs.add(i)
-        self._builds.append(Build(
+        build = Build(
             outputs, rule, iterutils.listify(inputs),
             iterutils.listify(implicit), iterutils.listify(order_only),
             variables
-        ))
+        )
+        if self._split:
+            self._write_split_build(self._build_dir(output), build)
+        else:
+            self._write_build(self._builds, build)
+
+    @staticmethod
+    def _build_dir(output):
+        output = safe_str.safe_str(iterutils.first(output))
+        if isinstance(output, path.Path) and output.root == path.Root.builddir:
+            return output.parent().suffix.replace(os.sep, '/')
+        return ''
+
+    def _write_split_build(self, dirname, build):
+        out = Writer(StringIO())
+        self._write_build(out, build)
+        text = out.stream.getvalue()
+
+        # Consecutive build statements for the same directory (the common
+        # case) are stored as a single chunk.
+        stream = self._builds.stream
+        chunks = self._chunks.setdefault(dirname, [])
+        if chunks and self._last_dir == dirname:
+            start, length = chunks[-1]
+            chunks[-1] = (start, length + len(text))
+        else:
+            chunks.append((stream.tell(), len(text)))
+        self._last_dir = dirname
+        stream.write(text)
+
+    def _read_chunks(self, dirname):
+        stream = self._builds.stream
+        for start, length in self._chunks.get(dirname, []):
+            stream.seek(start)
+            yield stream.read(length)
+
+    @staticmethod
+    def subninja_path(dirname):
+        return posixpath.join(subninja_dir, dirname, 'build.ninja')
+
+    def subninjas(self):
+        # Yield the path and contents of each subninja file.
+        for dirname in self._chunks:
+            if dirname:
+                yield self.subninja_path(dirname), ''.join(chain(
+                    [_comment_tmpl.format(self._bfgfile) + '\n\n'],
+                    self._read_chunks(dirname)
+                ))
 
     def has_build(self, name):
-        return name in self._build_outputs
+        return self._output_name(name) in self._build_outputs
+
+    @staticmethod
+    def _output_name(name):
+        return Writer.escape(name, Syntax.output)
 
     def default(self, paths):
         self._defaults.extend(paths)
@@ -253,6 +386,10 @@ class NinjaFile(object):
         out.write_shell(value, syntax)
         out.write_literal('\n')
 
+    def _write_pool(self, out, name, depth):
+        out.write_literal('pool ' + name + '\n')
+        self._write_variable(out, var('depth'), str(depth), indent=1)
+
     def _write_rule(self, out, name, rule):
         out.write_literal('rule ' + name + '\n')
 
@@ -269,8 +406,8 @@ class NinjaFile(object):
             self._write_variable(out, var('restat'), '1', indent=1)
 
     def _write_build(self, out, build):
-        out.write_literal('build ')
-        out.write_each(build.outputs, Syntax.output)
+        # The outputs have already been escaped by build().
+        out.write_literal('build ' + ' '.join(build.outputs))
         out.write_literal(': ' + build.rule)
 
         esc = safe_str.escaped_str
@@ -302,12 +439,36 @@ class NinjaFile(object):
             if self._variables[section]:
                 out.write_literal('\n')
 
+        for name, depth in iteritems(self._pools):
+            self._write_pool(out, name, depth)
+            out.write_literal('\n')
+
         for name, rule in iteritems(self._rules):
             self._write_rule(out, name, rule)
             out.write_literal('\n')
 
-        for build in self._builds:
-            self._write_build(out, build)
+        if self._split:
+            for i in self._read_chunks(''):
+                out.write_literal(i)
+            subninjas = [i for i in self._chunks if i]
+            if subninjas:
+                out.write_literal('\n')
+            for i in subninjas:
+                # Record a digest of each subninja file's contents so that
+                # build.ninja changes whenever any of them do. Otherwise,
+                # since the regenerate rule uses `restat`, Ninja wouldn't
+                # notice that it needs to reload the subninjas.
+                digest = hashlib.sha1(''.join(
+                    self._read_chunks(i)
+                ).encode('utf-8')).hexdigest()
+                out.write_literal('# ' + digest + '\n')
+                out.write_literal('subninja ' + Writer.escape_str(
+                    self.subninja_path(i), Syntax.input
+                ) + '\n')
+        else:
+            spool = self._builds.stream
+            spool.seek(0)
+            shutil.copyfileobj(spool, out.stream)
 
         if self._defaults:
             out.write_literal('\ndefault ')
@@ -1,24 +1,26 @@
 import os
-import subprocess
+import tempfile
 from packaging.version import LegacyVersion
 
 from ... import iterutils
 from ... import path
+from ... import profiler
 from .syntax import *
+from ...atomic_file import write_if_changed
 from ...platforms import which
+from ...probe import ProbeCache
 
 
-def version(env=os.environ):
-    with open(os.devnull, 'wb') as devnull:
-        try:
-            ninja = which(env.get('NINJA', ['ninja', 'ninja-build']), env)
-            output = subprocess.check_output(
-                '{} --version'.format(ninja),
-                shell=True, universal_newlines=True, stderr=devnull
-            )
-            return LegacyVersion(output.strip())
-        except IOError:
-            pass
+def version(env=os.environ, probes=None):
+    if probes is None:
+        probes = ProbeCache()
+
+    try:
+        ninja = which(env.get('NINJA', ['ninja', 'ninja-build']), env)
+        output = probes.check_output(ninja, '--version', env)
+        return LegacyVersion(output.strip())
+    except IOError:
+        pass
     return None
 
 
@@ -48,20 +50,60 @@ def post_rule(fn):
 
 
 def write(env, build_inputs):
-    buildfile = NinjaFile(build_inputs.bfgpath.string(env.path_roots))
+    # Spool the build statements to a temporary file so that we don't need to
+    # hold the entire build graph in memory.
+    with tempfile.TemporaryFile('w+') as spool:
+        return _write(env, build_inputs, spool)
+
+
+def _write(env, build_inputs, spool):
+    buildfile = NinjaFile(build_inputs.bfgpath.string(env.path_roots), spool,
+                          split=env.backend_options.get('subninja', False))
     buildfile.variable(path_vars[path.Root.srcdir], env.srcdir, Section.path)
     for i in path.InstallRoot:
         buildfile.variable(path_vars[i], env.install_dirs[i], Section.path)
 
     for i in _pre_rules:
-        i(build_inputs, buildfile, env)
+        with profiler.span('rule', i.__name__):
+            i(build_inputs, buildfile, env)
     for e in build_inputs.edges():
-        _rule_handlers[type(e)](e, build_inputs, buildfile, env)
+        with profiler.span('rule', type(e).__name__):
+            _rule_handlers[type(e)](e, build_inputs, buildfile, env)
     for i in _post_rules:
-        i(build_inputs, buildfile, env)
-
-    with open(path.Path('build.ninja').string(env.path_roots), 'w') as out:
+        with profiler.span('rule', i.__name__):
+            i(build_inputs, buildfile, env)
+
+    # Write the subninja files first and only clean up the old ones at the
+    # end, so that build.ninja never refers to a file that doesn't exist.
+    subninjas = _write_subninjas(env, buildfile)
+    filename = path.Path('build.ninja').string(env.path_roots)
+    with write_if_changed(filename) as out:
         buildfile.write(out)
+    _clean_subninjas(env, subninjas)
+    return [filename] + subninjas
+
+
+def _write_subninjas(env, buildfile):
+    filenames = []
+    for name, data in buildfile.subninjas():
+        filename = path.Path(name).string(env.path_roots)
+        path.makedirs(os.path.dirname(filename), exist_ok=True)
+        with write_if_changed(filename) as out:
+            out.write(data)
+        filenames.append(filename)
+    return filenames
+
+
+def _clean_subninjas(env, keep):
+    # Remove the subninja files for directories that no longer have anything
+    # in them.
+    keep = set(keep)
+    base = path.Path(subninja_dir).string(env.path_roots)
+    for root, dirs, files in os.walk(base):
+        for i in files:
+            name = os.path.join(root, i)
+            if name not in keep:
+                os.remove(name)
 
 
 def cmd_var(cmd, buildfile):
@@ -76,7 +118,8 @@ def flags_vars(name, value, buildfile):
 
 
 def command_build(buildfile, env, output, inputs=None, implicit=None,
-                  order_only=None, commands=None, environ=None, console=True):
+                  order_only=None, commands=None, environ=None, console=True,
+                  pool=None, restat=False):
     if console:
         rule_name = 'console_command'
         extra_implicit = ['PHONY']
@@ -100,11 +143,17 @@ def command_build(buildfile, env, output, inputs=None, implicit=None,
         if not buildfile.has_rule('command'):
             buildfile.rule(name='command', command=var('cmd'))
 
+    variables = {'cmd': Commands(commands, environ)}
+    if pool:
+        variables['pool'] = pool
+    if restat:
+        variables['restat'] = '1'
+
     buildfile.build(
         output=output,
         rule=rule_name,
         inputs=inputs,
         implicit=iterutils.listify(implicit) + extra_implicit,
         order_only=order_only,
-        variables={'cmd': Commands(commands, environ)}
+        variables=variables
     )
@@ -3,6 +3,7 @@ from six.moves import cStringIO as StringIO
 
 from .file_types import source_file
 from .hooks import builtin
+from .pool import ninja_pool
 from .. import safe_str
 from ..backends.make import writer as make
 from ..backends.ninja import writer as ninja
@@ -15,7 +16,7 @@ from ..shell import posix as pshell
 
 class BaseCommand(Edge):
     def __init__(self, build, name, outputs, cmd=None, cmds=None,
-                 environment=None, extra_deps=None):
+                 environment=None, pool=None, extra_deps=None):
         if (cmd is None) == (cmds is None):
             raise ValueError('exactly one of "cmd" or "cmds" must be ' +
                              'specified')
@@ -25,10 +26,13 @@ class BaseCommand(Edge):
         self.name = name
         self.cmds = cmds
         self.env = environment or {}
+        self.pool = build['pools'].name(pool)
         Edge.__init__(self, build, outputs, extra_deps=extra_deps)
 
 
 class Command(BaseCommand):
+    restat = False
+
     def __init__(self, build, name, *args, **kwargs):
         BaseCommand.__init__(self, build, name, Phony(name), *args, **kwargs)
 
@@ -40,7 +44,8 @@ def command(build, *args, **kwargs):
 
 class BuildStep(BaseCommand):
     def __init__(self, build, name, cmd=None, cmds=None, environment=None,
-                 type=source_file, args=None, kwargs=None, extra_deps=None):
+                 type=source_file, args=None, kwargs=None, pool=None,
+                 restat=False, extra_deps=None):
         name = listify(name)
         project_name = name[0]
         if not isiterable(type):
@@ -52,9 +57,10 @@ class BuildStep(BaseCommand):
 
         outputs = [self._make_outputs(*i) for i in
                    zip(name, type, args, kwargs)]
+        self.restat = restat
 
         BaseCommand.__init__(self, build, project_name, outputs, cmd, cmds,
-                             environment, extra_deps)
+                             environment, pool, extra_deps)
 
     @staticmethod
     def _make_outputs(name, type, args, kwargs):
@@ -95,7 +101,9 @@ def ninja_command(rule, build_inputs, buildfile, env):
         inputs=rule.extra_deps,
         commands=rule.cmds,
         environ=rule.env,
-        console=isinstance(rule, Command)
+        console=isinstance(rule, Command),
+        pool=ninja_pool(build_inputs, buildfile, rule.pool),
+        restat=rule.restat
     )
 
 
@@ -1,25 +1,104 @@
 import functools
+import hashlib
 from collections import defaultdict
-from six import string_types
+from six import integer_types, string_types
 
 from .hooks import builtin
+from .write_file import WriteFile
 from ..backends.make import writer as make
 from ..backends.ninja import writer as ninja
 from ..build_inputs import build_input, Edge
 from ..file_types import *
 from ..iterutils import first, iterate, listify, uniques
+from ..languages import lang2src
 from ..path import Path, Root
 from ..shell import posix as pshell
 
 build_input('compile_options')(lambda build_inputs, env: defaultdict(list))
 
 
+# Languages whose source files can be #included into one another to make a
+# unity build.
+_unity_langs = ('c', 'c++', 'objc', 'objc++')
+
+
 class ObjectFiles(list):
-    def __init__(self, builtins, build, env, files, **kwargs):
+    def __init__(self, builtins, build, env, files, unity=None, **kwargs):
+        self._unity_objects = {}
         bound = functools.partial(builtins['object_file'], None)
-        list.__init__(self, (objectify(
-            i, ObjectFile, bound, in_type=(string_types, SourceFile), **kwargs
-        ) for i in iterate(files)))
+        if unity is None or unity is False:
+            list.__init__(self, (objectify(
+                i, ObjectFile, bound, in_type=(string_types, SourceFile),
+                **kwargs
+            ) for i in iterate(files)))
+            return
+
+        if unity is True:
+            size = None
+        elif isinstance(unity, integer_types) and unity >= 1:
+            size = unity
+        else:
+            raise ValueError('unity must be True or a positive integer')
+
+        # Compile sources in batches, grouped by language, and keep each batch
+        # where its first source file was in the list. Anything we can't batch
+        # (including prebuilt or separately-compiled object files) is left
+        # alone.
+        result = []
+        batches = {}
+        for i in iterate(files):
+            if isinstance(i, (string_types, SourceFile)):
+                src = objectify(i, SourceFile, builtins['source_file'],
+                                lang=kwargs.get('lang'))
+                if src.lang in _unity_langs:
+                    batch = batches.get(src.lang)
+                    if batch is None or len(batch) == size:
+                        batch = batches[src.lang] = []
+                        result.append(batch)
+                    batch.append(src)
+                    continue
+                i = src
+
+            result.append(objectify(
+                i, ObjectFile, bound, in_type=SourceFile, **kwargs
+            ))
+
+        list.__init__(self, (
+            self._unity_object(builtins, build, env, i, kwargs)
+            if isinstance(i, list) else i for i in result
+        ))
+
+    def _unity_object(self, builtins, build, env, sources, kwargs):
+        if len(sources) == 1:
+            return builtins['object_file'](None, sources[0], **kwargs)
+
+        first_src = sources[0]
+        text = ['#include "{}"'.format(
+            i.path.string(env.path_roots).replace('\\', '/')
+        ) for i in sources]
+
+        # Name the generated source after its contents so that changing the
+        # list of files always gives us a fresh one, but keep the object
+        # file's name stable.
+        name = first_src.path.stripext().suffix + '-unity'
+        digest = hashlib.sha1('\n'.join(text).encode('utf-8')).hexdigest()
+        unity_src = SourceFile(Path('{}-{}{}'.format(
+            name, digest[:8], lang2src[first_src.lang][0]
+        )), first_src.lang)
+        WriteFile(build, unity_src, text)
+
+        # The unity source only #includes the files in the batch, so we need
+        # to make sure any generated ones get built first.
+        generated = [i for i in sources if i.creator]
+        if generated:
+            kwargs = dict(kwargs, extra_deps=(
+                listify(kwargs.get('extra_deps')) + generated
+            ))
+
+        obj = builtins['object_file'](name, unity_src, **kwargs)
+        for i in sources:
+            self._unity_objects[i.path] = obj
+        return obj
 
     def __getitem__(self, key):
         if isinstance(key, string_types):
@@ -31,6 +110,10 @@ class ObjectFiles(list):
             for i in self:
                 if i.creator and i.creator.file.path == key:
                     return i
+            # If the file was compiled as part of a unity build, return the
+            # object file for the whole batch.
+            if key in self._unity_objects:
+                return self._unity_objects[key]
             raise ValueError("{!r} not found".format(key))
         else:
             return list.__getitem__(self, key)
@@ -182,6 +265,16 @@ def _get_flags(backend, rule, build_inputs, buildfile):
     return variables, {'args': cflags}
 
 
+def _launch(backend, compiler, buildfile, env, command):
+    # Run C-family compiles through the compiler launcher, if there is one.
+    if compiler.flavor not in ('cc', 'msvc'):
+        return command
+    launcher = env.tool('compiler_launcher')
+    if not launcher.enabled:
+        return command
+    return launcher(backend.cmd_var(launcher, buildfile), command)
+
+
 @make.rule_handler(CompileSource, CompileHeader)
 def make_compile(rule, build_inputs, buildfile, env):
     compiler = rule.compiler
@@ -206,14 +299,22 @@ def make_compile(rule, build_inputs, buildfile, env):
             depfixer = env.tool('depfixer')
             cmd_kwargs['deps'] = deps = first(output_vars) + '.d'
             df_cmd = make.cmd_var(depfixer, buildfile)
-            recipe_extra = [make.silent(depfixer(df_cmd, deps))]
-
-            buildfile.include(rule.output[0].path.addext('.d'), optional=True)
+            if env.backend_options.get('depfixer') != 'batch':
+                recipe_extra = [make.silent(depfixer(df_cmd, deps))]
 
-        buildfile.define(recipename, [compiler(
+        command = compiler(
             cmd=make.cmd_var(compiler, buildfile), input=make.qvar('<'),
             output=output_vars, **cmd_kwargs
-        )] + recipe_extra)
+        )
+        buildfile.define(recipename, [
+            _launch(make, compiler, buildfile, env, command)
+        ] + recipe_extra)
+
+    # Every object file gets its own depfile, so include each one. This is
+    # especially important for unity builds, since the real source files are
+    # only listed in the depfile.
+    if compiler.deps_flavor == 'gcc':
+        buildfile.include(rule.output[0].path.addext('.d'), optional=True)
 
     deps = []
     if isinstance(rule, CompileHeader) and rule.pch_source:
@@ -236,6 +337,25 @@ def make_compile(rule, build_inputs, buildfile, env):
     )
 
 
+@make.post_rule
+def make_depfixer_rule(build_inputs, buildfile, env):
+    # In batch mode, fix up any depfiles that changed since the last run when
+    # make starts up (i.e. before it includes them), instead of running the
+    # depfixer after every compile.
+    if env.backend_options.get('depfixer') != 'batch':
+        return
+
+    # Only bother if we compiled something that generates a depfile.
+    depfixer = env.tool('depfixer')
+    if not buildfile.has_variable(depfixer.command_var.upper()):
+        return
+
+    df_cmd = make.cmd_var(depfixer, buildfile)
+    buildfile.variable('DEPFIXER_BATCH', make.Function(
+        'shell', depfixer.batch(df_cmd, Path('.bfg_depfixer'), [Path('.')])
+    ))
+
+
 @ninja.rule_handler(CompileSource, CompileHeader)
 def ninja_compile(rule, build_inputs, buildfile, env):
     compiler = rule.compiler
@@ -264,10 +384,13 @@ def ninja_compile(rule, build_inputs, buildfile, env):
             deps = 'msvc'
             cmd_kwargs['deps'] = True
 
-        buildfile.rule(name=compiler.rule_name, command=[compiler(
+        command = compiler(
             cmd=ninja.cmd_var(compiler, buildfile), input=ninja.var('in'),
             output=output_vars, **cmd_kwargs
-        )], depfile=depfile, deps=deps)
+        )
+        buildfile.rule(name=compiler.rule_name, command=[
+            _launch(ninja, compiler, buildfile, env, command)
+        ], depfile=depfile, deps=deps)
 
     inputs = [rule.file]
     implicit_deps = []
@@ -1,12 +1,18 @@
 import fnmatch
+import json
 import os
 import posixpath
 import re
+import time
 from enum import IntEnum
+from functools import partial
+from multiprocessing.pool import ThreadPool
 
 from .hooks import builtin
+from ..atomic_file import write_if_changed
 from ..file_types import File, Directory
 from ..iterutils import iterate, listify
+from ..memoize import lru_cache
 from ..backends.make import writer as make
 from ..backends.ninja import writer as ninja
 from ..backends.make.syntax import Writer, Syntax
@@ -14,9 +20,15 @@ from ..build_inputs import build_input
 from ..path import Path, Root
 from ..platforms import known_platforms
 
+try:
+    from os import scandir
+except ImportError:  # pragma: no cover
+    scandir = None
+
 build_input('find_dirs')(lambda build_inputs, env: set())
 depfile_name = '.bfg_find_deps'
 exclude_globs = ['.*#', '*~', '#*#']
+_glob_magic_ex = re.compile(r'[*?[]')
 
 
 @builtin
@@ -24,10 +36,11 @@ class FindResult(IntEnum):
     include = 0
     not_now = 1
     exclude = 2
+    exclude_subtree = 3
 
 
 def write_depfile(path, output, seen_dirs, makeify=False):
-    with open(path, 'w') as f:
+    with write_if_changed(path) as f:
         out = Writer(f)
         out.write(output, Syntax.target)
         out.write_literal(':')
@@ -41,75 +54,255 @@ def write_depfile(path, output, seen_dirs, makeify=False):
                 out.write_literal(':\n')
 
 
-def _listdir(path):
-    dirs, nondirs = [], []
+def _is_dir(entry):
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _scandir(path):
+    # List the subdirectories and files in `path`, along with the set of
+    # subdirectories that are really symlinks (which we don't recurse into).
+    # Where possible, use `os.scandir`, which can usually tell us all this from
+    # the directory listing itself without stat-ing each entry.
+    dirs, nondirs, links = [], [], set()
     try:
-        names = os.listdir(path)
-        for name in names:
-            # Use POSIX paths so that the result is platform-agnostic.
-            curpath = posixpath.join(path, name)
-            if os.path.isdir(curpath):
-                dirs.append((name, curpath))
-            else:
-                nondirs.append((name, curpath))
-    except:
+        if scandir:
+            for entry in scandir(path):
+                # Use POSIX paths so that the result is platform-agnostic.
+                curpath = posixpath.join(path, entry.name)
+                if _is_dir(entry):
+                    dirs.append((entry.name, curpath))
+                    if entry.is_symlink():
+                        links.add(curpath)
+                else:
+                    nondirs.append((entry.name, curpath))
+        else:  # pragma: no cover
+            for name in os.listdir(path):
+                curpath = posixpath.join(path, name)
+                if os.path.isdir(curpath):
+                    dirs.append((name, curpath))
+                    if os.path.islink(curpath):
+                        links.add(curpath)
+                else:
+                    nondirs.append((name, curpath))
+    except OSError:
         pass
-    return dirs, nondirs
+    return dirs, nondirs, links
 
 
-def _walk_flat(top):
+def _listdir(path):
+    return _scandir(path)[:2]
+
+
+class FindCache(object):
+    version = 1
+    filename = '.bfg_find_cache'
+
+    # Don't save listings of directories modified this recently, since another
+    # change within the resolution of the filesystem's timestamps wouldn't
+    # update the directory's mtime.
+    racy_window = 2
+
+    def __init__(self, path=None):
+        self._path = path
+        self._seen = {}
+        try:
+            self._map = self._load(path) if path else {}
+        except (IOError, ValueError, KeyError):
+            self._map = {}
+
+    def scandir(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return _scandir(path)
+        stamp = [st.st_mtime, st.st_ino]
+
+        cached = self._map.get(path)
+        if cached and cached[0] == stamp:
+            dirs, nondirs, links = cached[1:]
+            self._seen[path] = cached
+            # This is equivalent to `posixpath.join`, but much faster.
+            prefix = path if path.endswith('/') else path + '/'
+            return ([(i, prefix + i) for i in dirs],
+                    [(i, prefix + i) for i in nondirs],
+                    set(prefix + i for i in links))
+
+        now = time.time()
+        dirs, nondirs, links = _scandir(path)
+        if now - st.st_mtime > self.racy_window:
+            self._seen[path] = [
+                stamp,
+                [name for name, _ in dirs],
+                [name for name, _ in nondirs],
+                [name for name, p in dirs if p in links],
+            ]
+        return dirs, nondirs, links
+
+    @classmethod
+    def _load(cls, path):
+        with open(path) as inp:
+            state = json.load(inp)
+        if state['version'] > cls.version:
+            raise ValueError('saved version exceeds expected version')
+        return state['data']
+
+    def save(self, path=None):
+        path = path or self._path
+        if path is None:
+            return
+
+        with open(path, 'w') as out:
+            # Only save the directories we visited this time, so that listings
+            # for old directories eventually get dropped.
+            json.dump({
+                'version': self.version,
+                'data': self._seen,
+            }, out)
+
+
+@build_input('find_cache')
+def _find_cache(build_inputs, env):
+    path = (os.path.join(env.builddir.string(), FindCache.filename)
+            if env.builddir else None)
+    return FindCache(path)
+
+
+def _walk_flat(top, scandir=_scandir):
     if os.path.exists(top):
-        yield (top,) + _listdir(top)
+        yield (top,) + scandir(top)[:2]
 
 
-def _walk_recursive(top):
+def _descend(name, path):
+    return True
+
+
+def _walk_recursive(top, scandir=_scandir, descend=_descend):
     if not os.path.exists(top):
         return
-    dirs, nondirs = _listdir(top)
+    dirs, nondirs, links = scandir(top)
     yield top, dirs, nondirs
     for name, path in dirs:
-        if not os.path.islink(path):
-            for i in _walk_recursive(path):
+        if path not in links and descend(name, path):
+            for i in _walk_recursive(path, scandir, descend):
                 yield i
 
 
+def _walk_parallel(top, jobs, scandir=_scandir, descend=_descend):
+    if not os.path.exists(top):
+        return
+
+    # List each level of the tree on a thread pool (the listing itself happens
+    # outside of the GIL), and then yield the results in the same order as
+    # `_walk_recursive` so that the output is deterministic.
+    listings = {}
+    pool = ThreadPool(jobs)
+    try:
+        pending = [top]
+        while pending:
+            results = pool.map(scandir, pending)
+            listings.update(zip(pending, results))
+            pending = [path for dirs, _, links in results
+                       for name, path in dirs
+                       if path not in links and descend(name, path)]
+    finally:
+        pool.close()
+        pool.join()
+
+    def walk(base):
+        dirs, nondirs, links = listings[base]
+        yield base, dirs, nondirs
+        for name, path in dirs:
+            if path in listings:
+                for i in walk(path):
+                    yield i
+
+    for i in walk(top):
+        yield i
+
+
+def _glob_matcher(globs):
+    # Compile a list of globs into a single function that checks if a name
+    # matches any of them. Most globs look like `*.ext`, so check those against
+    # the end of the name directly, and combine the rest into one regex.
+    suffixes, names, patterns = [], set(), []
+    for i in iterate(globs):
+        if i.startswith('*') and not _glob_magic_ex.search(i[1:]):
+            suffixes.append(i[1:])
+        elif not _glob_magic_ex.search(i):
+            names.add(i)
+        else:
+            patterns.append('(?:{})'.format(fnmatch.translate(i)))
+
+    suffixes = tuple(suffixes)
+    regex = re.compile('|'.join(patterns)) if patterns else None
+
+    def fn(name):
+        return ( (suffixes and name.endswith(suffixes)) or name in names or
+                 (regex is not None and regex.match(name) is not None) )
+    return fn
+
+
 def _filter_from_glob(match_type, matches, extra, exclude):
-    matches = [re.compile(fnmatch.translate(i)) for i in iterate(matches)]
-    extra = [re.compile(fnmatch.translate(i)) for i in iterate(extra)]
-    exclude = [re.compile(fnmatch.translate(i)) for i in iterate(exclude)]
+    matches = _glob_matcher(matches)
+    extra = _glob_matcher(extra)
+    exclude = _glob_matcher(exclude)
+    any_type = match_type == '*'
 
     def fn(name, path, type):
-        if match_type in {type, '*'}:
-            if any(ex.match(name) for ex in exclude):
+        if any_type or match_type == type:
+            if exclude(name):
                 return FindResult.exclude
-            if any(ex.match(name) for ex in matches):
+            if matches(name):
                 return FindResult.include
-            elif any(ex.match(name) for ex in extra):
+            elif extra(name):
                 return FindResult.not_now
         return FindResult.exclude
     return fn
 
 
-def _find_files(paths, filter, flat, as_object):
+def _find_files(paths, filter, flat, as_object, jobs=None, scandir=_scandir):
     # "Does the walker choose the path, or the path the walker?" - Garth Nix
-    walker = _walk_flat if flat else _walk_recursive
-
     results, dist_results, seen_dirs = [], [], []
+    dir_results = {}
+
+    def filter_dir(name, path):
+        # Directories get filtered both when we list them and when the walker
+        # decides whether to descend into them, so remember the result.
+        if path not in dir_results:
+            dir_results[path] = filter(name, path, 'd')
+        return dir_results[path]
+
+    def descend(name, path):
+        return filter_dir(name, path) != FindResult.exclude_subtree
+
+    if flat:
+        walker = partial(_walk_flat, scandir=scandir)
+    elif jobs and jobs > 1:
+        walker = partial(_walk_parallel, jobs=jobs, scandir=scandir,
+                         descend=descend)
+    else:
+        walker = partial(_walk_recursive, scandir=scandir, descend=descend)
 
     def do_filter(files, type):
         cls = File if type == 'f' else lambda p: Directory(p, None)
         for name, path in files:
-            fileobj = cls(Path(path, Root.srcdir))
-            matched = filter(name, path, type)
+            matched = (filter(name, path, type) if type == 'f' else
+                       filter_dir(name, path))
             if matched == FindResult.include:
+                fileobj = cls(Path(path, Root.srcdir))
                 dist_results.append(fileobj)
                 results.append(fileobj if as_object else path)
             elif matched == FindResult.not_now:
-                dist_results.append(fileobj)
+                dist_results.append(cls(Path(path, Root.srcdir)))
 
     paths = listify(paths)
     do_filter(( (os.path.basename(p), p) for p in paths ), 'd')
     for p in paths:
+        if not descend(os.path.basename(p), p):
+            continue
         for base, dirs, files in walker(p):
             seen_dirs.append(base)
 
@@ -123,29 +316,43 @@ def find(path='.', name='*', type='*', flat=False):
     return _find_files(path, _filter_from_glob(name, type), flat)[0]
 
 
+@lru_cache(maxsize=None)
+def _platform_filter_ex(*my_plat):
+    sub = '|'.join(re.escape(i) for i in known_platforms if i not in my_plat)
+    return re.compile(r'(^|/|_)(' + sub + r')(\.[^\.]$|$|/)')
+
+
 @builtin.globals('env')
 def filter_by_platform(env, name, path, type):
-    my_plat = set([env.platform.name, env.platform.flavor])
-    sub = '|'.join(re.escape(i) for i in known_platforms if i not in my_plat)
-    ex = r'(^|/|_)(' + sub + r')(\.[^\.]$|$|/)'
-    return FindResult.not_now if re.search(ex, path) else FindResult.include
+    ex = _platform_filter_ex(env.platform.name, env.platform.flavor)
+    return FindResult.not_now if ex.search(path) else FindResult.include
 
 
 @builtin.globals('builtins', 'build_inputs', 'env')
 def find_files(builtins, build_inputs, env, path='.', name='*', type='*',
                extra=None, exclude=exclude_globs, filter=filter_by_platform,
-               flat=False, cache=True, dist=True, as_object=False):
+               flat=False, cache=True, dist=True, as_object=False,
+               jobs=None):
     glob_filter = _filter_from_glob(type, name, extra, exclude)
     if filter:
         if filter == filter_by_platform:
             filter = builtins['filter_by_platform']
 
         def final_filter(name, path, type):
-            return max(filter(name, path, type), glob_filter(name, path, type))
+            # Check the globs first, since if they exclude this file, the
+            # result is always `exclude` anyway. Directories always go through
+            # the filter too, in case it wants to exclude the whole subtree.
+            result = glob_filter(name, path, type)
+            if result == FindResult.exclude and type == 'f':
+                return result
+            return max(filter(name, path, type), result)
     else:
         final_filter = glob_filter
 
-    results, dist, seen_dirs = _find_files(path, final_filter, flat, as_object)
+    results, dist, seen_dirs = _find_files(
+        path, final_filter, flat, as_object, jobs,
+        build_inputs['find_cache'].scandir
+    )
 
     if cache:
         build_inputs['find_dirs'].update(seen_dirs)
@@ -160,6 +367,7 @@ def make_regenerate_rule(build_inputs, buildfile, env):
     bfg9000 = env.tool('bfg9000')
     bfgcmd = make.cmd_var(bfg9000, buildfile)
 
+    build_inputs['find_cache'].save()
     if build_inputs['find_dirs']:
         write_depfile(Path(depfile_name).string(env.path_roots),
                       'Makefile', build_inputs['find_dirs'], makeify=True)
@@ -178,6 +386,7 @@ def ninja_regenerate_rule(build_inputs, buildfile, env):
     bfgcmd = ninja.cmd_var(bfg9000, buildfile)
     depfile = None
 
+    build_inputs['find_cache'].save()
     if build_inputs['find_dirs']:
         write_depfile(Path(depfile_name).string(env.path_roots),
                       'build.ninja', build_inputs['find_dirs'])
@@ -188,6 +397,7 @@ def ninja_regenerate_rule(build_inputs, buildfile, env):
         command=[bfg9000.regenerate(bfgcmd, Path('.'))],
         generator=True,
         depfile=depfile,
+        restat=True
     )
     buildfile.build(
         output=Path('build.ninja'),
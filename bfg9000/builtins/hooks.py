@@ -1,7 +1,9 @@
 import functools
 import inspect
 import sys
-from six import iteritems
+import types
+
+from .. import profiler
 
 _all_builtins = {}
 
@@ -18,6 +20,16 @@ class _PartialFunctionBinder(_Binder):
     def __init__(self, fn, *args):
         _Binder.__init__(self, fn)
         self._args = args
+        self._signature = None
+
+    def _get_signature(self):
+        # The signature is the same every time we bind this function, so only
+        # compute it once.
+        if self._signature is None:
+            sig = inspect.signature(self._fn)
+            params = list(sig.parameters.values())[len(self._args):]
+            self._signature = inspect.Signature(params)
+        return self._signature
 
     def bind(self, **kwargs):
         pre_args = tuple(kwargs[i] for i in self._args)
@@ -27,9 +39,7 @@ class _PartialFunctionBinder(_Binder):
             return self._fn(*(pre_args + args), **kwargs)
 
         if sys.version_info >= (3, 3):
-            sig = inspect.signature(wrapped)
-            params = list(sig.parameters.values())[len(kwargs):]
-            wrapped.__signature__ = inspect.Signature(params)
+            wrapped.__signature__ = self._get_signature()
         return wrapped
 
 
@@ -66,10 +76,40 @@ builtin.getter = _BuiltinDecorator(_GetterBinder)
 builtin.type = _decorate_type
 
 
+class _Builtins(dict):
+    # A dict of builtins that binds each one the first time it's looked up,
+    # since most scripts only use a few of them.
+    def __init__(self, kwargs):
+        dict.__init__(self)
+        self.__kwargs = kwargs
+
+    def __missing__(self, key):
+        if key not in _all_builtins:
+            raise KeyError(key)
+        value = _all_builtins[key].bind(builtins=self, **self.__kwargs)
+        if profiler.enabled() and isinstance(value, types.FunctionType):
+            value = profiler.wrap('builtin', key, value)
+        self[key] = value
+        return value
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in _all_builtins
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
 def bind(**kwargs):
-    builtins = {}
-    for k, v in iteritems(_all_builtins):
-        builtins[k] = v.bind(builtins=builtins, **kwargs)
+    builtins = _Builtins(kwargs)
+
+    # Python 2 looks up globals inside functions without calling
+    # `__missing__`, so we have to bind everything up front.
+    if sys.version_info < (3,):
+        for k in _all_builtins:
+            builtins[k]
 
     return builtins
 
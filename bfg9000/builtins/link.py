@@ -5,6 +5,7 @@ from six.moves import reduce
 
 from .compile import ObjectFiles
 from .hooks import builtin
+from .pool import ninja_pool
 from ..backends.make import writer as make
 from ..backends.ninja import writer as ninja
 from ..build_inputs import build_input, Edge
@@ -37,13 +38,16 @@ class Link(Edge):
     def __init__(self, builtins, build, env, name, files=None, include=None,
                  pch=None, libs=None, packages=None, compile_options=None,
                  link_options=None, entry_point=None, lang=None,
-                 extra_deps=None):
+                 unity=None, pool=None, extra_deps=None):
         self.name = self.__name(name)
+        self.pool = build['pools'].name(
+            self.default_pool if pool is None else pool
+        )
 
         self.files = objectify(
             files, ObjectFiles, builtins['object_files'], object,
             include=include, pch=pch, libs=libs, packages=packages,
-            options=compile_options, lang=lang
+            options=compile_options, lang=lang, unity=unity
         )
         self.files.extend(chain.from_iterable(
             getattr(i, 'extra_objects', []) for i in self.files
@@ -135,6 +139,7 @@ class StaticLink(Link):
     mode = 'static_library'
     msbuild_mode = 'StaticLibrary'
     _prefix = 'lib'
+    default_pool = None
 
     def _fill_options(self, env, output):
         primary = first(output)
@@ -150,6 +155,7 @@ class DynamicLink(Link):
     mode = 'executable'
     msbuild_mode = 'Application'
     _prefix = ''
+    default_pool = 'link'
 
     def _fill_options(self, env, output):
         self._internal_options = (
@@ -340,6 +346,10 @@ def ninja_link(rule, build_inputs, buildfile, env):
             output=output_vars, **cmd_kwargs
         )])
 
+    pool = ninja_pool(build_inputs, buildfile, rule.pool)
+    if pool:
+        variables[ninja.var('pool')] = pool
+
     manifest = listify(getattr(rule, 'manifest', None))
     buildfile.build(
         output=rule.output,
@@ -1,18 +1,24 @@
 import os.path
 import re
+from multiprocessing.pool import ThreadPool
 from packaging.version import Version
 import subprocess
 
 from .hooks import builtin
 from .find import find
 from .version import check_version, make_specifier
-from .. import shell
+from ..build_inputs import build_input
 from ..file_types import Executable
 from ..iterutils import iterate, listify
 from ..path import Path, Root
 from ..platforms import which
 
 
+# The files (and directories) that any packages we found came from, so that
+# `refresh` can tell when a package has changed.
+build_input('package_files')(lambda build_inputs, env: set())
+
+
 class Package(object):
     pass
 
@@ -36,18 +42,41 @@ class SystemPackage(Package):
 
 
 class PkgConfigPackage(Package):
+    _flag_queries = ('cflags', 'ldflags', 'ldlibs')
+
     def __init__(self, name, pkg_config):
         self.name = name
         self._pkg_config = pkg_config
+        self._results = {}
+
+    def _call(self, query, *args):
+        # Remember the result of each query, since the flags are requested
+        # again for every file that uses this package.
+        key = (query,) + args
+        if key not in self._results:
+            self._results[key] = self._pkg_config.query(query, self.name,
+                                                        *args)
+        return self._results[key]
+
+    def _flags(self, query, msvc_syntax):
+        # When running pkg-config, it can't give us each kind of flag
+        # separately in a single run, so the first time we need any of them,
+        # fetch them all at once.
+        if ( not self._pkg_config.native and
+             (query, msvc_syntax) not in self._results ):
+            def fetch(query):
+                try:
+                    self._call(query, msvc_syntax)
+                except (OSError, subprocess.CalledProcessError):
+                    pass
 
-    def _call(self, command, *args):
-        # XXX: Use shell mode so that the (user-defined) pkg-config command can
-        # have multiple arguments defined in it?
-        return subprocess.check_output(
-            getattr(self._pkg_config, command)(
-                self._pkg_config.command, self.name, *args
-            ), universal_newlines=True
-        ).strip()
+            pool = ThreadPool(len(self._flag_queries))
+            try:
+                pool.map(fetch, self._flag_queries)
+            finally:
+                pool.close()
+                pool.join()
+        return list(self._call(query, msvc_syntax))
 
     @property
     def version(self):
@@ -56,13 +85,13 @@ class PkgConfigPackage(Package):
         return Version(self._call('version'))
 
     def cflags(self, compiler, output):
-        return shell.split(self._call('cflags', compiler.flavor == 'msvc'))
+        return self._flags('cflags', compiler.flavor == 'msvc')
 
     def ldflags(self, linker, output):
-        return shell.split(self._call('ldflags', linker.flavor == 'msvc'))
+        return self._flags('ldflags', linker.flavor == 'msvc')
 
     def ldlibs(self, linker, output):
-        return shell.split(self._call('ldlibs', linker.flavor == 'msvc'))
+        return self._flags('ldlibs', linker.flavor == 'msvc')
 
 
 def _boost_version(header, required_version=None):
@@ -77,19 +106,43 @@ def _boost_version(header, required_version=None):
     raise IOError('unable to parse "boost/version.hpp"')
 
 
-@builtin.globals('env')
-def system_package(env, name, lang='c', kind='any', header=None):
+def _header_path(header, name):
+    return os.path.join(header.path.string(), name)
+
+
+def _pkg_config_files(pkg_config, name):
+    path = [i for i in pkg_config.search_path() or [] if os.path.isdir(i)]
+    if pkg_config.native:
+        files = [i.path for i in pkg_config.resolver().packages(name, True)]
+    else:
+        # We don't know which .pc files pkg-config actually read, so use all
+        # of them.
+        files = [os.path.join(d, i) for d in path for i in os.listdir(d)
+                 if i.endswith('.pc')]
+    # Include the directories themselves too, since adding a .pc file can
+    # change which one gets used.
+    return path + files
+
+
+@builtin.globals('build_inputs', 'env')
+def system_package(build, env, name, lang='c', kind='any', header=None):
     if kind not in ('any', 'shared', 'static'):
         raise ValueError("kind must be one of 'any', 'shared', or 'static'")
 
     pkg = env.builder(lang).packages
-    includes = [pkg.header(i) for i in iterate(header)]
+    headers = listify(header)
+    includes = [pkg.header(i) for i in headers]
     lib = pkg.library(name, kind)
+
+    build['package_files'].update(
+        [_header_path(*i) for i in zip(includes, headers)] +
+        [lib.path.string()]
+    )
     return SystemPackage(includes=includes, libraries=[lib])
 
 
-@builtin.globals('env')
-def boost_package(env, name=None, version=None):
+@builtin.globals('build_inputs', 'env')
+def boost_package(build, env, name=None, version=None):
     version = make_specifier(version)
     pkg = env.builder('c++').packages
     version_hpp = 'boost/version.hpp'
@@ -102,6 +155,7 @@ def boost_package(env, name=None, version=None):
 
     if incdir:
         header = pkg.header(version_hpp, [incdir])
+        build['package_files'].add(_header_path(header, version_hpp))
         boost_version = _boost_version(header, version)
     else:
         # On Windows, check the default install location, which is structured
@@ -112,6 +166,9 @@ def boost_package(env, name=None, version=None):
                 try:
                     header = pkg.header(version_hpp, [max(dirs)])
                     boost_version = _boost_version(header, version)
+                    build['package_files'].add(
+                        _header_path(header, version_hpp)
+                    )
                     return SystemPackage(
                         includes=[header],
                         lib_dirs=[r'C:\Boost\lib'],
@@ -121,6 +178,7 @@ def boost_package(env, name=None, version=None):
                     pass
 
         header = pkg.header(version_hpp)
+        build['package_files'].add(_header_path(header, version_hpp))
         boost_version = _boost_version(header, version)
 
     if env.platform.name == 'windows':
@@ -134,19 +192,23 @@ def boost_package(env, name=None, version=None):
         )
     else:
         dirs = [libdir] if libdir else None
+        libs = [pkg.library('boost_' + i, search_dirs=dirs)
+                for i in iterate(name)]
+        build['package_files'].update(i.path.string() for i in libs)
         return SystemPackage(
             includes=[header],
-            libraries=[pkg.library('boost_' + i, search_dirs=dirs)
-                       for i in iterate(name)],
+            libraries=libs,
             version=boost_version
         )
 
 
-@builtin.globals('env')
-def pkgconfig_package(env, name, version=None):
-    pkg = PkgConfigPackage(name, env.tool('pkg_config'))
+@builtin.globals('build_inputs', 'env')
+def pkgconfig_package(build, env, name, version=None):
+    pkg_config = env.tool('pkg_config')
+    pkg = PkgConfigPackage(name, pkg_config)
     version = make_specifier(version)
     check_version(pkg.version, version, name)
+    build['package_files'].update(_pkg_config_files(pkg_config, name))
     return pkg
 
 
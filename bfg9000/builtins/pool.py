@@ -0,0 +1,89 @@
+import os
+import re
+from collections import namedtuple
+from six import integer_types
+
+from .hooks import builtin
+from ..build_inputs import build_input
+
+Pool = namedtuple('Pool', ['name', 'depth'])
+
+# Ninja's built-in pool for commands that need the terminal.
+console_pool = Pool('console', 1)
+
+# Roughly how much memory to budget for each link running at once. Large links
+# (especially with debug info) are memory-bound, so running one per core can
+# easily exhaust the machine's RAM.
+_link_memory = 2 * 1024 ** 3
+
+
+def _physical_memory():
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _link_pool_depth():
+    # Use the total memory, not the currently-free memory, so that
+    # regenerating the build files gives the same result each time.
+    memory = _physical_memory()
+    if not memory or memory < 0:
+        return None
+    return max(1, memory // _link_memory)
+
+
+@build_input('pools')
+class Pools(object):
+    def __init__(self, build_inputs, env):
+        # The default "link" pool can be redefined by the user; if we can't
+        # tell how much memory we have, it doesn't limit anything.
+        self._pools = {'link': Pool('link', _link_pool_depth())}
+        self._defaults = {'link'}
+
+    def add(self, name, depth):
+        if re.search(r'\W', name) or name == 'console':
+            raise ValueError('invalid pool name {!r}'.format(name))
+        if not isinstance(depth, integer_types) or depth < 1:
+            raise ValueError('pool depth must be a positive integer')
+
+        pool = Pool(name, depth)
+        existing = self._pools.get(name)
+        if existing and existing != pool and name not in self._defaults:
+            raise ValueError("pool '{}' already exists".format(name))
+
+        self._defaults.discard(name)
+        self._pools[name] = pool
+        return pool
+
+    def get(self, pool):
+        if pool is None or isinstance(pool, Pool):
+            return pool
+        if pool == 'console':
+            return console_pool
+        try:
+            return self._pools[pool]
+        except KeyError:
+            raise ValueError("unknown pool '{}'".format(pool))
+
+    def name(self, pool):
+        # Edges only remember the name of their pool, since its depth can still
+        # be changed (e.g. by redefining the "link" pool) after they're made.
+        pool = self.get(pool)
+        return pool.name if pool else None
+
+
+@builtin.globals('build_inputs')
+def pool(build, name, depth):
+    return build['pools'].add(name, depth)
+
+
+def ninja_pool(build_inputs, buildfile, name):
+    # Declare the pool the first time it's used and return the value for the
+    # `pool` variable of a rule or build statement, if any.
+    pool = build_inputs['pools'].get(name)
+    if pool is None or pool.depth is None:
+        return None
+    if pool != console_pool:
+        buildfile.pool(pool.name, pool.depth)
+    return pool.name
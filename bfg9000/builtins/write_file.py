@@ -1,7 +1,7 @@
 from ..backends.make import writer as make
 from ..backends.ninja import writer as ninja
 from ..build_inputs import Edge
-from ..iterutils import listify
+from ..iterutils import listify, uniques
 
 
 class WriteFile(Edge):
@@ -20,8 +20,10 @@ def make_write_file(rule, build_inputs, buildfile, env):
             input=make.var('1'), output=make.qvar('@')
         )])
 
+    dirs = uniques(i.path.parent() for i in rule.output)
     buildfile.rule(
         target=rule.output,
+        order_only=[i.append(make.dir_sentinel) for i in dirs if i],
         recipe=make.Call(recipename, rule.text)
     )
 
@@ -35,7 +37,8 @@ def ninja_write_file(rule, build_inputs, buildfile, env):
             command=[printf(
                 cmd=ninja.cmd_var(printf, buildfile), format='%s\\n',
                 input=ninja.var('text'), output=ninja.var('out')
-            )]
+            )],
+            restat=printf.restat
         )
 
     buildfile.build(
@@ -1,7 +1,10 @@
 import argparse
+import os
+import re
 import sys
-
+import time
 from enum import Enum
+from six.moves import cStringIO as StringIO
 
 from .version import version
 
@@ -23,6 +26,21 @@ class UnexpectedTokenError(ParseError):
         ParseError.__init__(self, "unexpected token '{}'".format(tok))
 
 
+# Rather than looking at each character individually, match whole runs of
+# ordinary characters at once. A colon is only special when followed by
+# whitespace; otherwise, it and the character after it are taken literally,
+# just like a backslash and the character after it. Escaped newlines are
+# swallowed, and any that are next to whitespace just become part of it.
+_token_ex = re.compile(r"""
+    (?P<colon>:[ \t]) |
+    (?P<colon_newline>:\n) |
+    (?P<space>(?:[ \t] | \\\n)*[ \t](?:[ \t] | \\\n)*) |
+    (?P<escaped_newline>\\\n) |
+    (?P<newline>\n) |
+    (?P<char>(?:[^:\\ \t\n]+ | \\[^\n] | :[^ \t\n\\] | :(?=\\))+)
+""", re.VERBOSE)
+
+
 def tokenize(s):
     # The depfile syntax is a bit weird, since it seems no one quite
     # understands the correct ways to escape characters for Make in all cases
@@ -30,40 +48,61 @@ def tokenize(s):
     # versions). For our purposes though, we only need to recognize when
     # unescaped colons (always followed by whitespace in the depfile
     # generators) and unescaped spaces are emitted.
+    return tokenize_chunks([s])
+
+
+def tokenize_chunks(chunks):
+    buf = ''
+    for chunk in chunks:
+        buf += chunk
+        tokens, pos = _tokenize_buffer(buf)
+        for i in tokens:
+            yield i
+        buf = buf[pos:]
+
+    tokens, pos = _tokenize_buffer(buf, eof=True)
+    for i in tokens:
+        yield i
+    if pos != len(buf):
+        raise ParseError('unexpected end of file')
 
-    s = iter(s)
-    while True:
-        c = next(s, None)
-        if c is None:
-            return
-
-        if c == ':':
-            c = next(s)
-            if c in ' \t\n':
-                yield (Token.colon, None)
-                if c == '\n':
-                    yield (Token.newline, None)
-                continue
-            else:
-                yield (Token.char, ':')
-
-        if c == '\\':
-            c = next(s)
-            if c != '\n':  # Swallow escaped newlines.
-                yield (Token.char, '\\')
-                yield (Token.char, c)
-        elif c in ' \t':
-            yield (Token.space, None)
-        elif c == '\n':
-            yield (Token.newline, None)
-        else:
-            yield (Token.char, c)
+
+def _tokenize_buffer(buf, eof=False):
+    # Return the tokens in `buf`, along with the position of the first
+    # character we didn't consume. Unless we're at the end of the file, we hold
+    # back the last token, since it might continue in the next chunk.
+    tokens = []
+    pos, end = 0, len(buf)
+    while pos < end:
+        m = _token_ex.match(buf, pos)
+        if not m or (not eof and m.end() == end):
+            break
+
+        kind = m.lastgroup
+        if kind == 'char':
+            tokens.append((Token.char, m.group()))
+        elif kind == 'space':
+            tokens.append((Token.space, None))
+        elif kind == 'newline':
+            tokens.append((Token.newline, None))
+        elif kind == 'colon':
+            tokens.append((Token.colon, None))
+        elif kind == 'colon_newline':
+            tokens.append((Token.colon, None))
+            tokens.append((Token.newline, None))
+        # Escaped newlines are just swallowed.
+        pos = m.end()
+    return tokens, pos
+
+
+def _read_chunks(stream, size=65536):
+    return iter(lambda: stream.read(size), '')
 
 
 def emit_deps(instream, outstream):
     state = State.target
 
-    for tok, value in tokenize(instream.read()):
+    for tok, value in tokenize_chunks(_read_chunks(instream)):
         if state == State.target:
             if tok == Token.space:
                 state = State.between_targets
@@ -102,17 +141,83 @@ def emit_deps(instream, outstream):
         raise ParseError('unexpected end of file')
 
 
+def fix_depfile(path):
+    # Append the dependencies-as-targets to the depfile in place. If they're
+    # already there (i.e. we've fixed this depfile before), leave it alone.
+    with open(path) as f:
+        contents = f.read()
+
+    out = StringIO()
+    emit_deps(StringIO(contents), out)
+    extra = out.getvalue()
+    if not extra or contents.endswith(extra):
+        return False
+
+    with open(path, 'a') as f:
+        f.write(extra)
+    return True
+
+
+def find_depfiles(paths, since=None):
+    for path in paths:
+        if os.path.isdir(path):
+            for base, dirs, files in os.walk(path):
+                dirs[:] = [i for i in dirs if not i.startswith('.')]
+                for i in files:
+                    if i.endswith('.d'):
+                        depfile = os.path.join(base, i)
+                        if since is None or os.path.getmtime(depfile) >= since:
+                            yield depfile
+        else:
+            yield path
+
+
+def fix_depfiles(paths, stamp=None):
+    # Only look at depfiles that have changed since the last time we ran (with
+    # this stamp file). Anything that changes while we're running will get
+    # looked at next time.
+    since = None
+    if stamp:
+        try:
+            since = os.path.getmtime(stamp)
+        except OSError:
+            pass
+        start = time.time()
+
+    for i in find_depfiles(paths, since):
+        try:
+            fix_depfile(i)
+        except ParseError as e:
+            raise ParseError('{}: {}'.format(i, e))
+
+    if stamp:
+        with open(stamp, 'a'):
+            pass
+        os.utime(stamp, (start, start))
+
+
 def main():
     parser = argparse.ArgumentParser(
         prog='bfg9000-depfixer',
         description='Read in a depfile (in Makefile syntax) on stdin and ' +
-                    'output all the dependencies as targets on stdout.'
+                    'output all the dependencies as targets on stdout. If ' +
+                    'any depfiles (or directories of them) are passed, ' +
+                    'append the dependencies as targets to each of them ' +
+                    'instead.'
     )
     parser.add_argument('--version', action='version',
                         version='%(prog)s ' + version)
-    parser.parse_args()
+    parser.add_argument('--stamp', metavar='FILE',
+                        help=('only fix depfiles modified since FILE was ' +
+                              'last updated, then update it'))
+    parser.add_argument('depfiles', metavar='DEPFILE', nargs='*',
+                        help='depfile or directory of depfiles to fix')
+    args = parser.parse_args()
 
     try:
-        emit_deps(sys.stdin, sys.stdout)
+        if args.depfiles:
+            fix_depfiles(args.depfiles, args.stamp)
+        else:
+            emit_deps(sys.stdin, sys.stdout)
     except Exception as e:
         parser.error(e)
@@ -0,0 +1,144 @@
+import json
+import os
+import time
+
+
+def _split(name):
+    # Split a relative filename into its components, or return None if we
+    # can't look it up via directory listings (e.g. because it has "..").
+    parts = name.replace(os.sep, '/').split('/')
+    if any(i in ('', '.', '..') for i in parts):
+        return None
+    return [os.path.normcase(i) for i in parts]
+
+
+class DirIndex(object):
+    version = 1
+    filename = '.bfg_dir_index'
+
+    # Don't save listings of directories modified this recently, since another
+    # change within the resolution of the filesystem's timestamps wouldn't
+    # update the directory's mtime.
+    racy_window = 2
+
+    def __init__(self, path=None):
+        self._path = path
+        self._listings = {}
+        self._merged = {}
+        self._seen = {}
+        try:
+            self._map = self._load(path) if path else {}
+        except (IOError, ValueError, KeyError):
+            self._map = {}
+
+    def listdir(self, path):
+        # Return the (case-normalized) names in a directory, or None if it
+        # isn't a directory. Each directory is only ever listed once.
+        try:
+            return self._listings[path]
+        except KeyError:
+            pass
+
+        try:
+            st = os.stat(path)
+            stamp = [st.st_mtime, st.st_ino]
+            cached = self._map.get(path)
+            if cached and cached[0] == stamp:
+                self._seen[path] = cached
+                names = cached[1]
+            else:
+                now = time.time()
+                names = [os.path.normcase(i) for i in os.listdir(path)]
+                if now - st.st_mtime > self.racy_window:
+                    self._seen[path] = [stamp, names]
+            result = frozenset(names)
+        except OSError:
+            result = None
+
+        self._listings[path] = result
+        return result
+
+    def listed(self):
+        # Return every directory we've tried to list (even if it didn't exist).
+        return list(self._listings)
+
+    def isdir(self, path):
+        return self.listdir(path) is not None
+
+    def exists(self, base, name):
+        parts = _split(name)
+        if parts is None:
+            return os.path.exists(os.path.join(base, name))
+
+        for i in parts[:-1]:
+            listing = self.listdir(base)
+            if listing is None or i not in listing:
+                return False
+            base = os.path.join(base, i)
+        listing = self.listdir(base)
+        return listing is not None and parts[-1] in listing
+
+    def _first_dirs(self, search_dirs):
+        # Map each name in any of the search dirs to the index of the first
+        # dir it's in, so that finding a file takes constant time no matter
+        # how many dirs we're searching.
+        key = tuple(search_dirs)
+        if key not in self._merged:
+            result = {}
+            for i, base in enumerate(search_dirs):
+                for name in self.listdir(base) or ():
+                    result.setdefault(name, i)
+            self._merged[key] = result
+        return self._merged[key]
+
+    def find(self, search_dirs, names):
+        # Find the first of `search_dirs` containing any of `names`, preferring
+        # earlier names within each dir, and return the (dir, name) pair.
+        first_dirs = self._first_dirs(search_dirs)
+        found = []
+        for i, name in enumerate(names):
+            parts = _split(name)
+            if parts is not None and len(parts) == 1:
+                if parts[0] in first_dirs:
+                    found.append((first_dirs[parts[0]], i))
+                continue
+
+            for j, base in enumerate(search_dirs):
+                if self.exists(base, name):
+                    found.append((j, i))
+                    break
+
+        if found:
+            j, i = min(found)
+            # The listing tells us there's *something* with this name, but
+            # make sure it really exists (e.g. it's not a dangling symlink).
+            if os.path.exists(os.path.join(search_dirs[j], names[i])):
+                return search_dirs[j], names[i]
+
+            # Fall back to checking everything by hand.
+            for base in search_dirs:
+                for name in names:
+                    if os.path.exists(os.path.join(base, name)):
+                        return base, name
+        return None
+
+    @classmethod
+    def _load(cls, path):
+        with open(path) as inp:
+            state = json.load(inp)
+        if state['version'] > cls.version:
+            raise ValueError('saved version exceeds expected version')
+        return state['data']
+
+    def save(self, path=None):
+        path = path or self._path
+        if path is None:
+            return
+
+        with open(path, 'w') as out:
+            # Only save the directories we looked in this time, so that
+            # listings for old directories eventually get dropped.
+            json.dump({
+                'version': self.version,
+                'data': self._seen,
+            }, out)
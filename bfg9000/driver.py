@@ -1,12 +1,16 @@
 import argparse
+import functools
+import inspect
 import os
+import subprocess
 import sys
 
-from . import builtins
 from . import log
-from .backends import list_backends
+from . import profiler
+from .backends import backend_names, get_backend, list_backends
 from .build_inputs import BuildInputs
 from .environment import Environment, EnvVersionError
+from .fingerprint import Fingerprint
 from .path import abspath, InstallRoot, Path, Root, samefile
 from .platforms import platform_info
 from .version import version
@@ -39,6 +43,11 @@ is typically run automatically if bfg9000 determines that the build files are
 out of date.
 """
 
+cache_stats_desc = """
+Show the statistics of the compiler launcher (e.g. ccache or sccache) used by
+an existing build directory.
+"""
+
 
 def is_srcdir(path):
     return os.path.exists(os.path.join(path, bfgfile))
@@ -52,16 +61,39 @@ def check_dir(parser, pathstr, must_exist=True):
         parser.error("'{}' does not exist".format(pathstr))
 
 
+def profile(fn):
+    @functools.wraps(fn)
+    def wrapper(parser, args):
+        if not args.profile and not args.profile_trace:
+            return fn(parser, args)
+
+        prof = profiler.enable()
+        try:
+            with prof.span('phase', fn.__name__):
+                return fn(parser, args)
+        finally:
+            profiler.disable()
+            prof.report()
+            if args.profile_trace:
+                prof.write_trace(args.profile_trace)
+    return wrapper
+
+
 def execute_script(env, filename=bfgfile):
     bfgpath = Path(filename, Root.srcdir)
-    build = BuildInputs(env, bfgpath)
-    builtin_dict = builtins.bind(build_inputs=build, env=env)
+    with profiler.span('phase', 'load builtins'):
+        # Import the builtins here, since they're only needed when we're
+        # actually running a build script.
+        from . import builtins
+        build = BuildInputs(env, bfgpath)
+        builtin_dict = builtins.bind(build_inputs=build, env=env)
 
     with open(bfgpath.string(env.path_roots), 'r') as f:
         os.chdir(env.srcdir.string())
         code = compile(f.read(), filename, 'exec')
         try:
-            exec(code, builtin_dict)
+            with profiler.span('phase', 'execute ' + filename):
+                exec(code, builtin_dict)
         except SystemExit:
             pass
         except Exception as e:
@@ -71,6 +103,20 @@ def execute_script(env, filename=bfgfile):
     return build
 
 
+def generate(env, backend, langs=None):
+    if langs:
+        with profiler.span('phase', 'detect toolchains'):
+            env.load_builders(langs)
+
+    build = execute_script(env)
+    with profiler.span('phase', 'write build files'):
+        outputs = backend.write(env, build)
+    with profiler.span('phase', 'save state'):
+        Fingerprint.compute(env, build, outputs).save(env.builddir.string())
+        env.probes.save()
+        env.dir_index.save()
+
+
 class Directory(argparse.Action):
     def __call__(self, parser, namespace, values, option_string=None):
         check_dir(parser, values, must_exist=False)
@@ -110,18 +156,58 @@ def add_generic_args(parser):
                         dest='color',
                         help=('show colored output (equivalent to ' +
                               '`--color=always`)'))
+    # This is handled in `bfg9000.main` before the driver is even imported;
+    # it's only here so that it shows up in the help.
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='report how long it takes to import each module')
+
+
+def add_profile_args(parser):
+    parser.add_argument('--profile', action='store_true',
+                        help=('report how long each part of generating the ' +
+                              'build files takes'))
+    parser.add_argument('--profile-trace', type=os.path.abspath,
+                        metavar='FILE',
+                        help=('write a profile of generating the build ' +
+                              'files to FILE in the Chrome trace event ' +
+                              'format'))
+
+
+class LazyChoices(object):
+    def __init__(self, get_choices):
+        self._get_choices = get_choices
+
+    def __contains__(self, item):
+        return item in self._get_choices()
+
+    def __iter__(self):
+        return iter(self._get_choices())
 
 
 def add_configure_args(parser):
-    backends = list_backends()
     install_dirs = platform_info().install_dirs
     path_help = 'installation path for {} (default: %(default)r)'
 
+    # Don't load the backends here; choosing the default means checking which
+    # ones are usable, which is slow and only needed if we're configuring.
+    # Likewise, only look up their names if `--backend` is actually used.
     parser.add_argument('--backend', metavar='BACKEND',
-                        choices=list(backends.keys()),
-                        default=list(backends.keys())[0],
+                        choices=LazyChoices(backend_names),
                         help=('build backend (one of %(choices)s; default: ' +
-                              '%(default)s)'))
+                              'the best one available)'))
+    parser.add_argument('--depfixer', metavar='MODE',
+                        choices=['compile', 'batch'], default='compile',
+                        help=('when to fix up depfiles with the make ' +
+                              'backend: after each compile, or in one batch ' +
+                              'when make starts (one of %(choices)s; ' +
+                              'default: %(default)s)'))
+    parser.add_argument('--subninja', action='store_true',
+                        help=('with the ninja backend, write the build ' +
+                              'statements for each output directory to a ' +
+                              'separate file'))
+    parser.add_argument('--compiler-launcher', metavar='CMD',
+                        help=('run C-family compilers through CMD, e.g. ' +
+                              'ccache (default: $COMPILER_LAUNCHER)'))
     parser.add_argument('--prefix', type=abspath, metavar='PATH',
                         default=install_dirs[InstallRoot.prefix],
                         help='installation prefix (default: %(default)r)')
@@ -134,8 +220,10 @@ def add_configure_args(parser):
     parser.add_argument('--includedir', type=abspath, metavar='PATH',
                         default=install_dirs[InstallRoot.includedir],
                         help=path_help.format('headers'))
+    add_profile_args(parser)
 
 
+@profile
 def configure(parser, args):
     srcstr = args.srcdir.string()
     buildstr = args.builddir.string()
@@ -153,14 +241,20 @@ def configure(parser, args):
     else:
         os.mkdir(buildstr)
 
-    backend = list_backends()[args.backend]
+    if args.backend is None:
+        args.backend = next(iter(list_backends()))
+    try:
+        backend = get_backend(args.backend)
+    except KeyError:
+        parser.error('backend {!r} is not available'.format(args.backend))
+
     # Get the bin directory holding bfg's executables.
     bfgdir = Path(os.path.dirname(sys.argv[0]))
 
     env = Environment(
         bfgdir=bfgdir,
         backend=args.backend,
-        backend_version=backend.version(),
+        backend_version=None,
         srcdir=args.srcdir,
         builddir=args.builddir,
         install_dirs={
@@ -168,14 +262,24 @@ def configure(parser, args):
             InstallRoot.bindir: args.bindir,
             InstallRoot.libdir: args.libdir,
             InstallRoot.includedir: args.includedir,
-        }
+        },
+        backend_options={'depfixer': args.depfixer,
+                         'subninja': args.subninja}
     )
+    if args.compiler_launcher is not None:
+        env.variables['COMPILER_LAUNCHER'] = args.compiler_launcher
+    if inspect.ismodule(backend):
+        env.backend_module = backend.__name__
+    env.backend_version = backend.version(env.variables, env.probes)
     env.save(args.builddir.string())
 
-    build = execute_script(env)
-    backend.write(env, build)
+    # If we're reconfiguring an existing build directory, we already know
+    # which toolchains we'll probably need.
+    fingerprint = Fingerprint.load(args.builddir.string())
+    generate(env, backend, fingerprint.langs if fingerprint else None)
 
 
+@profile
 def refresh(parser, args):
     if is_srcdir(args.builddir.string()):
         parser.error('build directory must not contain a {} file'
@@ -184,9 +288,17 @@ def refresh(parser, args):
     try:
         env = Environment.load(args.builddir.string())
 
-        backend = list_backends()[env.backend]
-        build = execute_script(env)
-        backend.write(env, build)
+        # If nothing that went into the build files has changed, just let the
+        # build system know they're up to date and bail out.
+        with profiler.span('phase', 'check fingerprint'):
+            fingerprint = Fingerprint.load(args.builddir.string())
+            up_to_date = fingerprint and fingerprint.up_to_date(env)
+        if up_to_date:
+            fingerprint.touch_outputs()
+            return
+
+        backend = get_backend(env.backend, env.backend_module)
+        generate(env, backend, fingerprint.langs if fingerprint else None)
     except Exception as e:
         msg = 'Unable to reload environment'
         if str(e):
@@ -197,6 +309,30 @@ def refresh(parser, args):
         return 1
 
 
+def cache_stats(parser, args):
+    if is_srcdir(args.builddir.string()):
+        parser.error('build directory must not contain a {} file'
+                     .format(bfgfile))
+
+    try:
+        env = Environment.load(args.builddir.string())
+    except Exception as e:
+        msg = 'Unable to reload environment'
+        if str(e):
+            msg += ': {}'.format(str(e))
+        logger.error(msg)
+        return 1
+
+    launcher = env.tool('compiler_launcher')
+    if not launcher.enabled:
+        logger.error('No compiler launcher configured')
+        return 1
+    # The launcher is a shell command string (which may have its own
+    # arguments), so run it through the shell.
+    cmd = ' '.join(launcher.cache_stats(launcher.command))
+    return subprocess.call(cmd, shell=True, env=env.variables)
+
+
 def main():
     parser = argparse.ArgumentParser(prog='bfg9000', description=description)
     add_generic_args(parser)
@@ -229,6 +365,16 @@ def main():
     refresh_p.add_argument('builddir', metavar='BUILDDIR', nargs='?',
                            default='.', action=ExistingDirectory,
                            help='build directory')
+    add_profile_args(refresh_p)
+
+    cache_stats_p = subparsers.add_parser(
+        'cache-stats', description=cache_stats_desc,
+        help='show compiler launcher statistics'
+    )
+    cache_stats_p.set_defaults(func=cache_stats)
+    cache_stats_p.add_argument('builddir', metavar='BUILDDIR', nargs='?',
+                               default='.', action=ExistingDirectory,
+                               help='build directory')
 
     args = parser.parse_args()
     log.init(args.color, debug=args.debug)
@@ -1,11 +1,17 @@
 import json
 import os
 import warnings
+from multiprocessing.pool import ThreadPool
 from packaging.version import LegacyVersion
-from six import iteritems
+from six import iteritems, itervalues
 
-from .backends import list_backends
+from .atomic_file import write_if_changed
+from .backends import get_backend
+from .iterutils import uniques
+from . import profiler
 from .path import InstallRoot, Path, Root
+from .dir_index import DirIndex
+from .probe import ProbeCache
 from . import platforms
 from . import tools
 
@@ -15,20 +21,24 @@ class EnvVersionError(RuntimeError):
 
 
 class Environment(object):
-    version = 7
+    version = 9
     envfile = '.bfg_environ'
 
     def __new__(cls, *args, **kwargs):
         env = object.__new__(cls)
         env.__builders = {}
         env.__tools = {}
+        env.__probes = None
+        env.__dir_index = None
+        env.backend_module = None
         return env
 
     def __init__(self, bfgdir, backend, backend_version, srcdir, builddir,
-                 install_dirs):
+                 install_dirs, backend_options=None):
         self.bfgdir = bfgdir
         self.backend = backend
         self.backend_version = backend_version
+        self.backend_options = backend_options or {}
 
         self.srcdir = srcdir
         self.builddir = builddir
@@ -44,21 +54,83 @@ class Environment(object):
             Root.builddir: self.builddir
         }
 
+    @property
+    def probes(self):
+        if self.__probes is None:
+            path = (os.path.join(self.builddir.string(), ProbeCache.filename)
+                    if self.builddir else None)
+            self.__probes = ProbeCache(path)
+        return self.__probes
+
+    @property
+    def dir_index(self):
+        # Listings of the system include and library dirs, shared by all the
+        # builders so that each dir only gets listed once.
+        if self.__dir_index is None:
+            path = (os.path.join(self.builddir.string(), DirIndex.filename)
+                    if self.builddir else None)
+            self.__dir_index = DirIndex(path)
+        return self.__dir_index
+
     def getvar(self, key, default=None):
         return self.variables.get(key, default)
 
     def builder(self, lang):
         if lang not in self.__builders:
-            self.__builders[lang] = tools.get_builder(lang, self)
+            with profiler.span('builder', lang):
+                self.__builders[lang] = tools.get_builder(lang, self)
         return self.__builders[lang]
 
+    def load_builders(self, langs):
+        # Detecting a toolchain mostly involves waiting on subprocesses, so
+        # load all the builders we'll need at once on a thread pool. If any of
+        # them fail, just skip them; we'll try again (and report the error)
+        # when they're actually used.
+        langs = [i for i in uniques(langs) if i not in self.__builders]
+        if not langs:
+            return
+
+        def load(lang):
+            try:
+                with profiler.span('builder', lang):
+                    return tools.get_builder(lang, self)
+            except Exception:
+                return None
+
+        # The probe cache and directory index are created lazily, so create
+        # them now; otherwise, each thread could end up with its own copy.
+        self.probes
+        self.dir_index
+
+        pool = ThreadPool(len(langs))
+        try:
+            builders = pool.map(load, langs)
+        finally:
+            pool.close()
+            pool.join()
+
+        for lang, builder in zip(langs, builders):
+            if builder is not None:
+                self.__builders[lang] = builder
+
+    def languages(self):
+        return list(self.__builders)
+
     def tool(self, name):
         if name not in self.__tools:
-            self.__tools[name] = tools.get_tool(name, self)
+            with profiler.span('tool', name):
+                self.__tools[name] = tools.get_tool(name, self)
         return self.__tools[name]
 
+    def commands(self):
+        # Yield the commands for every builder and tool we've loaded so far.
+        for i in itervalues(self.__builders):
+            yield i.compiler.command
+        for i in itervalues(self.__tools):
+            yield i.command
+
     def save(self, path):
-        with open(os.path.join(path, self.envfile), 'w') as out:
+        with write_if_changed(os.path.join(path, self.envfile)) as out:
             json.dump({
                 'version': self.version,
                 'data': {
@@ -66,6 +138,8 @@ class Environment(object):
                     'platform': self.platform.name,
                     'backend': self.backend,
                     'backend_version': str(self.backend_version),
+                    'backend_options': self.backend_options,
+                    'backend_module': self.backend_module,
                     'variables': self.variables,
                     'srcdir': self.srcdir.to_json(),
                     'builddir': self.builddir.to_json(),
@@ -94,7 +168,7 @@ class Environment(object):
         # v6 adds persistence for the backend's version and converts bfgpath to
         # a Path object internally.
         if version < 6:
-            backend = list_backends()[data['backend']]
+            backend = get_backend(data['backend'])
             data['backend_version'] = str(backend.version())
             data['bfgpath'] = Path(data['bfgpath']).to_json()
 
@@ -104,10 +178,19 @@ class Environment(object):
             data['bfgdir'] = bfgdir.to_json()
             del data['bfgpath']
 
+        # v8 adds backend_options.
+        if version < 8:
+            data['backend_options'] = {}
+
+        # v9 adds backend_module.
+        if version < 9:
+            data['backend_module'] = None
+
         # Now that we've upgraded, initialize the Environment object.
         env = Environment.__new__(Environment)
 
-        for i in ['backend', 'variables']:
+        for i in ['backend', 'backend_options', 'backend_module',
+                  'variables']:
             setattr(env, i, data[i])
 
         setattr(env, 'backend_version', LegacyVersion(data['backend_version']))
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+from itertools import chain
+from six import iteritems, string_types
+
+from . import shell
+from .path import Path
+from .platforms import which
+from .version import version as bfg_version
+
+# A fingerprint records everything that went into generating a set of build
+# files: the contents of the build script and the saved environment, the
+# listings of every directory visited by find_files(), the identity of every
+# tool that was probed, and the files that any packages were found in (along
+# with the directories searched for them). If none of these have changed,
+# regenerating the build files would produce byte-identical output, so
+# `refresh` can skip it.
+
+
+def _hash_bytes(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def _hash_file(path):
+    h = hashlib.sha1()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                h.update(chunk)
+    except IOError:
+        return None
+    return h.hexdigest()
+
+
+def _hash_dir(path):
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return None
+
+    # Directories get a trailing "/" so that replacing a file with a directory
+    # of the same name changes the hash.
+    entries = sorted(i + '/' if os.path.isdir(os.path.join(path, i)) else i
+                     for i in names)
+    return _hash_bytes('\0'.join(entries).encode('utf-8'))
+
+
+def _stat_file(path):
+    try:
+        st = os.stat(path)
+        return [st.st_mtime, st.st_size]
+    except OSError:
+        return None
+
+
+def _command_name(command):
+    # Only check the first word, since some commands have built-in arguments,
+    # like `mkdir -p`.
+    if isinstance(command, Path):
+        return command.string()
+    elif isinstance(command, string_types):
+        return shell.split(command)[0]
+    return None
+
+
+def _stat_tool(name, env):
+    try:
+        return _stat_file(which(name, env.variables))
+    except IOError:
+        return None
+
+
+class Fingerprint(object):
+    version = 3
+    filename = '.bfg_fingerprint'
+
+    def __init__(self, files=None, dirs=None, tools=None, packages=None,
+                 outputs=None, langs=None):
+        self.files = files or {}
+        self.dirs = dirs or {}
+        self.tools = tools or {}
+        self.packages = packages or {}
+        self.outputs = outputs or []
+        # The languages used last time; this isn't part of the fingerprint
+        # proper, but lets us detect the toolchains up front when we
+        # regenerate.
+        self.langs = langs or []
+
+    @classmethod
+    def compute(cls, env, build_inputs, outputs):
+        builddir = env.builddir.string()
+        files = [build_inputs.bfgpath.string(env.path_roots),
+                 os.path.join(builddir, env.envfile)]
+
+        tools = set(filter(None, (_command_name(i) for i in env.commands())))
+
+        return cls(
+            files={i: _hash_file(i) for i in files},
+            dirs={os.path.abspath(i): _hash_dir(i)
+                  for i in build_inputs['find_dirs']},
+            tools={i: _stat_tool(i, env) for i in tools},
+            packages={os.path.abspath(i): _stat_file(i) for i in chain(
+                build_inputs['package_files'], env.dir_index.listed()
+            )},
+            outputs=[os.path.abspath(os.path.join(builddir, i))
+                     for i in outputs],
+            langs=env.languages()
+        )
+
+    def up_to_date(self, env):
+        if not self.outputs or not all(os.path.exists(i)
+                                       for i in self.outputs):
+            return False
+
+        return (
+            all(_hash_file(k) == v for k, v in iteritems(self.files)) and
+            all(_hash_dir(k) == v for k, v in iteritems(self.dirs)) and
+            all(_stat_tool(k, env) == v for k, v in iteritems(self.tools)) and
+            all(_stat_file(k) == v for k, v in iteritems(self.packages))
+        )
+
+    def touch_outputs(self):
+        # Tell the build system that its build files are fresh, even though we
+        # didn't rewrite them.
+        for i in self.outputs:
+            os.utime(i, None)
+
+    def save(self, path):
+        with open(os.path.join(path, self.filename), 'w') as out:
+            json.dump({
+                'version': self.version,
+                'bfg_version': bfg_version,
+                'data': {
+                    'files': self.files,
+                    'dirs': self.dirs,
+                    'tools': self.tools,
+                    'packages': self.packages,
+                    'outputs': self.outputs,
+                    'langs': self.langs,
+                }
+            }, out)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(os.path.join(path, cls.filename)) as inp:
+                state = json.load(inp)
+        except (IOError, ValueError):
+            return None
+
+        # If the format or bfg9000 itself has changed, we can't trust the old
+        # fingerprint.
+        if ( state.get('version') != cls.version or
+             state.get('bfg_version') != bfg_version ):
+            return None
+
+        try:
+            data = state['data']
+            return cls(data['files'], data['dirs'], data['tools'],
+                       data['packages'], data['outputs'], data['langs'])
+        except (KeyError, TypeError):
+            return None
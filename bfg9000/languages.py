@@ -20,3 +20,17 @@ def language(lang, src_exts, hdr_exts=[]):
                     ext=i, lang=lang
                 ))
             tolang[i] = lang
+
+
+# Every language bfg9000 knows about. These are listed here rather than
+# alongside their builders so that we can guess a file's language without
+# importing all of the tools.
+language('c', src_exts=['.c'], hdr_exts=['.h'])
+language('c++', src_exts=['.cpp', '.cc', '.cp', '.cxx', '.CPP', '.c++', '.C'],
+         hdr_exts=['.hpp'])
+language('objc', src_exts=['.m'])
+language('objc++', src_exts=['.mm', '.M'])
+language('f77', src_exts=['.f', '.for', '.ftn'])
+language('f95', src_exts=['.f90', '.f95', '.f03', '.f08'])
+language('java', src_exts=['.java'])
+language('scala', src_exts=['.scala'])
@@ -0,0 +1,28 @@
+import sys
+
+# The entry points for the `bfg9000` and `9k` commands. These only import the
+# driver once they're called, so that `--profile-startup` can time all of the
+# driver's imports too.
+
+
+def _run(name):
+    import_profiler = None
+    if '--profile-startup' in sys.argv[1:]:
+        from .profiler import start_import_profiler
+        import_profiler = start_import_profiler()
+
+    try:
+        from . import driver
+        return getattr(driver, name)()
+    finally:
+        if import_profiler:
+            import_profiler.stop()
+            import_profiler.report()
+
+
+def main():
+    return _run('main')
+
+
+def simple_main():
+    return _run('simple_main')
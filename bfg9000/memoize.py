@@ -0,0 +1,26 @@
+from collections import OrderedDict
+from functools import wraps
+
+try:
+    from functools import lru_cache
+except ImportError:
+    # Python 2 doesn't have `lru_cache`, so provide a simple version of it.
+    # This only supports positional arguments, which is all we need.
+    def lru_cache(maxsize=128):
+        def decorator(fn):
+            cache = OrderedDict()
+
+            @wraps(fn)
+            def wrapper(*args):
+                try:
+                    result = cache.pop(args)
+                except KeyError:
+                    result = fn(*args)
+                    if maxsize is not None and len(cache) >= maxsize:
+                        cache.popitem(last=False)
+                cache[args] = result
+                return result
+
+            wrapper.cache_clear = cache.clear
+            return wrapper
+        return decorator
@@ -11,22 +11,42 @@ InstallRoot = Enum('InstallRoot', ['prefix', 'bindir', 'libdir', 'includedir'])
 
 
 class Path(safe_str.safe_string):
+    __slots__ = ('suffix', 'root', '_hash')
+
     def __init__(self, path, root=Root.builddir):
-        self.suffix = os.path.normpath(path)
-        if self.suffix == '.':
-            self.suffix = ''
+        suffix = os.path.normpath(path)
+        if suffix == '.':
+            suffix = ''
 
         if os.path.isabs(path):
-            self.root = Root.absolute
+            root = Root.absolute
         elif root == Root.absolute:
             raise ValueError("'{}' is not absolute".format(path))
-        else:
-            self.root = root
+        self.__set(suffix, root)
+
+    @classmethod
+    def __from_normalized(cls, suffix, root):
+        # Skip normalizing paths that we know are already normalized, e.g. when
+        # adding an extension to an existing path.
+        self = object.__new__(cls)
+        self.__set(suffix, root)
+        return self
+
+    def __set(self, suffix, root):
+        object.__setattr__(self, 'suffix', suffix)
+        object.__setattr__(self, 'root', root)
+        object.__setattr__(self, '_hash', hash(suffix))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('paths are immutable')
+
+    def __reduce__(self):
+        return (type(self), (self.suffix, self.root))
 
     def parent(self):
         if not self.suffix:
             raise ValueError('already at root')
-        return Path(os.path.dirname(self.suffix), self.root)
+        return self.__from_normalized(os.path.dirname(self.suffix), self.root)
 
     def append(self, path):
         return Path(os.path.join(self.suffix, path), self.root)
@@ -35,7 +55,7 @@ class Path(safe_str.safe_string):
         return os.path.splitext(self.suffix)[1]
 
     def addext(self, ext):
-        return Path(self.suffix + ext, self.root)
+        return self.__from_normalized(self.suffix + ext, self.root)
 
     def stripext(self, replace=None):
         name = os.path.splitext(self.suffix)[0]
@@ -100,11 +120,19 @@ class Path(safe_str.safe_string):
         return '`{}`'.format(self.realize(variables))
 
     def __hash__(self):
-        return hash(self.suffix)
+        return self._hash
 
     def __eq__(self, rhs):
+        if self is rhs:
+            return True
+        if not isinstance(rhs, Path):
+            return NotImplemented
         return self.root == rhs.root and self.suffix == rhs.suffix
 
+    def __ne__(self, rhs):
+        result = self.__eq__(rhs)
+        return result if result is NotImplemented else not result
+
     def __nonzero__(self):
         return self.__bool__()
 
@@ -0,0 +1,324 @@
+import os
+import re
+import shlex
+
+# A minimal, in-process implementation of pkg-config: find .pc files along the
+# search path, parse them (expanding variables as we go), and collect the flags
+# for a package and everything it requires. This is much faster than spawning
+# pkg-config once for every query of every package.
+
+_default_system_includedirs = ['/usr/include']
+_default_system_libdirs = ['/usr/lib', '/lib']
+
+_variable_ex = re.compile(r'\$\$|\$\{([^}]*)\}')
+_line_ex = re.compile(r'^\s*([A-Za-z0-9_.]+)\s*([:=])\s*(.*?)\s*$')
+_requires_ex = re.compile(
+    r'([^\s,<>=!]+)(?:\s*(<=|>=|!=|=|<|>)\s*([^\s,]+))?'
+)
+_version_part_ex = re.compile(r'[0-9]+|[A-Za-z]+')
+
+# Flags that pkg-config won't deduplicate on their own; instead, they're glued
+# together with any following flags that aren't ordinary "-X" flags, so that
+# e.g. "-framework Foo" is handled as one unit.
+_unmergeable_flags = ('-framework', '-isystem', '-idirafter', '-pthread',
+                      '-Wa,', '-Wl,', '-Wp,', '-trigraphs', '-pedantic',
+                      '-ansi', '-std=', '-stdlib=', '-include', '-nostdinc',
+                      '-nostdlibinc', '-nobuiltininc')
+
+
+class ParseError(ValueError):
+    pass
+
+
+def _compare_versions(a, b):
+    # Compare versions the way pkg-config does (which is the same as RPM):
+    # split them into runs of digits or letters and compare each pair in turn,
+    # with numbers always beating letters.
+    a = _version_part_ex.findall(a)
+    b = _version_part_ex.findall(b)
+    for x, y in zip(a, b):
+        if x.isdigit() and y.isdigit():
+            x, y = int(x), int(y)
+        elif x.isdigit() != y.isdigit():
+            return 1 if x.isdigit() else -1
+        if x != y:
+            return 1 if x > y else -1
+    return (len(a) > len(b)) - (len(a) < len(b))
+
+
+_version_ops = {
+    '=': lambda x: x == 0,
+    '!=': lambda x: x != 0,
+    '<': lambda x: x < 0,
+    '<=': lambda x: x <= 0,
+    '>': lambda x: x > 0,
+    '>=': lambda x: x >= 0,
+}
+
+
+def _unmergeable(flag):
+    return not flag.startswith('-') or flag.startswith(_unmergeable_flags)
+
+
+def _flag_type(flag):
+    if len(flag) < 2 or flag.startswith('-lib:') or _unmergeable(flag):
+        return None
+    return flag[1]
+
+
+def _fragments(flags):
+    # Split a list of flags into pkg-config "fragments" (tuples of flags).
+    result = []
+    for i in flags:
+        if ( result and _flag_type(i) is None and
+             _flag_type(result[-1][0]) is None and
+             _unmergeable(result[-1][0]) ):
+            result[-1] += (i,)
+        else:
+            result.append((i,))
+    return result
+
+
+def _merge_fragments(fragments):
+    # Deduplicate fragments exactly as pkg-config does. -I, -L, and -F flags
+    # keep their first copy. Otherwise, an earlier copy of a flag is dropped in
+    # favor of the new one unless it follows a flag of another kind (e.g. a
+    # library wrapped in "-Wl,--push-state,--as-needed" stays put, and gets
+    # repeated later). A doubly-linked list (of [prev, next, fragment, type])
+    # keeps this fast, since big dependency trees produce a lot of fragments.
+    root = []
+    root[:] = [root, root, None, None]
+    nodes = {}
+
+    for fragment in fragments:
+        if fragment not in nodes:
+            nodes[fragment] = (_flag_type(fragment[0]), [])
+        kind, copies = nodes[fragment]
+        if kind in ('I', 'L', 'F'):
+            if copies:
+                continue
+        elif copies:
+            node = copies[-1]
+            prev = node[0]
+            if ( prev is root or prev[3] in ('l', 'L', 'I') or
+                 node[3] is None or prev[3] == node[3] ):
+                prev[1], node[1][0] = node[1], prev
+                copies.pop()
+
+        node = [root[0], root, fragment, kind]
+        root[0][1] = root[0] = node
+        copies.append(node)
+
+    result = []
+    node = root[1]
+    while node is not root:
+        result.append(node[2])
+        node = node[1]
+    return result
+
+
+class PcFile(object):
+    def __init__(self, name, path, variables, fields):
+        self.name = name
+        self.path = path
+        self.variables = variables
+        self.fields = fields
+        self._flags = {}
+
+    @property
+    def version(self):
+        return self.fields.get('version', '')
+
+    def flags(self, field):
+        # pkg-config can visit a package many times, so only split once.
+        if field not in self._flags:
+            try:
+                self._flags[field] = shlex.split(
+                    self.fields.get(field.lower(), '')
+                )
+            except ValueError as e:
+                raise ParseError('{}: {}'.format(self.path, e))
+        return self._flags[field]
+
+    def requires(self, field):
+        return _requires_ex.findall(self.fields.get(field.lower(), ''))
+
+
+def parse(name, path, variables=None):
+    variables = dict(variables or {})
+    variables['pcfiledir'] = os.path.dirname(path)
+    fields = {}
+
+    def expand(value, lineno):
+        def repl(m):
+            if m.group(0) == '$$':
+                return '$'
+            try:
+                return variables[m.group(1)]
+            except KeyError:
+                raise ParseError("{}:{}: undefined variable '{}'".format(
+                    path, lineno, m.group(1)
+                ))
+        return _variable_ex.sub(repl, value)
+
+    with open(path) as f:
+        lines = iter(enumerate(f, 1))
+        for lineno, line in lines:
+            # Join any lines ending in a backslash to the next one.
+            while line.endswith('\\\n'):
+                try:
+                    line = line[:-2] + next(lines)[1]
+                except StopIteration:
+                    break
+
+            line = line.split('#', 1)[0]
+            if not line.strip():
+                continue
+            m = _line_ex.match(line)
+            if not m:
+                raise ParseError('{}:{}: invalid line'.format(path, lineno))
+
+            key, kind, value = m.groups()
+            if kind == '=':
+                variables[key] = expand(value, lineno)
+            else:
+                # Field names aren't case-sensitive (e.g. "CFlags" is common).
+                fields[key.lower()] = expand(value, lineno)
+
+    return PcFile(name, path, variables, fields)
+
+
+class PcResolver(object):
+    def __init__(self, search_path, sysroot=None, system_includedirs=None,
+                 system_libdirs=None, allow_system_cflags=False,
+                 allow_system_libs=False):
+        self.search_path = search_path
+        self.sysroot = sysroot or ''
+        self.system_includedirs = set(
+            _default_system_includedirs if system_includedirs is None
+            else system_includedirs
+        )
+        self.system_libdirs = set(
+            _default_system_libdirs if system_libdirs is None
+            else system_libdirs
+        )
+        self.allow_system_cflags = allow_system_cflags
+        self.allow_system_libs = allow_system_libs
+        self._files = {}
+        self._requires = {}
+
+    def find(self, name):
+        if name not in self._files:
+            for i in self.search_path:
+                path = os.path.join(i, name + '.pc')
+                if os.path.isfile(path):
+                    self._files[name] = parse(name, path, {
+                        'pc_sysrootdir': self.sysroot or '/',
+                    })
+                    break
+            else:
+                raise IOError("unable to find package '{}'".format(name))
+        return self._files[name]
+
+    def _check_version(self, pc, op, version):
+        if op and not _version_ops[op](_compare_versions(pc.version,
+                                                         version)):
+            raise ValueError("{} version {} doesn't meet requirement {}{}"
+                             .format(pc.name, pc.version, op, version))
+
+    def _find_requires(self, pc, field):
+        key = (pc.name, field)
+        if key not in self._requires:
+            result = []
+            for dep, op, version in pc.requires(field):
+                dep_pc = self.find(dep)
+                self._check_version(dep_pc, op, version)
+                result.append(dep_pc)
+            self._requires[key] = result
+        return self._requires[key]
+
+    def packages(self, name, private=False):
+        # Return the packages in the order pkg-config visits them: a
+        # depth-first walk of the whole dependency tree, so a package appears
+        # once for every path that leads to it. Only cycles are skipped.
+        fields = ['Requires'] + (['Requires.private'] if private else [])
+        active = set()
+        # Big trees visit the same packages over and over, so remember each
+        # package's walk (unless a cycle was skipped in it, since then the
+        # walk depends on how we got there).
+        walks = {}
+
+        def visit(pc):
+            if pc.name in walks:
+                return walks[pc.name], True
+
+            active.add(pc.name)
+            result, complete = [pc], True
+            for field in fields:
+                for dep_pc in self._find_requires(pc, field):
+                    if dep_pc.name in active:
+                        complete = False
+                    else:
+                        walk, dep_complete = visit(dep_pc)
+                        result.extend(walk)
+                        complete = complete and dep_complete
+            active.remove(pc.name)
+
+            if complete:
+                walks[pc.name] = result
+            return result, complete
+
+        return visit(self.find(name))[0]
+
+    def version(self, name):
+        return self.find(name).version
+
+    def _sysroot(self, flag, prefix):
+        if self.sysroot and flag.startswith(prefix + '/'):
+            return prefix + self.sysroot + flag[len(prefix):]
+        return flag
+
+    def _flags(self, name, field, private, prefix, system_dirs):
+        def get_fragments(pc):
+            result = []
+            for i in _fragments(pc.flags(field)):
+                if i[0].startswith(prefix):
+                    if system_dirs is not None and i[0][2:] in system_dirs:
+                        continue
+                    i = (self._sysroot(i[0], prefix),)
+                result.append(i)
+            return result
+
+        cache = {}
+        fragments = []
+        for pc in self.packages(name, private):
+            if pc.name not in cache:
+                cache[pc.name] = get_fragments(pc)
+            fragments.extend(cache[pc.name])
+        return _merge_fragments(fragments)
+
+    def cflags(self, name):
+        system_dirs = (None if self.allow_system_cflags else
+                       self.system_includedirs)
+        return [j for i in self._flags(name, 'Cflags', True, '-I', system_dirs)
+                for j in i]
+
+    def _libs(self, name):
+        system_dirs = (None if self.allow_system_libs else
+                       self.system_libdirs)
+        return self._flags(name, 'Libs', False, '-L', system_dirs)
+
+    def ldflags(self, name, msvc_syntax=False):
+        result = []
+        for i in self._libs(name):
+            if msvc_syntax and i[0].startswith('-L'):
+                result.append('/libpath:' + i[0][2:])
+            elif _flag_type(i[0]) != 'l':
+                result.extend(i)
+        return result
+
+    def ldlibs(self, name, msvc_syntax=False):
+        libs = [i[0] for i in self._libs(name) if _flag_type(i[0]) == 'l']
+        if msvc_syntax:
+            return [i[2:] + '.lib' for i in libs]
+        return libs
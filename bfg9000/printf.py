@@ -1,6 +1,7 @@
 import argparse
 import sys
 
+from .atomic_file import write_if_changed
 from .version import version
 
 
@@ -18,11 +19,22 @@ def main():
                         help='controls the output as in C printf')
     parser.add_argument('args', metavar='ARGS', nargs='*',
                         help='arguments to print according to FORMAT')
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help=('write to FILE (only if its contents would ' +
+                              'change) instead of stdout'))
     parser.add_argument('--version', action='version',
                         version='%(prog)s ' + version)
 
     args = parser.parse_args()
 
+    if args.output:
+        with write_if_changed(args.output) as out:
+            write(out, args.format, args.args)
+    else:
+        write(sys.stdout, args.format, args.args)
+
+
+def write(out, format, args):
     # XXX: This only supports format strings with one format spec.
-    for i in args.args:
-        sys.stdout.write(args.format % i)
+    for i in args:
+        out.write(format % i)
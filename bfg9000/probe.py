@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+from six import iteritems
+
+from . import profiler
+from . import shell
+from .iterutils import listify
+from .platforms import which
+
+
+class ProbeCache(object):
+    version = 1
+    filename = '.bfg_probes'
+
+    def __init__(self, path=None):
+        self._path = path
+        self._seen = set()
+        try:
+            self._map = self._load(path) if path else {}
+        except (IOError, ValueError, KeyError):
+            self._map = {}
+
+    def _key(self, command, args, env, env_vars, stamp):
+        # Key each probe on the identity of the executables being run (as well
+        # as any environment variables that could affect its output), so that
+        # the cached result is thrown away if the tool changes. We check every
+        # word of the command, since it might be a wrapper like `ccache gcc`.
+        # Callers can also pass a `stamp` identifying any other inputs to the
+        # probe.
+        exes = []
+        for i, word in enumerate(shell.split(command)):
+            try:
+                exe = which(word, env)
+                st = os.stat(exe)
+            except (IOError, OSError):
+                if i == 0:
+                    return None
+                continue
+            exes.append([exe, st.st_mtime, st.st_size])
+
+        return json.dumps([
+            command, args, exes, [(i, env.get(i)) for i in env_vars], stamp
+        ])
+
+    def check_output(self, command, args, env=os.environ, env_vars=(),
+                     stamp=None, quiet=True):
+        args = listify(args)
+        cmdline = ' '.join([command] + args)
+        key = self._key(command, args, env, env_vars, stamp)
+
+        if key is not None and key in self._map:
+            result = self._map[key]
+        else:
+            result = self._run(cmdline, quiet)
+            # Don't cache failures, so that we try again (and show any error
+            # messages) next time.
+            if key is not None and result[0] == 0:
+                self._map[key] = result
+        if key in self._map:
+            self._seen.add(key)
+
+        if result[0] != 0:
+            raise subprocess.CalledProcessError(result[0], cmdline)
+        return result[1]
+
+    @staticmethod
+    def _run(cmdline, quiet):
+        with profiler.span('subprocess', cmdline):
+            with open(os.devnull, 'wb') as devnull:
+                try:
+                    return [0, subprocess.check_output(
+                        cmdline, shell=True, universal_newlines=True,
+                        stderr=devnull if quiet else None
+                    )]
+                except subprocess.CalledProcessError as e:
+                    return [e.returncode, None]
+
+    @classmethod
+    def _load(cls, path):
+        with open(path) as inp:
+            state = json.load(inp)
+        if state['version'] > cls.version:
+            raise ValueError('saved version exceeds expected version')
+        return state['map']
+
+    def save(self, path=None):
+        path = path or self._path
+        if path is None:
+            return
+
+        with open(path, 'w') as out:
+            # Only save the probes we ran this time, so that results for old
+            # versions of tools eventually get dropped.
+            seenmap = {k: v for k, v in iteritems(self._map)
+                       if k in self._seen}
+            json.dump({
+                'version': self.version,
+                'map': seenmap,
+            }, out)
@@ -0,0 +1,216 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from six import iteritems
+
+
+class _TimedLoader(object):
+    def __init__(self, profiler, loader):
+        self._profiler = profiler
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Put the real loader back so that nothing else ever sees us.
+        module.__loader__ = self._loader
+        if getattr(module, '__spec__', None):
+            module.__spec__.loader = self._loader
+
+        self._profiler._push()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._pop(module.__name__)
+
+
+class ImportProfiler(object):
+    def __init__(self):
+        self.records = []
+        self._stack = []
+
+    def find_spec(self, fullname, path=None, target=None):
+        # Find the module with the rest of the finders, and then wrap its
+        # loader so we can time how long it takes to execute. If none of them
+        # support `find_spec`, just let the import system handle it as usual.
+        for finder in sys.meta_path[sys.meta_path.index(self) + 1:]:
+            find_spec = getattr(finder, 'find_spec', None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                if hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(self, spec.loader)
+                return spec
+        return None
+
+    def _push(self):
+        self._stack.append([time.time(), 0])
+
+    def _pop(self, name):
+        start, children = self._stack.pop()
+        total = time.time() - start
+        if self._stack:
+            self._stack[-1][1] += total
+        self.records.append((len(self._stack), name, total - children, total))
+
+    def start(self):
+        sys.meta_path.insert(0, self)
+
+    def stop(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def report(self, out=None):
+        out = out or sys.stderr
+        # Like `python -X importtime`, modules are listed after the modules
+        # they import, with nested imports indented.
+        out.write('{:>10} | {:>10} | module\n'.format('self (ms)',
+                                                     'total (ms)'))
+        for depth, name, self_time, total in self.records:
+            out.write('{:10.1f} | {:10.1f} | {}{}\n'.format(
+                self_time * 1000, total * 1000, '  ' * depth, name
+            ))
+        out.write('{:10} | {:10.1f} | (total)\n'.format(
+            '', sum(i[3] for i in self.records if i[0] == 0) * 1000
+        ))
+
+
+_import_profiler = None
+
+
+def start_import_profiler():
+    global _import_profiler
+    if _import_profiler is None:
+        _import_profiler = ImportProfiler()
+        _import_profiler.start()
+    return _import_profiler
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+
+_null_span = _NullSpan()
+
+
+class _Span(object):
+    def __init__(self, profiler, category, name):
+        self._profiler = profiler
+        self._category = category
+        self._name = name
+
+    def __enter__(self):
+        self._stack = self._profiler._stack()
+        self._stack.append(0)
+        self._start = time.time()
+
+    def __exit__(self, type, value, traceback):
+        duration = time.time() - self._start
+        children = self._stack.pop()
+        if self._stack:
+            self._stack[-1] += duration
+        self._profiler.events.append((
+            self._category, self._name, self._start, duration,
+            duration - children, threading.current_thread().ident
+        ))
+
+
+class Profiler(object):
+    def __init__(self):
+        self.events = []
+        self._local = threading.local()
+        self._start = time.time()
+
+    def _stack(self):
+        # Keep a separate stack for each thread so that we can tell how much
+        # time each span spent in its children.
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def span(self, category, name):
+        return _Span(self, category, name)
+
+    def summary(self):
+        totals = defaultdict(lambda: [0, 0, 0])
+        for category, name, start, duration, self_time, tid in self.events:
+            entry = totals[category, name]
+            entry[0] += 1
+            entry[1] += self_time
+            entry[2] += duration
+        return sorted(((k, v) for k, v in iteritems(totals)),
+                      key=lambda i: i[1][1], reverse=True)
+
+    def report(self, out=None):
+        out = out or sys.stderr
+        out.write('{:>10} | {:>10} | {:>6} | {:<10} | name\n'.format(
+            'self (ms)', 'total (ms)', 'calls', 'category'
+        ))
+        for (category, name), (count, self_time, total) in self.summary():
+            out.write('{:10.1f} | {:10.1f} | {:6} | {:<10} | {}\n'.format(
+                self_time * 1000, total * 1000, count, category, name
+            ))
+
+    def write_trace(self, filename):
+        # Write the events in the Chrome trace event format; this can be
+        # viewed in `chrome://tracing` or <https://ui.perfetto.dev>.
+        pid = os.getpid()
+        with open(filename, 'w') as out:
+            json.dump({'traceEvents': [{
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': (start - self._start) * 1e6,
+                'dur': duration * 1e6,
+                'pid': pid,
+                'tid': tid,
+            } for category, name, start, duration, _, tid in self.events]},
+                out)
+
+
+_profiler = None
+
+
+def enable():
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable():
+    global _profiler
+    _profiler = None
+
+
+def enabled():
+    return _profiler is not None
+
+
+def span(category, name):
+    # Time a block of code with the active profiler (if there is one).
+    if _profiler is None:
+        return _null_span
+    return _profiler.span(category, name)
+
+
+def wrap(category, name, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with span(category, name):
+            return fn(*args, **kwargs)
+    return wrapper
@@ -4,7 +4,7 @@ from . import iterutils
 
 
 class safe_string(object):
-    pass
+    __slots__ = ()
 
 
 def safe_str(s):
@@ -17,6 +17,8 @@ def safe_str(s):
 
 
 class escaped_str(safe_string):
+    __slots__ = ('string',)
+
     def __init__(self, string):
         if not isinstance(string, string_types):
             raise TypeError('expected a string')
@@ -41,6 +43,8 @@ class escaped_str(safe_string):
 
 
 class jbos(safe_string):  # Just a Bunch of Strings
+    __slots__ = ('__bits',)
+
     def __init__(self, *args):
         self.__bits = tuple(self.__flatten(args))
 
@@ -77,4 +81,6 @@ class jbos(safe_string):  # Just a Bunch of Strings
 
 
 def join(iterable, delim):
-    return sum(iterutils.tween(iterable, delim), jbos())
+    # Build the jbos in one go; adding the bits one at a time would re-flatten
+    # the whole thing each time, making this quadratic.
+    return jbos(*iterutils.tween(iterable, delim))
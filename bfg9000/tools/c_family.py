@@ -5,13 +5,6 @@ from . import cc, msvc
 from .. import shell
 from .hooks import builder
 from .utils import check_which
-from ..languages import language
-
-language('c', src_exts=['.c'], hdr_exts=['.h'])
-language('c++', src_exts=['.cpp', '.cc', '.cp', '.cxx', '.CPP', '.c++', '.C'],
-         hdr_exts=['.hpp'])
-language('objc', src_exts=['.m'])
-language('objc++', src_exts=['.mm', '.M'])
 
 _vars = {
     'c'     : ('CC'    , 'CFLAGS'     ),
@@ -1,6 +1,5 @@
 import os.path
 import re
-import subprocess
 from itertools import chain
 from six.moves import filter as ifilter
 
@@ -16,18 +15,15 @@ class CcBuilder(object):
     def __init__(self, env, lang, name, command, cflags_name, cflags, ldflags,
                  ldlibs):
         self.brand = 'unknown'
-        with open(os.devnull, 'wb') as devnull:
-            try:
-                output = subprocess.check_output(
-                    '{} --version'.format(command),
-                    shell=True, universal_newlines=True, stderr=devnull
-                )
-                if 'Free Software Foundation' in output:
-                    self.brand = 'gcc'
-                elif 'clang' in output:
-                    self.brand = 'clang'
-            except:
-                pass
+        try:
+            output = env.probes.check_output(command, '--version',
+                                             env.variables)
+            if 'Free Software Foundation' in output:
+                self.brand = 'gcc'
+            elif 'clang' in output:
+                self.brand = 'clang'
+        except:
+            pass
 
         self.compiler = CcCompiler(env, lang, name, command, cflags_name,
                                    cflags)
@@ -410,25 +406,26 @@ class CcSharedLibraryLinker(CcLinker):
 
 class CcPackageResolver(object):
     def __init__(self, env, lang, command):
+        self._index = env.dir_index
+
         value = env.getvar('CPATH')
         include_dirs = value.split(os.pathsep) if value else []
 
         self.include_dirs = [i for i in uniques(chain(
             include_dirs, env.platform.include_dirs
-        )) if os.path.exists(i)]
+        )) if self._index.isdir(i)]
 
         system_lib_dirs = []
-        with open(os.devnull, 'wb') as devnull:
-            try:
-                # XXX: Will this work for cross-compilation?
-                output = subprocess.check_output(
-                    '{} -print-search-dirs'.format(command),
-                    shell=True, universal_newlines=True, stderr=devnull
-                )
-                m = re.search(r'^libraries: (.*)', output, re.MULTILINE)
-                system_lib_dirs = re.split(os.pathsep, m.group(1))
-            except:
-                pass
+        try:
+            # XXX: Will this work for cross-compilation?
+            output = env.probes.check_output(
+                command, '-print-search-dirs', env.variables,
+                env_vars=['GCC_EXEC_PREFIX', 'COMPILER_PATH', 'LIBRARY_PATH']
+            )
+            m = re.search(r'^libraries: (.*)', output, re.MULTILINE)
+            system_lib_dirs = re.split(os.pathsep, m.group(1))
+        except:
+            pass
 
         value = env.getvar('LIBRARY_PATH')
         user_lib_dirs = value.split(os.pathsep) if value else []
@@ -438,7 +435,7 @@ class CcPackageResolver(object):
                          for i in chain(user_lib_dirs, system_lib_dirs) )
         self.lib_dirs = [i for i in uniques(chain(
             all_lib_dirs, env.platform.lib_dirs
-        )) if os.path.exists(i)]
+        )) if self._index.isdir(i)]
 
         self.lang = lang
         self.platform = env.platform
@@ -447,10 +444,10 @@ class CcPackageResolver(object):
         if search_dirs is None:
             search_dirs = self.include_dirs
 
-        for base in search_dirs:
-            if os.path.exists(os.path.join(base, name)):
-                return HeaderDirectory(Path(base, Root.absolute), None,
-                                       system=True, external=True)
+        found = self._index.find(search_dirs, [name])
+        if found:
+            return HeaderDirectory(Path(found[0], Root.absolute), None,
+                                   system=True, external=True)
 
         raise IOError("unable to find header '{}'".format(name))
 
@@ -474,14 +471,15 @@ class CcPackageResolver(object):
             # We don't actually know what kind of library this is. It could be
             # a static library or an import library (which we classify as a
             # kind of shared lib).
-            libnames.append((name + '.lib', Library))
-
-        for base in search_dirs:
-            for libname, libkind, extra_kwargs in libnames:
-                fullpath = os.path.join(base, libname)
-                if os.path.exists(fullpath):
-                    return libkind(Path(fullpath, Root.absolute),
-                                   format=self.platform.object_format,
-                                   external=True, **extra_kwargs)
+            libnames.append((name + '.lib', Library, {}))
+
+        found = self._index.find(search_dirs, [i[0] for i in libnames])
+        if found:
+            base, libname = found
+            libkind, extra_kwargs = next(i[1:] for i in libnames
+                                         if i[0] == libname)
+            return libkind(Path(os.path.join(base, libname), Root.absolute),
+                           format=self.platform.object_format,
+                           external=True, **extra_kwargs)
 
         raise IOError("unable to find library '{}'".format(name))
@@ -0,0 +1,25 @@
+from .hooks import tool
+from .utils import check_which
+
+
+@tool('compiler_launcher')
+class CompilerLauncher(object):
+    rule_name = command_var = 'compiler_launcher'
+
+    def __init__(self, env):
+        # The launcher (e.g. ccache or sccache) is kept separate from the
+        # compiler itself so that we can still detect the compiler's brand.
+        self.command = env.getvar('COMPILER_LAUNCHER') or None
+        if self.command:
+            check_which(self.command, kind='compiler launcher')
+
+    @property
+    def enabled(self):
+        return self.command is not None
+
+    def __call__(self, cmd, compile_cmd):
+        return [cmd] + compile_cmd
+
+    def cache_stats(self, cmd):
+        # ccache and sccache both understand this.
+        return [cmd, '--show-stats']
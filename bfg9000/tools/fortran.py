@@ -2,10 +2,6 @@ from . import cc
 from .. import shell
 from .hooks import builder
 from .utils import check_which
-from ..languages import language
-
-language('f77', src_exts=['.f', '.for', '.ftn'])
-language('f95', src_exts=['.f90', '.f95', '.f03', '.f08'])
 
 _default_cmds = ['gfortran']
 
@@ -1,5 +1,46 @@
+import importlib
+import threading
+
 _builders = {}
 _tools = {}
+_import_lock = threading.Lock()
+
+# The module that defines each builder and tool. Importing all the tools is
+# slow, so we only import the ones we actually use.
+_builder_modules = {
+    'c': 'c_family',
+    'c++': 'c_family',
+    'objc': 'c_family',
+    'objc++': 'c_family',
+    'f77': 'fortran',
+    'f95': 'fortran',
+    'java': 'java',
+    'scala': 'java',
+}
+
+_tool_modules = {
+    'bfg9000': 'internal',
+    'compiler_launcher': 'compiler_launcher',
+    'depfixer': 'internal',
+    'doppel': 'doppel',
+    'install_name_tool': 'install_name_tool',
+    'jvmoutput': 'internal',
+    'mkdir_p': 'mkdir_p',
+    'patchelf': 'patchelf',
+    'pkg_config': 'pkg_config',
+    'printf': 'printf',
+    'setenv': 'internal',
+    'symlink': 'symlink',
+}
+
+
+def _lookup(name, registry, modules):
+    if name not in registry and name in modules:
+        # Builders are loaded from several threads at once, so only import one
+        # tool module at a time.
+        with _import_lock:
+            importlib.import_module('.' + modules[name], __package__)
+    return registry[name]
 
 
 def builder(*args):
@@ -16,7 +57,7 @@ def builder(*args):
 
 def get_builder(lang, env):
     try:
-        fn, multi = _builders[lang]
+        fn, multi = _lookup(lang, _builders, _builder_modules)
         return fn(env, lang) if multi else fn(env)
     except KeyError:
         raise ValueError('unknown language "{}"'.format(lang))
@@ -31,6 +72,6 @@ def tool(name):
 
 def get_tool(name, env):
     try:
-        return _tools[name](env)
+        return _lookup(name, _tools, _tool_modules)(env)
     except KeyError:
         raise ValueError('unknown tool "{}"'.format(name))
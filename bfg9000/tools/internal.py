@@ -27,6 +27,9 @@ class Depfixer(object):
         return shell_list([cmd, escaped_str('<'), depfile, escaped_str('>>'),
                            depfile])
 
+    def batch(self, cmd, stamp, paths):
+        return [cmd, '--stamp', stamp] + paths
+
 
 @tool('jvmoutput')
 class JvmOutput(object):
@@ -3,12 +3,8 @@ from .. import shell
 from .hooks import builder
 from ..builtins.write_file import WriteFile
 from ..file_types import *
-from ..languages import language
 from .utils import check_which
 
-language('java', src_exts=['.java'])
-language('scala', src_exts=['.scala'])
-
 _vars = {
     'java' : ('JAVAC' , 'JAVAFLAGS' ),
     'scala': ('SCALAC', 'SCALAFLAGS'),
@@ -336,6 +336,8 @@ class MsvcStaticLinker(object):
 
 class MsvcPackageResolver(object):
     def __init__(self, env, lang):
+        self._index = env.dir_index
+
         value = env.getvar('CPATH')
         user_include_dirs = value.split(os.pathsep) if value else []
 
@@ -344,7 +346,7 @@ class MsvcPackageResolver(object):
 
         self.include_dirs = [i for i in uniques(chain(
             user_include_dirs, system_include_dirs, env.platform.include_dirs
-        )) if os.path.exists(i)]
+        )) if self._index.isdir(i)]
 
         value = env.getvar('LIB')
         system_lib_dirs = value.split(os.pathsep) if value else []
@@ -356,7 +358,7 @@ class MsvcPackageResolver(object):
                          chain(user_lib_dirs, system_lib_dirs) )
         self.lib_dirs = [i for i in uniques(chain(
             all_lib_dirs, env.platform.lib_dirs
-        )) if os.path.exists(i)]
+        )) if self._index.isdir(i)]
 
         self.lang = lang
         self.platform = env.platform
@@ -365,10 +367,10 @@ class MsvcPackageResolver(object):
         if search_dirs is None:
             search_dirs = self.include_dirs
 
-        for base in search_dirs:
-            if os.path.exists(os.path.join(base, name)):
-                return HeaderDirectory(Path(base, Root.absolute), None,
-                                       system=True, external=True)
+        found = self._index.find(search_dirs, [name])
+        if found:
+            return HeaderDirectory(Path(found[0], Root.absolute), None,
+                                   system=True, external=True)
 
         raise IOError("unable to find header '{}'".format(name))
 
@@ -377,12 +379,11 @@ class MsvcPackageResolver(object):
             search_dirs = self.lib_dirs
         libname = name + '.lib'
 
-        for base in search_dirs:
-            fullpath = os.path.join(base, libname)
-            if os.path.exists(fullpath):
-                # We don't actually know what kind of library this is. It could
-                # be a static library or an import library (which we classify
-                # as a kind of shared lib).
-                return Library(Path(fullpath, Root.absolute),
-                               self.platform.object_format, external=True)
+        found = self._index.find(search_dirs, [libname])
+        if found:
+            # We don't actually know what kind of library this is. It could be
+            # a static library or an import library (which we classify as a
+            # kind of shared lib).
+            return Library(Path(os.path.join(*found), Root.absolute),
+                           self.platform.object_format, external=True)
         raise IOError("unable to find library '{}'".format(name))
@@ -1,14 +1,39 @@
+import hashlib
+import os
+import subprocess
+
 from .hooks import tool
 from .utils import check_which
+from .. import profiler
+from .. import shell
+from ..pc_file import PcResolver
+from ..platforms import which
+
+_default_pc_path = ['/usr/local/lib/pkgconfig', '/usr/local/share/pkgconfig',
+                    '/usr/lib/pkgconfig', '/usr/share/pkgconfig']
 
 
 @tool('pkg_config')
 class Install(object):
     rule_name = command_var = 'pkg_config'
 
+    # The environment variables that can change what pkg-config tells us.
+    env_vars = ('PKG_CONFIG_PATH', 'PKG_CONFIG_LIBDIR',
+                'PKG_CONFIG_SYSROOT_DIR', 'PKG_CONFIG_ALLOW_SYSTEM_CFLAGS',
+                'PKG_CONFIG_ALLOW_SYSTEM_LIBS',
+                'PKG_CONFIG_SYSTEM_INCLUDE_PATH',
+                'PKG_CONFIG_SYSTEM_LIBRARY_PATH')
+
     def __init__(self, env):
+        self.env = env
+        # Unless the user asked for a particular pkg-config, read the .pc files
+        # ourselves instead of running it for every query.
+        self.native = 'PKG_CONFIG' not in env.variables
         self.command = env.getvar('PKG_CONFIG', 'pkg-config')
-        check_which(self.command)
+        if not self.native:
+            check_which(self.command)
+        self._stamp = None
+        self._resolver = None
 
     def version(self, cmd, name):
         return [cmd, '--modversion', name]
@@ -29,3 +54,107 @@ class Install(object):
 
     def ldlibs(self, cmd, name, msvc_syntax=False):
         return self._flags(cmd, ['--libs-only-l'], name, msvc_syntax)
+
+    def _variable(self, name):
+        # Ask pkg-config for one of its built-in settings, if it's installed.
+        try:
+            which(shell.split(self.command)[0], self.env.variables)
+            return self.env.probes.check_output(
+                self.command, ['--variable', name, 'pkg-config'],
+                self.env.variables, self.env_vars
+            ).strip() or None
+        except (IOError, OSError, subprocess.CalledProcessError):
+            return None
+
+    def _path_var(self, var, setting, default=None):
+        value = self.env.getvar(var) or self._variable(setting)
+        if value is None:
+            return default
+        return [i for i in value.split(os.pathsep) if i]
+
+    def search_path(self):
+        path = self.env.getvar('PKG_CONFIG_PATH', '').split(os.pathsep)
+        libdir = self._path_var('PKG_CONFIG_LIBDIR', 'pc_path',
+                                _default_pc_path if self.native else None)
+        if libdir is None:
+            return None
+        return [i for i in path if i] + libdir
+
+    def resolver(self):
+        if self._resolver is None:
+            env = self.env
+            self._resolver = PcResolver(
+                self.search_path(),
+                sysroot=env.getvar('PKG_CONFIG_SYSROOT_DIR'),
+                system_includedirs=self._path_var(
+                    'PKG_CONFIG_SYSTEM_INCLUDE_PATH', 'pc_system_includedirs'
+                ),
+                system_libdirs=self._path_var(
+                    'PKG_CONFIG_SYSTEM_LIBRARY_PATH', 'pc_system_libdirs'
+                ),
+                allow_system_cflags='PKG_CONFIG_ALLOW_SYSTEM_CFLAGS' in
+                env.variables,
+                allow_system_libs='PKG_CONFIG_ALLOW_SYSTEM_LIBS' in
+                env.variables
+            )
+        return self._resolver
+
+    def stamp(self):
+        # Identify the state of every .pc file pkg-config could see, so that
+        # we can tell when any cached results might be out of date. Note that
+        # this is computed once, since the .pc files shouldn't change while
+        # we're running.
+        if self._stamp is None:
+            path = self.search_path()
+            if path is None:
+                self._stamp = False
+                return self._stamp
+
+            h = hashlib.sha1()
+            for d in path:
+                try:
+                    names = sorted(os.listdir(d))
+                except OSError:
+                    continue
+                for i in names:
+                    if i.endswith('.pc'):
+                        filename = os.path.join(d, i)
+                        try:
+                            st = os.stat(filename)
+                        except OSError:
+                            continue
+                        h.update('{}\0{}\0{}\n'.format(
+                            filename, st.st_mtime, st.st_size
+                        ).encode('utf-8'))
+            self._stamp = h.hexdigest()
+        return self._stamp
+
+    def run(self, args):
+        # Run pkg-config, caching the result in the build directory until any
+        # .pc files change. If we can't tell where the .pc files are, always
+        # run it.
+        stamp = self.stamp()
+        if not stamp:
+            cmd = [self.command] + args
+            with profiler.span('subprocess', ' '.join(cmd)):
+                return subprocess.check_output(cmd, universal_newlines=True)
+        return self.env.probes.check_output(
+            self.command, [shell.quote(i) for i in args], self.env.variables,
+            self.env_vars, stamp, quiet=False
+        )
+
+    def query(self, query, name, msvc_syntax=False):
+        # Get the version or flags for a package, either from our own .pc
+        # parser or by running pkg-config.
+        if self.native:
+            resolver = self.resolver()
+            if query == 'version':
+                return resolver.version(name)
+            elif query == 'cflags':
+                return resolver.cflags(name)
+            return getattr(resolver, query)(name, msvc_syntax)
+
+        if query == 'version':
+            return self.run(self.version(self.command, name)[1:]).strip()
+        cmd = getattr(self, query)(self.command, name, msvc_syntax)
+        return shell.split(self.run(cmd[1:]).strip())
@@ -1,21 +1,43 @@
+import os.path
+
 from .hooks import tool
 from .utils import check_which
+from .. import shell
 from ..iterutils import iterate
+from ..path import Path
 from ..safe_str import escaped_str
 from ..shell import shell_list
 
 
+def _is_bfg9000_printf(command):
+    if isinstance(command, Path):
+        name = command.basename()
+    else:
+        name = os.path.basename(shell.split(command)[0])
+    return os.path.splitext(name)[0] == 'bfg9000-printf'
+
+
 @tool('printf')
 class Printf(object):
     rule_name = command_var = 'printf'
 
     def __init__(self, env):
         command = env.getvar(
-            'PRINTF', ['printf', env.bfgdir.append('bfg9000-printf')]
+            'PRINTF', [env.bfgdir.append('bfg9000-printf'), 'printf']
         )
         self.command = check_which(command)
 
+        # Our own printf can write the output file itself, leaving it alone if
+        # its contents wouldn't change, so the build system can skip
+        # rebuilding anything that depends on it.
+        self.restat = _is_bfg9000_printf(self.command)
+
     def __call__(self, cmd, format, input, output):
+        if self.restat:
+            result = [cmd, '-o', output, '--', format]
+            result.extend(iterate(input))
+            return result
+
         result = shell_list([cmd, format])
         result.extend(iterate(input))
         result.extend([escaped_str('>'), output])
@@ -67,7 +67,6 @@ platform_name = platform.system()
 if platform_name == 'Windows':
     more_scripts.extend([
         'bfg9000-setenv=bfg9000.setenv:main',
-        'bfg9000-printf=bfg9000.printf:main',
     ])
 elif platform_name == 'Linux':
     if os.getenv('NO_PATCHELF') not in ['1', 'true']:
@@ -125,10 +124,11 @@ setup(
 
     entry_points={
         'console_scripts': [
-            'bfg9000=bfg9000.driver:main',
-            '9k=bfg9000.driver:simple_main',
+            'bfg9000=bfg9000.main:main',
+            '9k=bfg9000.main:simple_main',
             'bfg9000-depfixer=bfg9000.depfixer:main',
             'bfg9000-jvmoutput=bfg9000.jvmoutput:main',
+            'bfg9000-printf=bfg9000.printf:main',
         ] + more_scripts,
         'bfg9000.backends': [
             'make=bfg9000.backends.make.writer',
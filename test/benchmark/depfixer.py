@@ -0,0 +1,45 @@
+# Measure how long it takes to fix up a large depfile, like one generated for a
+# translation unit that includes lots of Boost headers. Run this from the root
+# of the source tree like so:
+#
+#   python -m test.benchmark.depfixer --size 5
+
+import argparse
+import time
+from six.moves import cStringIO as StringIO
+
+from bfg9000.depfixer import emit_deps
+
+header_tmpl = '/usr/include/boost/{0}/detail/impl_{1}/header_{1}.hpp'
+libs = ['asio', 'fusion', 'mpl', 'preprocessor', 'spirit', 'type_traits']
+
+
+def make_depfile(size):
+    out = StringIO()
+    out.write('src/foo.o: ../src/foo.cpp')
+    i = 0
+    while out.tell() < size:
+        out.write(' \\\n  ' + header_tmpl.format(libs[i % len(libs)], i))
+        i += 1
+    out.write('\n')
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=float, default=5,
+                        help=('size of the depfile in MB (default: ' +
+                              '%(default)s)'))
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of times to run (default: %(default)s)')
+    args = parser.parse_args()
+
+    depfile = make_depfile(int(args.size * 1024 * 1024))
+    for i in range(args.repeat):
+        start = time.time()
+        emit_deps(StringIO(depfile), StringIO())
+        print('{:.3f}s'.format(time.time() - start))
+
+
+if __name__ == '__main__':
+    main()
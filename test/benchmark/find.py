@@ -0,0 +1,96 @@
+# Measure how long it takes to filter the results of `find_files()` over a
+# large, synthetic source tree. By default, the tree is only simulated in
+# memory so that we measure the filters rather than the filesystem; pass
+# `--disk` to create it in a temporary directory and walk it for real. Run this
+# from the root of the source tree like so:
+#
+#   python -m test.benchmark.find --entries 1000000
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from bfg9000.builtins.find import (_filter_from_glob, _find_files,
+                                   _platform_filter_ex, exclude_globs,
+                                   FindResult)
+from bfg9000.platforms import platform_info
+
+exts = ['.cpp', '.hpp', '.txt', '.py', '.cpp~']
+platforms = ['', '_posix', '_windows', '_linux', '_darwin']
+
+
+def make_tree(entries, per_dir=50):
+    # Yield listings the same shape as the walkers in `find.py`: a base
+    # directory, followed by its subdirectories and files.
+    ndirs = max(entries // (per_dir + 1), 1)
+    for i in range(ndirs):
+        base = 'src/module_{}/sub_{}'.format(i // 100, i % 100)
+        files = []
+        for j in range(per_dir):
+            name = 'file_{}{}{}'.format(j, platforms[j % len(platforms)],
+                                        exts[j % len(exts)])
+            files.append((name, base + '/' + name))
+        yield base, [], files
+
+
+def make_filter(name):
+    platform = platform_info()
+    platform_ex = _platform_filter_ex(platform.name, platform.flavor)
+    glob_filter = _filter_from_glob('f', name, None, exclude_globs)
+
+    # This is the same as the filter `find_files()` uses by default.
+    def filter(name, path, type):
+        result = glob_filter(name, path, type)
+        if result == FindResult.exclude:
+            return result
+        plat = (FindResult.not_now if platform_ex.search(path) else
+                FindResult.include)
+        return max(plat, result)
+    return filter
+
+
+def write_tree(root, tree):
+    for base, dirs, files in tree:
+        os.makedirs(os.path.join(root, base))
+        for name, path in files:
+            open(os.path.join(root, path), 'w').close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entries', type=int, default=1000000,
+                        help='number of entries in the tree ' +
+                        '(default: %(default)s)')
+    parser.add_argument('--name', action='append',
+                        help='glob to search for (default: *.cpp, *.hpp)')
+    parser.add_argument('--disk', action='store_true',
+                        help='create the tree on disk and walk it')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of times to run (default: %(default)s)')
+    args = parser.parse_args()
+
+    filter = make_filter(args.name or ['*.cpp', '*.hpp'])
+    if args.disk:
+        root = tempfile.mkdtemp()
+        try:
+            write_tree(root, make_tree(args.entries))
+            for i in range(args.repeat):
+                start = time.time()
+                _find_files(os.path.join(root, 'src'), filter, False, False)
+                print('{:.3f}s'.format(time.time() - start))
+        finally:
+            shutil.rmtree(root)
+    else:
+        tree = list(make_tree(args.entries))
+        for i in range(args.repeat):
+            start = time.time()
+            for base, dirs, files in tree:
+                for name, path in files:
+                    filter(name, path, 'f')
+            print('{:.3f}s'.format(time.time() - start))
+
+
+if __name__ == '__main__':
+    main()
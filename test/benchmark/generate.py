@@ -0,0 +1,92 @@
+# Measure how long it takes to generate build files for a large, synthetic
+# project. Run this from the root of the source tree like so:
+#
+#   python -m test.benchmark.generate --sources 100000 --backend ninja
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from bfg9000.backends import list_backends
+from bfg9000.driver import execute_script
+from bfg9000.environment import Environment
+from bfg9000.path import abspath, InstallRoot
+
+build_tmpl = """
+for i in range({targets}):
+    srcs = ['src{{}}/file{{}}.cpp'.format(i, j) for j in range({per_target})]
+    executable('prog{{}}'.format(i), files=srcs,
+               include=['include', 'src{{}}'.format(i)],
+               compile_options=['-Wall', '-DPROG={{}}'.format(i)])
+"""
+
+
+def make_project(srcdir, sources, per_target):
+    targets = max(sources // per_target, 1)
+    with open(os.path.join(srcdir, 'build.bfg'), 'w') as f:
+        f.write(build_tmpl.format(targets=targets, per_target=per_target))
+    os.mkdir(os.path.join(srcdir, 'include'))
+    for i in range(targets):
+        os.mkdir(os.path.join(srcdir, 'src{}'.format(i)))
+
+
+def generate(srcdir, builddir, backend_name):
+    backend = list_backends()[backend_name]
+    env = Environment(
+        bfgdir=abspath(os.path.dirname(sys.argv[0])),
+        backend=backend_name,
+        backend_version=backend.version(),
+        srcdir=abspath(srcdir),
+        builddir=abspath(builddir),
+        install_dirs={i: abspath(os.path.join(builddir, 'dist', i.name))
+                      for i in InstallRoot}
+    )
+
+    start = time.time()
+    build = execute_script(env)
+    script_time = time.time() - start
+
+    start = time.time()
+    backend.write(env, build)
+    write_time = time.time() - start
+    return script_time, write_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sources', type=int, default=100000,
+                        help='number of source files (default: %(default)s)')
+    parser.add_argument('--per-target', type=int, default=100,
+                        help=('number of source files per executable ' +
+                              '(default: %(default)s)'))
+    parser.add_argument('--backend', default='ninja',
+                        help='backend to use (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='number of times to run (default: %(default)s)')
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    tmpdir = tempfile.mkdtemp()
+    try:
+        srcdir = os.path.join(tmpdir, 'src')
+        os.mkdir(srcdir)
+        make_project(srcdir, args.sources, args.per_target)
+
+        for i in range(args.repeat):
+            builddir = os.path.join(tmpdir, 'build{}'.format(i))
+            os.mkdir(builddir)
+            script_time, write_time = generate(srcdir, builddir, args.backend)
+            os.chdir(cwd)
+            print('script: {:.2f}s, write: {:.2f}s'.format(
+                script_time, write_time
+            ))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+#include <iostream>
+
+int main() {
+  std::cout << VALUE << std::endl;
+  return 0;
+}
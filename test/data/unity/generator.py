@@ -0,0 +1,13 @@
+import sys
+
+with open(sys.argv[1], 'w') as f:
+    f.write('#include <iostream>\n'
+            '#include <string>\n'
+            '\n'
+            'std::string hello();\n'
+            '\n'
+            'int main() {\n'
+            '  std::cout << hello() << " from a generated file"\n'
+            '            << std::endl;\n'
+            '  return 0;\n'
+            '}\n')
@@ -0,0 +1,11 @@
+#include <string>
+
+namespace {
+  const char *word() {
+    return "goodbye";
+  }
+}
+
+std::string goodbye() {
+  return word();
+}
@@ -0,0 +1,8 @@
+#include <string>
+
+std::string hello();
+std::string goodbye();
+
+std::string greeting() {
+  return hello() + ", " + goodbye() + "!";
+}
@@ -0,0 +1,11 @@
+#include <string>
+
+namespace {
+  const char *name() {
+    return "hello";
+  }
+}
+
+std::string hello() {
+  return name();
+}
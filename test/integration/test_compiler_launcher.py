@@ -0,0 +1,23 @@
+import os.path
+import sys
+
+from . import *
+
+
+class TestCompilerLauncher(IntegrationTest):
+    def __init__(self, *args, **kwargs):
+        IntegrationTest.__init__(self, 'compiler_launcher', *args, **kwargs)
+        launcher = os.path.join(test_data_dir, 'compiler_launcher',
+                                'launcher.py')
+        self.extra_args = ['--compiler-launcher',
+                           '{} {}'.format(sys.executable, launcher)]
+
+    @skip_if_backend('msbuild')
+    def test_build(self):
+        self.build(executable('program'))
+        self.assertOutput([executable('program')], 'hello\n')
+
+        with open('launcher.log') as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.assertIn('compiles: 1\n',
+                      self.assertPopen(['bfg9000', 'cache-stats']))
@@ -21,3 +21,29 @@ class TestDepfile(IntegrationTest):
 
         self.build(executable('program'))
         self.assertOutput([executable('program')], 'goodbye\n')
+
+
+class TestDepfileBatch(IntegrationTest):
+    def __init__(self, *args, **kwargs):
+        IntegrationTest.__init__(self, 'depfile', stage_src=True,
+                                 *args, **kwargs)
+        self.extra_args = ['--depfixer', 'batch']
+
+    @only_if_backend('make')
+    @skip_pred(lambda x: env.platform.name == 'windows',
+               'xfail on windows + make')
+    def test_remove_header(self):
+        self.build(executable('program'))
+        self.assertOutput([executable('program')], 'hello\n')
+
+        # Stop using header.hpp and delete it; make shouldn't complain about
+        # not knowing how to build it.
+        self.wait()
+        with open(os.path.join(self.srcdir, 'program.cpp'), 'w') as f:
+            f.write('#include <iostream>\n\nint main() {\n' +
+                    '  std::cout << "goodbye" << std::endl;\n' +
+                    '  return 0;\n}\n')
+        os.remove(os.path.join(self.srcdir, 'header.hpp'))
+
+        self.build(executable('program'))
+        self.assertOutput([executable('program')], 'goodbye\n')
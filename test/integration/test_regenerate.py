@@ -24,6 +24,30 @@ class TestRegenerate(IntegrationTest):
         self.build('bar')
         self.assertExists(pjoin(self.builddir, 'bar'))
 
+    @only_if_backend('ninja')
+    def test_regenerate_unchanged(self):
+        buildfile = pjoin(self.builddir, 'build.ninja')
+        mtime = os.path.getmtime(buildfile)
+        self.wait()
+        with open(pjoin(self.srcdir, 'build.bfg'), 'a') as out:
+            out.write('# a comment\n')
+
+        # The build file shouldn't be rewritten, and Ninja shouldn't keep
+        # trying to regenerate it.
+        self.build('foo')
+        self.assertEqual(os.path.getmtime(buildfile), mtime)
+        self.assertNotIn('refresh', self.build('foo'))
+
+    @only_if_backend('make')
+    def test_regenerate_unchanged_make(self):
+        self.wait()
+        with open(pjoin(self.srcdir, 'build.bfg'), 'a') as out:
+            out.write('# a comment\n')
+
+        # Make should only regenerate the Makefile once.
+        self.assertIn('refresh', self.build('foo'))
+        self.assertNotIn('refresh', self.build('foo'))
+
 
 class TestRegenerateGlob(IntegrationTest):
     def __init__(self, *args, **kwargs):
@@ -51,6 +75,19 @@ class TestRegenerateGlob(IntegrationTest):
         self.assertOutput([executable('hello')],
                           'Hello, world!\nBonjour le monde!\n')
 
+    @skip_if_backend('msbuild')
+    def test_touch_dir(self):
+        self.wait()
+        tmpfile = pjoin(self.srcdir, 'src', 'hello', 'tmp.txt')
+        open(tmpfile, 'w').close()
+        os.unlink(tmpfile)
+
+        # The fingerprint only gets rewritten if we regenerated the build.
+        mtime = os.path.getmtime('.bfg_fingerprint')
+        self.build(executable('hello'))
+        self.assertOutput([executable('hello')], 'Hello, world!\n')
+        self.assertEqual(os.path.getmtime('.bfg_fingerprint'), mtime)
+
     @skip_if_backend('msbuild')
     def test_add_dir(self):
         self.wait()
@@ -0,0 +1,52 @@
+import os.path
+
+from . import *
+
+
+class TestSubninja(IntegrationTest):
+    def __init__(self, *args, **kwargs):
+        IntegrationTest.__init__(self, 'files_with_spaces', stage_src=True,
+                                 *args, **kwargs)
+        self.extra_args = ['--subninja']
+
+    @only_if_backend('ninja')
+    def test_build(self):
+        subninja = os.path.join('.bfg_ninja', 'sub dir', 'build.ninja')
+        self.assertExists(subninja)
+        self.build(executable('quad damage'))
+        self.assertOutput([executable('quad damage')], 'QUAD DAMAGE!\n')
+        self.build(executable('another file'))
+        self.assertOutput([executable('another file')], 'hello from sub dir\n')
+
+        # Regenerating shouldn't rewrite subninja files that didn't change.
+        mtime = os.path.getmtime(subninja)
+        self.wait()
+        with open(os.path.join(self.srcdir, 'build.bfg'), 'a') as f:
+            f.write('\n# a change\n')
+        self.build()
+        self.assertEqual(os.path.getmtime(subninja), mtime)
+
+
+class TestSubninjaRegenerate(IntegrationTest):
+    def __init__(self, *args, **kwargs):
+        IntegrationTest.__init__(self, 'subninja', stage_src=True, *args,
+                                 **kwargs)
+        self.extra_args = ['--subninja']
+
+    @only_if_backend('ninja')
+    def test_change_options(self):
+        program = executable(os.path.join('sub', 'program'))
+        self.build(program)
+        self.assertOutput([program], '1\n')
+
+        # Changing build.bfg only changes a subninja file, but Ninja should
+        # still pick up the change the first time it runs.
+        self.wait()
+        bfgfile = os.path.join(self.srcdir, 'build.bfg')
+        with open(bfgfile) as f:
+            data = f.read()
+        with open(bfgfile, 'w') as f:
+            f.write(data.replace('-DVALUE=1', '-DVALUE=2'))
+
+        self.build(program)
+        self.assertOutput([program], '2\n')
@@ -0,0 +1,31 @@
+import os.path
+
+from . import *
+
+
+class TestUnity(IntegrationTest):
+    def __init__(self, *args, **kwargs):
+        IntegrationTest.__init__(self, 'unity', stage_src=True, *args,
+                                 **kwargs)
+
+    def test_build(self):
+        self.build(executable('program'))
+        self.assertOutput([executable('program')], 'hello, goodbye!\n')
+
+    def test_generated_source(self):
+        self.build(executable('generated'))
+        self.assertOutput([executable('generated')],
+                          'hello from a generated file\n')
+
+    def test_rebuild(self):
+        self.build(executable('program'))
+        self.wait()
+        for name, old, new in [('goodbye.cpp', '"goodbye"', '"farewell"'),
+                               ('greeting.cpp', '", "', '"; "')]:
+            with open(os.path.join(self.srcdir, name)) as f:
+                text = f.read()
+            with open(os.path.join(self.srcdir, name), 'w') as f:
+                f.write(text.replace(old, new))
+
+        self.build(executable('program'))
+        self.assertOutput([executable('program')], 'hello; farewell!\n')
@@ -0,0 +1,104 @@
+import unittest
+from collections import namedtuple
+
+from bfg9000.builtins.compile import ObjectFiles
+from bfg9000.builtins.write_file import WriteFile
+from bfg9000.file_types import ObjectFile, SourceFile
+from bfg9000.path import Path, Root
+
+MockEnv = namedtuple('MockEnv', ['path_roots'])
+MockCompile = namedtuple('MockCompile', ['file', 'extra_deps'])
+
+
+class MockBuildInputs(object):
+    def __init__(self):
+        self.edges = []
+
+    def add_edge(self, edge):
+        self.edges.append(edge)
+
+
+def source_file(name, lang=None):
+    return SourceFile(Path(name, Root.srcdir), lang)
+
+
+def object_file(name, file, **kwargs):
+    if not isinstance(file, SourceFile):
+        file = source_file(file, kwargs.get('lang'))
+    if name is None:
+        name = file.path.stripext().suffix
+
+    obj = ObjectFile(Path(name + '.o'), 'elf', file.lang)
+    obj.creator = MockCompile(file, kwargs.get('extra_deps'))
+    return obj
+
+
+class TestUnityObjectFiles(unittest.TestCase):
+    def setUp(self):
+        self.builtins = {'object_file': object_file,
+                         'source_file': source_file}
+        self.build = MockBuildInputs()
+        self.env = MockEnv({Root.srcdir: '/src', Root.builddir: '/build'})
+
+    def object_files(self, files, unity):
+        return ObjectFiles(self.builtins, self.build, self.env, files,
+                           unity=unity)
+
+    def unity_sources(self):
+        return [i.output[0] for i in self.build.edges
+                if isinstance(i, WriteFile)]
+
+    def test_no_unity(self):
+        objs = self.object_files(['a.cpp', 'b.cpp'], None)
+        self.assertEqual([i.path for i in objs],
+                         [Path('a.o'), Path('b.o')])
+        self.assertEqual(self.build.edges, [])
+
+    def test_single_batch(self):
+        objs = self.object_files(['a.cpp', 'b.cpp', 'c.cpp'], True)
+        self.assertEqual([i.path for i in objs], [Path('a-unity.o')])
+
+        src, = self.unity_sources()
+        self.assertEqual(src.lang, 'c++')
+        self.assertEqual(objs[0].creator.file, src)
+        self.assertEqual(src.creator.text, [
+            '#include "/src/a.cpp"',
+            '#include "/src/b.cpp"',
+            '#include "/src/c.cpp"',
+        ])
+
+    def test_batch_size(self):
+        objs = self.object_files(['a.cpp', 'b.cpp', 'c.cpp', 'd.cpp',
+                                  'e.cpp'], 2)
+        self.assertEqual([i.path for i in objs], [
+            Path('a-unity.o'), Path('c-unity.o'), Path('e.o')
+        ])
+        self.assertEqual(len(self.unity_sources()), 2)
+
+    def test_group_by_lang(self):
+        objs = self.object_files(['a.c', 'b.cpp', 'c.c', 'd.cpp', 'e.o'],
+                                 True)
+        self.assertEqual([i.path for i in objs], [
+            Path('a-unity.o'), Path('b-unity.o'), Path('e.o')
+        ])
+        self.assertEqual(sorted(i.lang for i in self.unity_sources()),
+                         ['c', 'c++'])
+
+    def test_generated_source(self):
+        generated = source_file('gen.cpp')
+        generated.creator = object()
+        objs = self.object_files(['a.cpp', generated, 'c.cpp'], True)
+        self.assertEqual([i.path for i in objs], [Path('a-unity.o')])
+        self.assertEqual(objs[0].creator.extra_deps, [generated])
+
+    def test_invalid_unity(self):
+        for i in (0, -1, 1.5, '2'):
+            self.assertRaises(ValueError, self.object_files, ['a.cpp'], i)
+
+    def test_getitem(self):
+        objs = self.object_files(['a.cpp', 'b.cpp', 'c.cpp'], 2)
+        self.assertEqual(objs['a.cpp'].path, Path('a-unity.o'))
+        self.assertEqual(objs['b.cpp'].path, Path('a-unity.o'))
+        self.assertEqual(objs[source_file('b.cpp')].path, Path('a-unity.o'))
+        self.assertEqual(objs['c.cpp'].path, Path('c.o'))
+        self.assertRaises(ValueError, objs.__getitem__, 'd.cpp')
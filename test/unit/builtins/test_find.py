@@ -1,6 +1,225 @@
+import json
+import os
+import shutil
+import tempfile
 import unittest
 
-from bfg9000.builtins.find import _filter_from_glob, FindResult
+from bfg9000.builtins.find import (_filter_from_glob, _find_files,
+                                   _glob_matcher, _listdir, _walk_flat,
+                                   _walk_parallel, _walk_recursive, FindCache,
+                                   FindResult)
+
+
+class TreeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for i in ['a/b/c', 'a/d', 'e']:
+            os.makedirs(os.path.join(self.root, i))
+        for i in ['x', 'a/y', 'a/b/z', 'a/b/c/w', 'e/v']:
+            open(os.path.join(self.root, i), 'w').close()
+        if hasattr(os, 'symlink'):
+            os.symlink(os.path.join(self.root, 'a'),
+                       os.path.join(self.root, 'link'))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def path(self, *args):
+        return '/'.join((self.root,) + args)
+
+
+class TestWalk(TreeTestCase):
+    def test_listdir(self):
+        dirs, files = _listdir(self.root)
+        names = ['a', 'e']
+        if hasattr(os, 'symlink'):
+            names.append('link')
+        self.assertEqual(sorted(dirs), [(i, self.path(i)) for i in names])
+        self.assertEqual(files, [('x', self.path('x'))])
+
+    def test_listdir_nonexistent(self):
+        self.assertEqual(_listdir(self.path('nonexist')), ([], []))
+
+    def test_walk_flat(self):
+        self.assertEqual([i[0] for i in _walk_flat(self.root)], [self.root])
+        self.assertEqual(list(_walk_flat(self.path('nonexist'))), [])
+
+    def test_walk_recursive(self):
+        bases = sorted(i[0] for i in _walk_recursive(self.root))
+        self.assertEqual(bases, [self.root] + [
+            self.path(*i.split('/')) for i in ['a', 'a/b', 'a/b/c', 'a/d', 'e']
+        ])
+        self.assertEqual(list(_walk_recursive(self.path('nonexist'))), [])
+
+    def test_walk_parallel(self):
+        self.assertEqual(list(_walk_parallel(self.root, 4)),
+                         list(_walk_recursive(self.root)))
+        self.assertEqual(list(_walk_parallel(self.path('nonexist'), 4)), [])
+
+
+class TestFindFiles(TreeTestCase):
+    def find(self, filter, **kwargs):
+        results, dist, seen_dirs = _find_files(self.root, filter, False, False,
+                                               **kwargs)
+        return (sorted(i[len(self.root) + 1:] for i in results),
+                sorted(i[len(self.root) + 1:] for i in seen_dirs))
+
+    def test_find(self):
+        def filter(name, path, type):
+            return FindResult.include if type == 'f' else FindResult.exclude
+
+        self.assertEqual(self.find(filter), (
+            ['a/b/c/w', 'a/b/z', 'a/y', 'e/v', 'x'],
+            ['', 'a', 'a/b', 'a/b/c', 'a/d', 'e']
+        ))
+
+    def test_exclude_subtree(self):
+        def filter(name, path, type):
+            if name == 'b':
+                return FindResult.exclude_subtree
+            return FindResult.include if type == 'f' else FindResult.exclude
+
+        expected = (['a/y', 'e/v', 'x'], ['', 'a', 'a/d', 'e'])
+        self.assertEqual(self.find(filter), expected)
+        self.assertEqual(self.find(filter, jobs=4), expected)
+
+    def test_exclude_top(self):
+        def filter(name, path, type):
+            return FindResult.exclude_subtree
+
+        self.assertEqual(self.find(filter), ([], []))
+        self.assertEqual(self.find(filter, jobs=4), ([], []))
+
+
+class TestFindCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cachefile = os.path.join(self.tmpdir, FindCache.filename)
+        self.root = os.path.join(self.tmpdir, 'src')
+        os.makedirs(os.path.join(self.root, 'sub'))
+        self.touch('a')
+        self.set_mtime()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def touch(self, name):
+        open(os.path.join(self.root, name), 'w').close()
+
+    def set_mtime(self):
+        # Make the directory look old enough to be cached.
+        self.mtime = os.stat(self.root).st_mtime - 60
+        os.utime(self.root, (self.mtime, self.mtime))
+
+    def names(self, cache):
+        dirs, nondirs, links = cache.scandir(self.root)
+        return sorted(i[0] for i in dirs), sorted(i[0] for i in nondirs)
+
+    def test_uncached(self):
+        self.assertEqual(self.names(FindCache()), (['sub'], ['a']))
+
+    def test_cached(self):
+        cache = FindCache(self.cachefile)
+        self.assertEqual(self.names(cache), (['sub'], ['a']))
+        cache.save()
+
+        # Add a file without changing the directory's mtime. Since the mtime
+        # is the same, we should get the cached listing.
+        self.touch('b')
+        os.utime(self.root, (self.mtime, self.mtime))
+        self.assertEqual(self.names(FindCache(self.cachefile)),
+                         (['sub'], ['a']))
+
+    def test_changed(self):
+        cache = FindCache(self.cachefile)
+        self.names(cache)
+        cache.save()
+
+        self.touch('b')
+        self.set_mtime()
+        self.assertEqual(self.names(FindCache(self.cachefile)),
+                         (['sub'], ['a', 'b']))
+
+    def test_racy(self):
+        cache = FindCache(self.cachefile)
+        self.touch('b')
+        self.assertEqual(self.names(cache), (['sub'], ['a', 'b']))
+        cache.save()
+
+        # The directory was modified too recently to trust its mtime, so it
+        # shouldn't have been cached.
+        self.touch('c')
+        self.assertEqual(self.names(FindCache(self.cachefile)),
+                         (['sub'], ['a', 'b', 'c']))
+
+    def test_only_save_seen(self):
+        cache = FindCache(self.cachefile)
+        self.names(cache)
+        cache.save()
+
+        cache = FindCache(self.cachefile)
+        cache.save()
+        with open(self.cachefile) as f:
+            self.assertEqual(json.load(f)['data'], {})
+
+    def test_walk(self):
+        cache = FindCache(self.cachefile)
+        self.assertEqual(list(_walk_recursive(self.root, cache.scandir)),
+                         list(_walk_recursive(self.root)))
+
+    def test_invalid(self):
+        with open(self.cachefile, 'w') as f:
+            f.write('invalid')
+        self.assertEqual(self.names(FindCache(self.cachefile)),
+                         (['sub'], ['a']))
+
+    def test_nonexistent(self):
+        cache = FindCache(self.cachefile)
+        self.assertEqual(cache.scandir(os.path.join(self.root, 'nonexist')),
+                         ([], [], set()))
+
+
+class TestGlobMatcher(unittest.TestCase):
+    def test_empty(self):
+        m = _glob_matcher(None)
+        self.assertFalse(m('foo'))
+        self.assertFalse(m(''))
+
+    def test_star(self):
+        m = _glob_matcher('*')
+        self.assertTrue(m('foo'))
+        self.assertTrue(m(''))
+
+    def test_suffix(self):
+        m = _glob_matcher(['*.cpp', '*.hpp'])
+        self.assertTrue(m('foo.cpp'))
+        self.assertTrue(m('foo.hpp'))
+        self.assertTrue(m('.cpp'))
+        self.assertFalse(m('foo.cxx'))
+        self.assertFalse(m('foo.cpp~'))
+
+    def test_literal(self):
+        m = _glob_matcher('Makefile')
+        self.assertTrue(m('Makefile'))
+        self.assertFalse(m('Makefile.in'))
+        self.assertFalse(m('makefile'))
+
+    def test_pattern(self):
+        m = _glob_matcher(['foo*', '*.?pp', '#*#', '[ab].txt'])
+        self.assertTrue(m('foobar'))
+        self.assertTrue(m('bar.cpp'))
+        self.assertTrue(m('#bar#'))
+        self.assertTrue(m('a.txt'))
+        self.assertFalse(m('c.txt'))
+        self.assertFalse(m('bar.cxx'))
+        self.assertFalse(m('bar'))
+
+    def test_mixed(self):
+        m = _glob_matcher(['*.cpp', 'README', 'test_*.py'])
+        self.assertTrue(m('foo.cpp'))
+        self.assertTrue(m('README'))
+        self.assertTrue(m('test_foo.py'))
+        self.assertFalse(m('foo.py'))
 
 
 class TestFilterFromGlob(unittest.TestCase):
@@ -0,0 +1,75 @@
+import sys
+import unittest
+from six import exec_
+
+from bfg9000 import profiler
+from bfg9000.builtins import hooks
+
+
+class TestBind(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+
+        @hooks.builtin.getter('env')
+        def test_getter(env):
+            self.calls += 1
+            return env
+
+        @hooks.builtin.globals('env')
+        def test_globals(env, a, b=1):
+            return env, a, b
+
+    def tearDown(self):
+        del hooks._all_builtins['test_getter']
+        del hooks._all_builtins['test_globals']
+
+    def test_lazy(self):
+        builtins = hooks.bind(env='env')
+        if sys.version_info >= (3,):
+            self.assertEqual(self.calls, 0)
+        self.assertEqual(builtins['test_getter'], 'env')
+        self.assertEqual(builtins['test_getter'], 'env')
+        self.assertEqual(self.calls, 1)
+
+    def test_call(self):
+        builtins = hooks.bind(env='env')
+        self.assertEqual(builtins['test_globals'](2), ('env', 2, 1))
+
+    def test_missing(self):
+        builtins = hooks.bind(env='env')
+        self.assertTrue('test_globals' in builtins)
+        self.assertFalse('nonexist' in builtins)
+        self.assertRaises(KeyError, lambda: builtins['nonexist'])
+        self.assertEqual(builtins.get('nonexist'), None)
+        self.assertEqual(builtins.get('test_getter'), 'env')
+
+    def test_exec(self):
+        builtins = hooks.bind(env='env')
+        code = ('x = test_getter\n' +
+                'def f():\n' +
+                '    return test_globals(x)\n' +
+                'y = f()\n')
+        exec_(code, builtins)
+        self.assertEqual(builtins['y'], ('env', 'env', 1))
+
+    def test_exec_name_error(self):
+        builtins = hooks.bind(env='env')
+        self.assertRaises(NameError, exec_, 'nonexist', builtins)
+
+    def test_profile(self):
+        prof = profiler.enable()
+        try:
+            builtins = hooks.bind(env='env')
+            self.assertEqual(builtins['test_globals'](2), ('env', 2, 1))
+            self.assertEqual(builtins['test_getter'], 'env')
+        finally:
+            profiler.disable()
+        self.assertEqual([i[0:2] for i in prof.events],
+                         [('builtin', 'test_globals')])
+
+    @unittest.skipIf(sys.version_info < (3, 3), 'requires inspect.signature')
+    def test_signature(self):
+        import inspect
+        builtins = hooks.bind(env='env')
+        self.assertEqual(str(inspect.signature(builtins['test_globals'])),
+                         '(a, b=1)')
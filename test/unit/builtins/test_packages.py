@@ -0,0 +1,90 @@
+import subprocess
+import unittest
+from collections import namedtuple
+
+from bfg9000.builtins.packages import PkgConfigPackage
+
+Tool = namedtuple('Tool', ['flavor'])
+
+
+class MockPkgConfig(object):
+    command = 'pkg-config'
+    native = False
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self._fail = fail
+
+    def version(self, cmd, name):
+        return [cmd, '--modversion', name]
+
+    def cflags(self, cmd, name, msvc_syntax=False):
+        return [cmd, '--cflags', name] + (['--msvc'] if msvc_syntax else [])
+
+    def ldflags(self, cmd, name, msvc_syntax=False):
+        return [cmd, '--libs-only-L', name] + (['--msvc'] if msvc_syntax
+                                               else [])
+
+    def ldlibs(self, cmd, name, msvc_syntax=False):
+        return [cmd, '--libs-only-l', name] + (['--msvc'] if msvc_syntax
+                                               else [])
+
+    def run(self, args):
+        self.calls.append(args)
+        if args[0] in self._fail:
+            raise subprocess.CalledProcessError(1, args)
+        return ' '.join(args) + '\n'
+
+    def query(self, query, name, *args):
+        output = self.run(getattr(self, query)(self.command, name, *args)[1:])
+        return output.strip() if query == 'version' else output.split()
+
+
+class TestPkgConfigPackage(unittest.TestCase):
+    def test_version(self):
+        pkg_config = MockPkgConfig()
+        pkg_config.run = lambda args: '1.0\n'
+        pkg = PkgConfigPackage('foo', pkg_config)
+        self.assertEqual(str(pkg.version), '1.0')
+
+    def test_flags(self):
+        pkg_config = MockPkgConfig()
+        pkg = PkgConfigPackage('foo', pkg_config)
+        gcc = Tool('cc')
+        self.assertEqual(pkg.cflags(gcc, None), ['--cflags', 'foo'])
+        self.assertEqual(pkg.ldflags(gcc, None), ['--libs-only-L', 'foo'])
+        self.assertEqual(pkg.ldlibs(gcc, None), ['--libs-only-l', 'foo'])
+        self.assertEqual(sorted(pkg_config.calls), [
+            ['--cflags', 'foo'],
+            ['--libs-only-L', 'foo'],
+            ['--libs-only-l', 'foo'],
+        ])
+
+    def test_memoized(self):
+        pkg_config = MockPkgConfig()
+        pkg = PkgConfigPackage('foo', pkg_config)
+        gcc = Tool('cc')
+        pkg.cflags(gcc, None)
+        self.assertEqual(len(pkg_config.calls), 3)
+        pkg.cflags(gcc, None)
+        pkg.ldlibs(gcc, None)
+        self.assertEqual(len(pkg_config.calls), 3)
+
+        # Each flavor of flags is fetched separately.
+        self.assertEqual(pkg.cflags(Tool('msvc'), None),
+                         ['--cflags', 'foo', '--msvc'])
+        self.assertEqual(len(pkg_config.calls), 6)
+
+    def test_result_is_copy(self):
+        pkg = PkgConfigPackage('foo', MockPkgConfig())
+        gcc = Tool('cc')
+        pkg.cflags(gcc, None).append('-bar')
+        self.assertEqual(pkg.cflags(gcc, None), ['--cflags', 'foo'])
+
+    def test_failure(self):
+        pkg_config = MockPkgConfig(fail=['--libs-only-l'])
+        pkg = PkgConfigPackage('foo', pkg_config)
+        gcc = Tool('cc')
+        self.assertEqual(pkg.cflags(gcc, None), ['--cflags', 'foo'])
+        self.assertRaises(subprocess.CalledProcessError, pkg.ldlibs, gcc,
+                          None)
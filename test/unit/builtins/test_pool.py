@@ -0,0 +1,90 @@
+import unittest
+from six.moves import cStringIO as StringIO
+
+from bfg9000.backends.ninja.syntax import NinjaFile
+from bfg9000.builtins import command, pool
+
+
+class MockBuildInputs(dict):
+    def __init__(self):
+        dict.__init__(self, pools=pool.Pools(None, None))
+        self.edges = []
+
+    def add_edge(self, edge):
+        self.edges.append(edge)
+
+
+class TestPools(unittest.TestCase):
+    def setUp(self):
+        self.pools = pool.Pools(None, None)
+
+    def test_add(self):
+        p = self.pools.add('heavy', 2)
+        self.assertEqual(p, pool.Pool('heavy', 2))
+        self.assertEqual(self.pools.get('heavy'), p)
+        self.assertEqual(self.pools.get(p), p)
+        self.assertEqual(self.pools.add('heavy', 2), p)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self.pools.add, 'bad name', 1)
+        self.assertRaises(ValueError, self.pools.add, 'console', 1)
+        self.assertRaises(ValueError, self.pools.add, 'heavy', 0)
+        self.assertRaises(ValueError, self.pools.add, 'heavy', '2')
+
+        self.pools.add('heavy', 2)
+        self.assertRaises(ValueError, self.pools.add, 'heavy', 4)
+
+    def test_get(self):
+        self.assertEqual(self.pools.get(None), None)
+        self.assertEqual(self.pools.get('console'), pool.console_pool)
+        self.assertRaises(ValueError, self.pools.get, 'unknown')
+
+    def test_name(self):
+        self.assertEqual(self.pools.name(None), None)
+        self.assertEqual(self.pools.name('link'), 'link')
+        self.assertEqual(self.pools.name(self.pools.add('heavy', 2)), 'heavy')
+        self.assertRaises(ValueError, self.pools.name, 'unknown')
+
+    def test_link(self):
+        self.assertEqual(self.pools.get('link').name, 'link')
+        self.assertEqual(self.pools.add('link', 3), pool.Pool('link', 3))
+        self.assertEqual(self.pools.get('link'), pool.Pool('link', 3))
+        self.assertRaises(ValueError, self.pools.add, 'link', 4)
+
+    def test_link_depth(self):
+        depth = pool._link_pool_depth()
+        self.assertTrue(depth is None or depth >= 1)
+
+
+class TestNinjaPool(unittest.TestCase):
+    def setUp(self):
+        self.build = MockBuildInputs()
+
+    def step(self, name, pool):
+        return command.BuildStep(self.build, name, cmd=['cmd'], pool=pool)
+
+    def write(self):
+        ninjafile = NinjaFile('build.bfg')
+        for i in self.build.edges:
+            command.ninja_command(i, self.build, ninjafile, None)
+        out = StringIO()
+        ninjafile.write(out)
+        return out.getvalue()
+
+    def test_redefine_after_use(self):
+        self.step('a', 'link')
+        pool.pool(self.build, 'link', 7)
+        self.assertIn('pool link\n  depth = 7\n', self.write())
+
+    def test_redefine_between_uses(self):
+        self.step('a', 'link')
+        pool.pool(self.build, 'link', 7)
+        self.step('b', 'link')
+
+        result = self.write()
+        self.assertIn('pool link\n  depth = 7\n', result)
+        self.assertEqual(result.count('pool link\n'), 1)
+        self.assertEqual(result.count('  pool = link\n'), 2)
+
+    def test_unknown_pool(self):
+        self.assertRaises(ValueError, self.step, 'a', 'heavy')
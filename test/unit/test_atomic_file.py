@@ -0,0 +1,76 @@
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from bfg9000.atomic_file import write_if_changed
+
+
+class TestWriteIfChanged(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'file.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read(self):
+        with open(self.filename) as f:
+            return f.read()
+
+    def set_mtime(self, path):
+        mtime = os.stat(path).st_mtime - 60
+        os.utime(path, (mtime, mtime))
+        return os.stat(path).st_mtime
+
+    def test_new_file(self):
+        with write_if_changed(self.filename) as out:
+            out.write('hello\n')
+        self.assertEqual(self.read(), 'hello\n')
+        self.assertEqual(os.listdir(self.tmpdir), ['file.txt'])
+
+        mode = stat.S_IMODE(os.stat(self.filename).st_mode)
+        self.assertEqual(mode & 0o644, 0o644)
+
+    def test_unchanged(self):
+        with write_if_changed(self.filename) as out:
+            out.write('hello\n')
+        mtime = self.set_mtime(self.filename)
+
+        with write_if_changed(self.filename) as out:
+            out.write('hello\n')
+        self.assertEqual(os.stat(self.filename).st_mtime, mtime)
+        self.assertEqual(os.listdir(self.tmpdir), ['file.txt'])
+
+    def test_changed(self):
+        with write_if_changed(self.filename) as out:
+            out.write('hello\n')
+        mtime = self.set_mtime(self.filename)
+
+        with write_if_changed(self.filename) as out:
+            out.write('goodbye\n')
+        self.assertEqual(self.read(), 'goodbye\n')
+        self.assertNotEqual(os.stat(self.filename).st_mtime, mtime)
+
+    def test_error(self):
+        with write_if_changed(self.filename) as out:
+            out.write('hello\n')
+
+        def fail():
+            with write_if_changed(self.filename) as out:
+                out.write('goodbye\n')
+                raise RuntimeError('oops')
+        self.assertRaises(RuntimeError, fail)
+        self.assertEqual(self.read(), 'hello\n')
+        self.assertEqual(os.listdir(self.tmpdir), ['file.txt'])
+
+    @unittest.skipIf(os.name == 'nt', 'no umask on windows')
+    def test_umask(self):
+        old = os.umask(0o077)
+        try:
+            with write_if_changed(self.filename) as out:
+                out.write('hello\n')
+        finally:
+            os.umask(old)
+        self.assertEqual(stat.S_IMODE(os.stat(self.filename).st_mode), 0o600)
@@ -0,0 +1,36 @@
+import unittest
+
+from bfg9000 import backends
+
+
+class TestBackends(unittest.TestCase):
+    def test_backend_names(self):
+        names = backends.backend_names()
+        self.assertIn('make', names)
+        self.assertIn('ninja', names)
+
+    def test_get_backend(self):
+        from bfg9000.backends.make import writer
+        self.assertIs(backends.get_backend('make'), writer)
+
+    def test_get_unknown_backend(self):
+        self.assertRaises(KeyError, backends.get_backend, 'nonexist')
+
+    def test_list_backends(self):
+        result = backends.list_backends()
+        self.assertIn('make', result)
+        self.assertIs(backends.get_backend('make'), result['make'])
+
+    def test_get_backend_module(self):
+        from bfg9000.backends.make import writer
+        old = backends._entry_points, backends._backends
+        # Make sure we don't read the entry points at all.
+        backends._entry_points, backends._backends = {}, None
+        try:
+            self.assertIs(backends.get_backend(
+                'make', 'bfg9000.backends.make.writer'
+            ), writer)
+            self.assertRaises(KeyError, backends.get_backend, 'make',
+                              'bfg9000.backends.nonexist')
+        finally:
+            backends._entry_points, backends._backends = old
@@ -1,3 +1,6 @@
+import os
+import shutil
+import tempfile
 import unittest
 from six.moves import cStringIO as StringIO
 
@@ -69,3 +72,88 @@ class TestEmitDeps(unittest.TestCase):
         instream = StringIO('foo: bar')
         outstream = StringIO()
         self.assertRaises(ParseError, emit_deps, instream, outstream)
+
+    def test_escaped_newlines(self):
+        instream = StringIO('foo: bar \\\n  baz\\\nquux \\\n\n')
+        outstream = StringIO()
+        emit_deps(instream, outstream)
+        self.assertEqual(outstream.getvalue(), 'bar:\nbazquux:\n')
+
+
+class TestTokenizeChunks(unittest.TestCase):
+    @staticmethod
+    def merge_runs(tokens):
+        # Runs of characters or spaces may be split across chunks, so merge
+        # them.
+        result = []
+        for tok, value in tokens:
+            if tok == Token.char and result and result[-1][0] == Token.char:
+                result[-1] = (tok, result[-1][1] + value)
+            elif not (tok == Token.space and result and
+                      result[-1][0] == Token.space):
+                result.append((tok, value))
+        return result
+
+    def test_chunks(self):
+        s = 'c:\\foo c:\\bar: c:\\baz \\\n  c:\\qu\\ ux\n'
+        expected = list(tokenize(s))
+        for size in range(1, 5):
+            chunks = [s[i:i + size] for i in range(0, len(s), size)]
+            self.assertEqual(self.merge_runs(tokenize_chunks(chunks)),
+                             expected)
+
+    def test_unexpected_eof(self):
+        for s in ['foo:', 'foo\\']:
+            self.assertRaises(ParseError, list, tokenize_chunks([s]))
+
+
+class TestFixDepfiles(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.depfile = os.path.join(self.tmpdir, 'foo.o.d')
+        with open(self.depfile, 'w') as f:
+            f.write('foo.o: foo.c \\\n  foo.h\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def assertDepfile(self, expected):
+        with open(self.depfile) as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_fix_depfile(self):
+        self.assertTrue(fix_depfile(self.depfile))
+        self.assertDepfile('foo.o: foo.c \\\n  foo.h\nfoo.c:\nfoo.h:\n')
+
+        # Fixing the depfile again should leave it alone.
+        self.assertFalse(fix_depfile(self.depfile))
+        self.assertDepfile('foo.o: foo.c \\\n  foo.h\nfoo.c:\nfoo.h:\n')
+
+    def test_fix_directory(self):
+        other = os.path.join(self.tmpdir, 'other.txt')
+        with open(other, 'w') as f:
+            f.write('foo\n')
+
+        fix_depfiles([self.tmpdir])
+        self.assertDepfile('foo.o: foo.c \\\n  foo.h\nfoo.c:\nfoo.h:\n')
+        with open(other) as f:
+            self.assertEqual(f.read(), 'foo\n')
+
+    def test_stamp(self):
+        stamp = os.path.join(self.tmpdir, 'stamp')
+        fix_depfiles([self.tmpdir], stamp)
+        self.assertDepfile('foo.o: foo.c \\\n  foo.h\nfoo.c:\nfoo.h:\n')
+        self.assertTrue(os.path.exists(stamp))
+
+        # Depfiles older than the stamp are skipped.
+        with open(self.depfile, 'w') as f:
+            f.write('foo.o: foo.c\n')
+        mtime = os.path.getmtime(stamp) - 10
+        os.utime(self.depfile, (mtime, mtime))
+        fix_depfiles([self.tmpdir], stamp)
+        self.assertDepfile('foo.o: foo.c\n')
+
+    def test_parse_error(self):
+        with open(self.depfile, 'w') as f:
+            f.write('foo.o: foo.c')
+        self.assertRaises(ParseError, fix_depfiles, [self.depfile])
@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from bfg9000.dir_index import DirIndex
+
+
+class TestDirIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cachefile = os.path.join(self.tmpdir, DirIndex.filename)
+        self.dirs = [os.path.join(self.tmpdir, i) for i in ('a', 'b', 'c')]
+        for i in self.dirs:
+            os.mkdir(i)
+        os.mkdir(os.path.join(self.dirs[1], 'sub'))
+        self.touch(self.dirs[0], 'foo.a')
+        self.touch(self.dirs[1], 'foo.so')
+        self.touch(self.dirs[1], 'foo.a')
+        self.touch(self.dirs[1], os.path.join('sub', 'bar.h'))
+        self.touch(self.dirs[2], os.path.join('bar.h'))
+        for i in self.dirs:
+            self.set_mtime(i)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def touch(self, base, name):
+        open(os.path.join(base, name), 'w').close()
+
+    def set_mtime(self, path):
+        # Make the directory look old enough to be cached.
+        mtime = os.stat(path).st_mtime - 60
+        os.utime(path, (mtime, mtime))
+
+    def test_isdir(self):
+        index = DirIndex()
+        self.assertTrue(index.isdir(self.dirs[0]))
+        self.assertFalse(index.isdir(os.path.join(self.dirs[0], 'foo.a')))
+        self.assertFalse(index.isdir(os.path.join(self.tmpdir, 'nonexist')))
+
+    def test_exists(self):
+        index = DirIndex()
+        self.assertTrue(index.exists(self.dirs[0], 'foo.a'))
+        self.assertFalse(index.exists(self.dirs[0], 'foo.so'))
+        self.assertTrue(index.exists(self.dirs[1], 'sub/bar.h'))
+        self.assertFalse(index.exists(self.dirs[1], 'sub/foo.h'))
+        self.assertFalse(index.exists(self.dirs[0], 'sub/bar.h'))
+        self.assertTrue(index.exists(self.dirs[1], 'sub/../foo.a'))
+
+    def test_find(self):
+        index = DirIndex()
+        self.assertEqual(index.find(self.dirs, ['foo.so', 'foo.a']),
+                         (self.dirs[0], 'foo.a'))
+        self.assertEqual(index.find(self.dirs[1:], ['foo.so', 'foo.a']),
+                         (self.dirs[1], 'foo.so'))
+        self.assertEqual(index.find(self.dirs, ['bar.h']),
+                         (self.dirs[2], 'bar.h'))
+        self.assertEqual(index.find(self.dirs, ['sub/bar.h']),
+                         (self.dirs[1], 'sub/bar.h'))
+        self.assertEqual(index.find(self.dirs, ['nonexist']), None)
+
+    def test_find_missing_dir(self):
+        index = DirIndex()
+        dirs = [os.path.join(self.tmpdir, 'nonexist')] + self.dirs
+        self.assertEqual(index.find(dirs, ['foo.a']), (self.dirs[0], 'foo.a'))
+
+    def test_listed_once(self):
+        index = DirIndex()
+        index.find(self.dirs, ['foo.a'])
+
+        # Add a file; since we've already listed this directory, we won't see
+        # it.
+        self.touch(self.dirs[0], 'new.a')
+        self.assertEqual(index.find(self.dirs, ['new.a']), None)
+        self.assertEqual(DirIndex().find(self.dirs, ['new.a']),
+                         (self.dirs[0], 'new.a'))
+
+    def test_listed(self):
+        index = DirIndex()
+        missing = os.path.join(self.tmpdir, 'nonexist')
+        index.find([missing] + self.dirs, ['foo.a'])
+        self.assertEqual(sorted(index.listed()),
+                         sorted([missing] + self.dirs))
+
+    def test_cached(self):
+        index = DirIndex(self.cachefile)
+        index.find(self.dirs, ['foo.a'])
+        index.save()
+
+        # Add a file without changing the directory's mtime. Since the mtime
+        # is the same, we should get the cached listing.
+        mtime = os.stat(self.dirs[0]).st_mtime
+        self.touch(self.dirs[0], 'new.a')
+        os.utime(self.dirs[0], (mtime, mtime))
+        self.assertEqual(DirIndex(self.cachefile).find(self.dirs, ['new.a']),
+                         None)
+
+    def test_changed(self):
+        index = DirIndex(self.cachefile)
+        index.find(self.dirs, ['foo.a'])
+        index.save()
+
+        self.touch(self.dirs[0], 'new.a')
+        self.set_mtime(self.dirs[0])
+        self.assertEqual(DirIndex(self.cachefile).find(self.dirs, ['new.a']),
+                         (self.dirs[0], 'new.a'))
+
+    def test_racy(self):
+        index = DirIndex(self.cachefile)
+        self.touch(self.dirs[0], 'new.a')
+        index.find(self.dirs, ['foo.a'])
+        index.save()
+
+        # The directory was modified too recently to trust its mtime, so it
+        # shouldn't have been cached.
+        self.touch(self.dirs[0], 'newer.a')
+        self.assertEqual(DirIndex(self.cachefile).find(self.dirs,
+                                                       ['newer.a']),
+                         (self.dirs[0], 'newer.a'))
+
+    def test_dangling_symlink(self):
+        if not hasattr(os, 'symlink'):
+            raise unittest.SkipTest('symlinks not supported')
+        os.symlink(os.path.join(self.tmpdir, 'nonexist'),
+                   os.path.join(self.dirs[0], 'foo.so'))
+        index = DirIndex()
+        self.assertEqual(index.find(self.dirs, ['foo.so']),
+                         (self.dirs[1], 'foo.so'))
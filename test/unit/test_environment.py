@@ -0,0 +1,57 @@
+import time
+import unittest
+
+from bfg9000.environment import Environment
+from bfg9000.tools import hooks
+
+
+class SlowBuilder(object):
+    def __init__(self, env, lang):
+        time.sleep(0.5)
+        self.lang = lang
+        self.probes = env.probes
+        self.dir_index = env.dir_index
+
+
+def broken_builder(env):
+    raise RuntimeError('broken')
+
+
+class TestLoadBuilders(unittest.TestCase):
+    langs = ['slow1', 'slow2', 'slow3']
+
+    def setUp(self):
+        self.env = Environment(None, None, None, None, None, None)
+        hooks.builder(*self.langs)(SlowBuilder)
+        hooks.builder('broken')(broken_builder)
+
+    def tearDown(self):
+        for i in self.langs + ['broken']:
+            del hooks._builders[i]
+
+    def test_parallel(self):
+        start = time.time()
+        self.env.load_builders(self.langs)
+        self.assertLess(time.time() - start, 1.0)
+        self.assertEqual(sorted(self.env.languages()), self.langs)
+
+        builder = self.env.builder('slow1')
+        self.assertEqual(builder.lang, 'slow1')
+        self.assertTrue(self.env.builder('slow1') is builder)
+
+    def test_shared_state(self):
+        self.env.load_builders(self.langs)
+        for i in self.langs:
+            builder = self.env.builder(i)
+            self.assertTrue(builder.probes is self.env.probes)
+            self.assertTrue(builder.dir_index is self.env.dir_index)
+
+    def test_failure(self):
+        self.env.load_builders(['slow1', 'broken'])
+        self.assertEqual(self.env.languages(), ['slow1'])
+        self.assertRaises(RuntimeError, self.env.builder, 'broken')
+
+    def test_unknown(self):
+        self.env.load_builders(['unknown'])
+        self.assertEqual(self.env.languages(), [])
+        self.assertRaises(ValueError, self.env.builder, 'unknown')
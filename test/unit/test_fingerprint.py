@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from bfg9000.environment import Environment
+from bfg9000.fingerprint import (_hash_dir, _hash_file, _stat_file,
+                                 Fingerprint)
+from bfg9000.version import version as bfg_version
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.env = Environment(None, None, None, None, None, None)
+        self.tmpdir = tempfile.mkdtemp()
+        self.script = os.path.join(self.tmpdir, 'build.bfg')
+        self.subdir = os.path.join(self.tmpdir, 'src')
+        self.output = os.path.join(self.tmpdir, 'build.ninja')
+        self.pc_file = os.path.join(self.tmpdir, 'foo.pc')
+
+        os.mkdir(self.subdir)
+        for i in (self.script, self.output, self.pc_file,
+                  os.path.join(self.subdir, 'foo.cpp')):
+            with open(i, 'w') as f:
+                f.write('contents\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def fingerprint(self):
+        return Fingerprint(
+            files={self.script: _hash_file(self.script)},
+            dirs={self.subdir: _hash_dir(self.subdir)},
+            packages={self.pc_file: _stat_file(self.pc_file)},
+            outputs=[self.output]
+        )
+
+    def test_up_to_date(self):
+        self.assertTrue(self.fingerprint().up_to_date(self.env))
+
+    def test_modify_file(self):
+        fp = self.fingerprint()
+        with open(self.script, 'a') as f:
+            f.write('more contents\n')
+        self.assertFalse(fp.up_to_date(self.env))
+
+    def test_add_file(self):
+        fp = self.fingerprint()
+        with open(os.path.join(self.subdir, 'bar.cpp'), 'w'):
+            pass
+        self.assertFalse(fp.up_to_date(self.env))
+
+    def test_replace_file_with_dir(self):
+        fp = self.fingerprint()
+        os.remove(os.path.join(self.subdir, 'foo.cpp'))
+        os.mkdir(os.path.join(self.subdir, 'foo.cpp'))
+        self.assertFalse(fp.up_to_date(self.env))
+
+    def test_touch_dir(self):
+        fp = self.fingerprint()
+        tmp = os.path.join(self.subdir, 'tmp')
+        with open(tmp, 'w'):
+            pass
+        os.remove(tmp)
+        self.assertTrue(fp.up_to_date(self.env))
+
+    def test_modify_package(self):
+        fp = self.fingerprint()
+        with open(self.pc_file, 'a') as f:
+            f.write('Cflags: -DFOO\n')
+        self.assertFalse(fp.up_to_date(self.env))
+
+    def test_remove_package(self):
+        fp = self.fingerprint()
+        os.remove(self.pc_file)
+        self.assertFalse(fp.up_to_date(self.env))
+
+    def test_add_to_package_dir(self):
+        # Adding a file to a directory searched for packages could change
+        # which file gets found.
+        os.utime(self.subdir, (0, 0))
+        fp = Fingerprint(packages={self.subdir: _stat_file(self.subdir)},
+                         outputs=[self.output])
+        self.assertTrue(fp.up_to_date(self.env))
+
+        with open(os.path.join(self.subdir, 'libfoo.so'), 'w'):
+            pass
+        self.assertFalse(fp.up_to_date(self.env))
+
+    def test_missing_output(self):
+        fp = self.fingerprint()
+        os.remove(self.output)
+        self.assertFalse(fp.up_to_date(self.env))
+
+    def test_touch_outputs(self):
+        fp = self.fingerprint()
+        os.utime(self.output, (0, 0))
+        fp.touch_outputs()
+        self.assertGreater(os.path.getmtime(self.output), time.time() - 60)
+
+    def test_save_load(self):
+        fp = self.fingerprint()
+        fp.save(self.tmpdir)
+        loaded = Fingerprint.load(self.tmpdir)
+        self.assertEqual(loaded.files, fp.files)
+        self.assertEqual(loaded.dirs, fp.dirs)
+        self.assertEqual(loaded.packages, fp.packages)
+        self.assertEqual(loaded.outputs, fp.outputs)
+        self.assertTrue(loaded.up_to_date(self.env))
+
+    def test_load_missing(self):
+        self.assertEqual(Fingerprint.load(self.subdir), None)
+
+    def write_fingerprint(self, state):
+        with open(os.path.join(self.tmpdir, Fingerprint.filename), 'w') as f:
+            json.dump(state, f)
+
+    def test_load_old_version(self):
+        self.write_fingerprint({
+            'version': 1,
+            'bfg_version': bfg_version,
+            'data': {'files': {}, 'dirs': {}, 'tools': {},
+                     'outputs': [self.output]},
+        })
+        self.assertEqual(Fingerprint.load(self.tmpdir), None)
+
+    def test_load_missing_langs(self):
+        self.write_fingerprint({
+            'version': Fingerprint.version,
+            'bfg_version': bfg_version,
+            'data': {'files': {}, 'dirs': {}, 'tools': {},
+                     'packages': {}, 'outputs': [self.output]},
+        })
+        self.assertEqual(Fingerprint.load(self.tmpdir), None)
@@ -43,6 +43,18 @@ class TestMakeWriter(unittest.TestCase):
         out.write('foo: $bar|baz,quux', Syntax.clean)
         self.assertEqual(out.stream.getvalue(), 'foo: $$bar|baz,quux')
 
+    def test_write_string_repeated(self):
+        for i in range(2):
+            out = Writer(StringIO())
+            out.write('foo: $bar', Syntax.shell)
+            self.assertEqual(out.stream.getvalue(), quoted('foo: $$bar'))
+
+    def test_write_string_newline(self):
+        for i in range(2):
+            out = Writer(StringIO())
+            self.assertRaises(ValueError, out.write, 'foo\nbar',
+                              Syntax.target)
+
     # escaped strings
     def test_write_escaped_string_target(self):
         out = Writer(StringIO())
@@ -131,3 +143,27 @@ class TestMakeWriter(unittest.TestCase):
         out.write(path.Path('foo', path.Root.srcdir), Syntax.clean)
         self.assertEqual(out.stream.getvalue(),
                          os.path.join('$(srcdir)', 'foo'))
+
+
+class TestMakefile(unittest.TestCase):
+    def test_rule(self):
+        makefile = Makefile('build.bfg')
+        makefile.rule(path.Path('foo.o'), [path.Path('foo.c')],
+                      recipe=['cc'])
+        makefile.rule('all', [path.Path('foo.o')], phony=True)
+        makefile.include('foo.d', optional=True)
+
+        out = StringIO()
+        makefile.write(out)
+        self.assertTrue(out.getvalue().endswith(
+            'foo.o: foo.c\n\tcc\n\n'
+            '.PHONY: all\nall: foo.o\n\n'
+            '-include foo.d\n'
+        ))
+
+    def test_duplicate_rule(self):
+        makefile = Makefile('build.bfg')
+        makefile.rule('foo')
+        self.assertTrue(makefile.has_rule('foo'))
+        self.assertFalse(makefile.has_rule('bar'))
+        self.assertRaises(ValueError, makefile.rule, 'foo')
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import unittest
 from six.moves import cStringIO as StringIO
@@ -36,6 +37,18 @@ class TestNinjaWriter(unittest.TestCase):
         out.write('foo: $bar', Syntax.clean)
         self.assertEqual(out.stream.getvalue(), 'foo: $$bar')
 
+    def test_write_string_repeated(self):
+        for i in range(2):
+            out = Writer(StringIO())
+            out.write('foo: $bar', Syntax.output)
+            self.assertEqual(out.stream.getvalue(), 'foo$:$ $$bar')
+
+    def test_write_string_newline(self):
+        for i in range(2):
+            out = Writer(StringIO())
+            self.assertRaises(ValueError, out.write, 'foo\nbar',
+                              Syntax.output)
+
     # escaped strings
     def test_write_escaped_string_output(self):
         out = Writer(StringIO())
@@ -107,3 +120,103 @@ class TestNinjaWriter(unittest.TestCase):
         out = Writer(StringIO())
         out.write(path.Path('foo', path.Root.srcdir), Syntax.clean)
         self.assertEqual(out.stream.getvalue(), os.path.join('$srcdir', 'foo'))
+
+    def test_escape(self):
+        self.assertEqual(Writer.escape('foo: $bar', Syntax.output),
+                         'foo$:$ $$bar')
+        self.assertEqual(Writer.escape('foo: $bar', Syntax.input),
+                         'foo:$ $$bar')
+        s = safe_str.jbos('$foo', safe_str.escaped_str('$bar'))
+        self.assertEqual(Writer.escape(s, Syntax.output), '$$foo$bar')
+        self.assertEqual(
+            Writer.escape(path.Path('foo', path.Root.srcdir), Syntax.output),
+            os.path.join('$srcdir', 'foo')
+        )
+        self.assertRaises(NotImplementedError, Writer.escape, 123,
+                          Syntax.output)
+
+
+class TestNinjaFile(unittest.TestCase):
+    def test_build(self):
+        ninjafile = NinjaFile('build.bfg')
+        ninjafile.rule('cc', var('cmd'))
+        ninjafile.build(path.Path('foo.o'), 'cc', path.Path('foo.c'),
+                        variables={'cmd': 'cc'})
+        ninjafile.build('all', 'phony', path.Path('foo.o'))
+
+        out = StringIO()
+        ninjafile.write(out)
+        self.assertTrue(out.getvalue().endswith(
+            'rule cc\n  command = $cmd\n\n'
+            'build foo.o: cc foo.c\n  cmd = cc\n'
+            'build all: phony foo.o\n'
+        ))
+
+    def test_duplicate_build(self):
+        ninjafile = NinjaFile('build.bfg')
+        ninjafile.build(path.Path('foo'), 'phony')
+        self.assertTrue(ninjafile.has_build(path.Path('foo')))
+        self.assertTrue(ninjafile.has_build('foo'))
+        self.assertFalse(ninjafile.has_build('bar'))
+        self.assertRaises(ValueError, ninjafile.build, 'foo', 'phony')
+
+    def test_unknown_rule(self):
+        ninjafile = NinjaFile('build.bfg')
+        self.assertRaises(ValueError, ninjafile.build, 'foo', 'cc')
+
+    def test_pool(self):
+        ninjafile = NinjaFile('build.bfg')
+        ninjafile.pool('link', 2)
+        ninjafile.pool('link', 2)
+        ninjafile.rule('ld', var('cmd'), pool='link')
+        ninjafile.build(path.Path('foo'), 'ld', path.Path('foo.o'),
+                        variables={'pool': 'link'})
+
+        out = StringIO()
+        ninjafile.write(out)
+        self.assertTrue('ninja_required_version = 1.1\n' in out.getvalue())
+        self.assertTrue(out.getvalue().endswith(
+            'pool link\n  depth = 2\n\n'
+            'rule ld\n  command = $cmd\n  pool = link\n\n'
+            'build foo: ld foo.o\n  pool = link\n'
+        ))
+
+    def test_invalid_pool(self):
+        ninjafile = NinjaFile('build.bfg')
+        ninjafile.pool('link', 2)
+        self.assertRaises(ValueError, ninjafile.pool, 'link', 4)
+        self.assertRaises(ValueError, ninjafile.pool, 'console', 1)
+        self.assertRaises(ValueError, ninjafile.pool, 'bad name', 1)
+        self.assertRaises(ValueError, ninjafile.rule, 'ld', var('cmd'),
+                          pool='unknown')
+        self.assertRaises(ValueError, ninjafile.build, 'foo', 'phony',
+                          variables={'pool': 'unknown'})
+
+    def test_split(self):
+        ninjafile = NinjaFile('build.bfg', split=True)
+        ninjafile.rule('cc', var('cmd'))
+        ninjafile.build(path.Path('sub/foo.o'), 'cc', path.Path('foo.c'))
+        ninjafile.build(path.Path('sub/bar.o'), 'cc', path.Path('bar.c'))
+        ninjafile.build(path.Path('baz.o'), 'cc', path.Path('baz.c'))
+        ninjafile.build(path.Path('sub/quux.o'), 'cc', path.Path('quux.c'))
+        ninjafile.build('all', 'phony', path.Path('baz.o'))
+
+        sub_builds = ''.join(
+            'build {}: cc {}.c\n'.format(os.path.join('sub', i + '.o'), i)
+            for i in ('foo', 'bar', 'quux')
+        )
+        digest = hashlib.sha1(sub_builds.encode('utf-8')).hexdigest()
+
+        out = StringIO()
+        ninjafile.write(out)
+        self.assertTrue(out.getvalue().endswith(
+            'rule cc\n  command = $cmd\n\n'
+            'build baz.o: cc baz.c\n'
+            'build all: phony baz.o\n'
+            '\n# ' + digest + '\nsubninja .bfg_ninja/sub/build.ninja\n'
+        ))
+
+        subninjas = list(ninjafile.subninjas())
+        self.assertEqual(len(subninjas), 1)
+        self.assertEqual(subninjas[0][0], '.bfg_ninja/sub/build.ninja')
+        self.assertTrue(subninjas[0][1].endswith(sub_builds))
@@ -1,4 +1,6 @@
+import copy
 import os
+import pickle
 import unittest
 
 from bfg9000.path import *
@@ -79,6 +81,28 @@ class TestPath(unittest.TestCase):
         p = Path('foo', Root.srcdir)
         self.assertEqual(p.addext('.txt'), Path('foo.txt', Root.srcdir))
 
+    def test_equality(self):
+        p = Path('foo/bar', Root.srcdir)
+        self.assertTrue(p == Path('foo//bar', Root.srcdir))
+        self.assertFalse(p != Path('foo//bar', Root.srcdir))
+        self.assertEqual(hash(p), hash(Path('foo//bar', Root.srcdir)))
+
+        self.assertFalse(p == Path('foo/bar', Root.builddir))
+        self.assertTrue(p != Path('foo/bar', Root.builddir))
+        self.assertFalse(p == 'foo/bar')
+        self.assertTrue(p != 'foo/bar')
+
+    def test_immutable(self):
+        p = Path('foo', Root.srcdir)
+        self.assertRaises(AttributeError, setattr, p, 'suffix', 'bar')
+        self.assertRaises(AttributeError, setattr, p, 'other', 'bar')
+
+    def test_copy(self):
+        p = Path('foo/bar', Root.srcdir)
+        self.assertEqual(copy.copy(p), p)
+        self.assertEqual(copy.deepcopy(p), p)
+        self.assertEqual(pickle.loads(pickle.dumps(p)), p)
+
     def test_basename(self):
         p = Path('foo/bar', Root.srcdir)
         self.assertEqual(p.basename(), 'bar')
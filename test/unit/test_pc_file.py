@@ -0,0 +1,290 @@
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from bfg9000.pc_file import _compare_versions, parse, ParseError, PcResolver
+from bfg9000.platforms import which
+from bfg9000.probe import ProbeCache
+from bfg9000.tools.pkg_config import Install
+
+pc_files = {
+    'foo': """
+# A comment
+prefix=/opt/foo
+includedir=${prefix}/include  # Another comment
+libdir=${prefix}/lib
+
+Name: foo
+Description: The foo library
+Version: 1.2.3
+Requires: bar >= 1.0, baz
+Requires.private: quux
+Cflags: -I${includedir} -DFOO
+Libs: -L${libdir} -lfoo
+""",
+    'bar': """
+prefix=/opt/bar
+
+Name: bar
+Description: The bar library
+Version: 1.0
+Requires: baz
+CFlags: -I${prefix}/include -I/usr/include
+Libs: -L${prefix}/lib -L/usr/lib -lbar -pthread
+""",
+    'baz': """
+Name: baz
+Description: The baz library
+Version: 2.0
+Cflags: -I${pcfiledir}/include "-DMSG=hello world"
+Libs: -lbaz \\
+  -framework Baz -pthread
+""",
+    'quux': """
+Name: quux
+Description: The quux library
+Version: 0.1
+Cflags: -DQUUX
+Libs: -lquux
+""",
+    # A diamond: "top" reaches "bottom" through both "left" and "right".
+    'top': """
+Name: top
+Description: The top library
+Version: 1.0
+Requires: left, right
+Cflags: -I/opt/top/include
+Libs: -ltop
+""",
+    'left': """
+Name: left
+Description: The left library
+Version: 1.0
+Requires: bottom
+Cflags: -I/opt/left/include -DSIDE=left
+Libs: -lleft -Wl,--as-needed
+""",
+    'right': """
+Name: right
+Description: The right library
+Version: 1.0
+Requires: bottom
+Cflags: -I/opt/right/include -DSIDE=right
+Libs: -lright
+""",
+    'bottom': """
+Name: bottom
+Description: The bottom library
+Version: 1.0
+Cflags: -I/opt/bottom/include
+Libs: -lbottom
+""",
+    'old': """
+Name: old
+Version: 1.0
+Requires: bar > 1.0
+""",
+    'missing': """
+Name: missing
+Version: 1.0
+Requires: nonexist
+""",
+    'bad': """
+Name: bad
+Version: ${undefined}
+""",
+}
+
+
+def which_pkg_config():
+    try:
+        return which('pkg-config')
+    except IOError:
+        return None
+
+
+class PcFileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        for name, data in pc_files.items():
+            with open(os.path.join(self.tmpdir, name + '.pc'), 'w') as f:
+                f.write(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+class TestCompareVersions(unittest.TestCase):
+    def test_compare(self):
+        self.assertEqual(_compare_versions('1.0', '1.0'), 0)
+        self.assertEqual(_compare_versions('1.0', '1.1'), -1)
+        self.assertEqual(_compare_versions('1.10', '1.9'), 1)
+        self.assertEqual(_compare_versions('1.0.1', '1.0'), 1)
+        self.assertEqual(_compare_versions('1.0a', '1.0'), 1)
+        self.assertEqual(_compare_versions('1.0', '1.a'), 1)
+
+
+class TestParse(PcFileTestCase):
+    def test_parse(self):
+        pc = parse('foo', os.path.join(self.tmpdir, 'foo.pc'))
+        self.assertEqual(pc.version, '1.2.3')
+        self.assertEqual(pc.variables['includedir'], '/opt/foo/include')
+        self.assertEqual(pc.flags('Cflags'), ['-I/opt/foo/include', '-DFOO'])
+        self.assertEqual(pc.requires('Requires'),
+                         [('bar', '>=', '1.0'), ('baz', '', '')])
+
+    def test_pcfiledir(self):
+        pc = parse('baz', os.path.join(self.tmpdir, 'baz.pc'))
+        self.assertEqual(pc.flags('Cflags'), [
+            '-I' + os.path.join(self.tmpdir, 'include'), '-DMSG=hello world'
+        ])
+
+    def test_continuation(self):
+        pc = parse('baz', os.path.join(self.tmpdir, 'baz.pc'))
+        self.assertEqual(pc.flags('Libs'),
+                         ['-lbaz', '-framework', 'Baz', '-pthread'])
+
+    def test_undefined_variable(self):
+        self.assertRaises(ParseError, parse, 'bad',
+                          os.path.join(self.tmpdir, 'bad.pc'))
+
+
+class TestPcResolver(PcFileTestCase):
+    def setUp(self):
+        PcFileTestCase.setUp(self)
+        self.resolver = PcResolver([self.tmpdir])
+
+    def test_version(self):
+        self.assertEqual(self.resolver.version('foo'), '1.2.3')
+
+    def test_not_found(self):
+        self.assertRaises(IOError, self.resolver.version, 'nonexist')
+        self.assertRaises(IOError, self.resolver.cflags, 'missing')
+
+    def test_required_version(self):
+        self.assertRaises(ValueError, self.resolver.cflags, 'old')
+
+    def test_packages(self):
+        self.assertEqual([i.name for i in self.resolver.packages('foo')],
+                         ['foo', 'bar', 'baz', 'baz'])
+        self.assertEqual([i.name for i in self.resolver.packages(
+            'foo', private=True
+        )], ['foo', 'bar', 'baz', 'baz', 'quux'])
+
+    def test_cflags(self):
+        self.assertEqual(self.resolver.cflags('foo'), [
+            '-I/opt/foo/include', '-DFOO', '-I/opt/bar/include',
+            '-I' + os.path.join(self.tmpdir, 'include'), '-DMSG=hello world',
+            '-DQUUX',
+        ])
+
+    def test_ldflags(self):
+        # "-framework Baz -pthread" is a single fragment to pkg-config, so
+        # the -pthread from bar stays where it is.
+        self.assertEqual(self.resolver.ldflags('foo'), [
+            '-L/opt/foo/lib', '-L/opt/bar/lib', '-pthread', '-framework',
+            'Baz', '-pthread',
+        ])
+        self.assertEqual(self.resolver.ldflags('foo', msvc_syntax=True), [
+            '/libpath:/opt/foo/lib', '/libpath:/opt/bar/lib', '-pthread',
+            '-framework', 'Baz', '-pthread',
+        ])
+
+    def test_ldlibs(self):
+        # The first -lbaz follows -pthread, so pkg-config leaves it alone.
+        self.assertEqual(self.resolver.ldlibs('foo'),
+                         ['-lfoo', '-lbar', '-lbaz', '-lbaz'])
+        self.assertEqual(self.resolver.ldlibs('foo', msvc_syntax=True),
+                         ['foo.lib', 'bar.lib', 'baz.lib', 'baz.lib'])
+
+    def test_diamond(self):
+        self.assertEqual([i.name for i in self.resolver.packages('top')],
+                         ['top', 'left', 'bottom', 'right', 'bottom'])
+        self.assertEqual(self.resolver.cflags('top'), [
+            '-I/opt/top/include', '-I/opt/left/include', '-DSIDE=left',
+            '-I/opt/bottom/include', '-I/opt/right/include', '-DSIDE=right',
+        ])
+        self.assertEqual(self.resolver.ldflags('top'), ['-Wl,--as-needed'])
+        self.assertEqual(self.resolver.ldlibs('top'), [
+            '-ltop', '-lleft', '-lbottom', '-lright', '-lbottom'
+        ])
+
+    def test_allow_system_dirs(self):
+        resolver = PcResolver([self.tmpdir], allow_system_cflags=True,
+                              allow_system_libs=True)
+        self.assertEqual(resolver.cflags('bar'), [
+            '-I/opt/bar/include', '-I/usr/include',
+            '-I' + os.path.join(self.tmpdir, 'include'), '-DMSG=hello world',
+        ])
+        self.assertEqual(resolver.ldflags('bar'), [
+            '-L/opt/bar/lib', '-L/usr/lib', '-pthread', '-framework', 'Baz',
+            '-pthread',
+        ])
+
+    def test_sysroot(self):
+        resolver = PcResolver([self.tmpdir], sysroot='/sysroot')
+        self.assertEqual(resolver.cflags('quux'), ['-DQUUX'])
+        self.assertEqual(resolver.ldflags('bar'), [
+            '-L/sysroot/opt/bar/lib', '-pthread', '-framework', 'Baz',
+            '-pthread',
+        ])
+
+    @unittest.skipIf(not which_pkg_config(), 'requires pkg-config')
+    def test_same_as_pkg_config(self):
+        env = dict(os.environ)
+        env.update({
+            'PKG_CONFIG_PATH': '',
+            'PKG_CONFIG_LIBDIR': self.tmpdir,
+            'PKG_CONFIG_SYSTEM_INCLUDE_PATH': '/usr/include',
+            'PKG_CONFIG_SYSTEM_LIBRARY_PATH': os.pathsep.join([
+                '/usr/lib', '/lib'
+            ]),
+        })
+
+        def pkg_config(*args):
+            return shlex.split(subprocess.check_output(
+                ['pkg-config'] + list(args), env=env,
+                universal_newlines=True
+            ))
+
+        for name in ('top', 'foo', 'bar'):
+            self.assertEqual(self.resolver.cflags(name),
+                             pkg_config('--cflags', name))
+            self.assertEqual(self.resolver.ldflags(name), pkg_config(
+                '--libs-only-L', '--libs-only-other', name
+            ))
+            self.assertEqual(self.resolver.ldlibs(name),
+                             pkg_config('--libs-only-l', name))
+
+
+class MockEnv(object):
+    def __init__(self, variables):
+        self.variables = variables
+        self.probes = ProbeCache()
+
+    def getvar(self, key, default=None):
+        return self.variables.get(key, default)
+
+
+class TestInstall(PcFileTestCase):
+    def test_native(self):
+        pkg_config = Install(MockEnv({
+            'PKG_CONFIG_LIBDIR': self.tmpdir,
+            'PKG_CONFIG_SYSTEM_INCLUDE_PATH': '/usr/include',
+            'PKG_CONFIG_SYSTEM_LIBRARY_PATH': '/usr/lib',
+        }))
+        self.assertTrue(pkg_config.native)
+        self.assertEqual(pkg_config.query('version', 'foo'), '1.2.3')
+        self.assertEqual(pkg_config.query('ldlibs', 'foo'),
+                         ['-lfoo', '-lbar', '-lbaz', '-lbaz'])
+
+    def test_search_path(self):
+        pkg_config = Install(MockEnv({
+            'PKG_CONFIG_PATH': os.pathsep.join(['/foo', '/bar']),
+            'PKG_CONFIG_LIBDIR': self.tmpdir,
+        }))
+        self.assertEqual(pkg_config.search_path(),
+                         ['/foo', '/bar', self.tmpdir])
@@ -0,0 +1,113 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from bfg9000.probe import ProbeCache
+
+script = """
+import sys
+with open(sys.argv[1], 'a') as f:
+    f.write('x')
+if '--fail' in sys.argv:
+    sys.exit(1)
+print('version 1.0')
+"""
+
+
+class TestProbeCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.script = os.path.join(self.tmpdir, 'probe.py')
+        self.counter = os.path.join(self.tmpdir, 'counter')
+        self.cachefile = os.path.join(self.tmpdir, ProbeCache.filename)
+        with open(self.script, 'w') as f:
+            f.write(script)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def probe(self, cache, args=None):
+        return cache.check_output(sys.executable,
+                                  [self.script, self.counter] + (args or []))
+
+    def runs(self):
+        with open(self.counter) as f:
+            return len(f.read())
+
+    def test_cached(self):
+        cache = ProbeCache()
+        self.assertEqual(self.probe(cache), 'version 1.0\n')
+        self.assertEqual(self.probe(cache), 'version 1.0\n')
+        self.assertEqual(self.runs(), 1)
+
+    def test_different_args(self):
+        cache = ProbeCache()
+        self.probe(cache)
+        self.probe(cache, ['--foo'])
+        self.assertEqual(self.runs(), 2)
+
+    def test_env_vars(self):
+        cache = ProbeCache()
+        cache.check_output(sys.executable, [self.script, self.counter],
+                           {'PATH': os.environ['PATH'], 'FOO': '1'}, ['FOO'])
+        cache.check_output(sys.executable, [self.script, self.counter],
+                           {'PATH': os.environ['PATH'], 'FOO': '2'}, ['FOO'])
+        self.assertEqual(self.runs(), 2)
+
+    def test_failure(self):
+        cache = ProbeCache()
+        args = ['-c', '"import sys; sys.exit(2)"']
+        self.assertRaises(subprocess.CalledProcessError, cache.check_output,
+                          sys.executable, args)
+        self.assertRaises(subprocess.CalledProcessError, cache.check_output,
+                          sys.executable, args)
+
+    def test_failure_not_cached(self):
+        cache = ProbeCache()
+        for i in range(2):
+            self.assertRaises(subprocess.CalledProcessError, self.probe,
+                              cache, ['--fail'])
+        self.assertEqual(self.runs(), 2)
+
+    def test_wrapper(self):
+        # Changing any executable in the command, not just the first one,
+        # should invalidate the cache.
+        cache = ProbeCache()
+        command = sys.executable + ' ' + self.script
+        cache.check_output(command, [self.counter])
+        cache.check_output(command, [self.counter])
+        self.assertEqual(self.runs(), 1)
+
+        with open(self.script, 'a') as f:
+            f.write('# a change\n')
+        cache.check_output(command, [self.counter])
+        self.assertEqual(self.runs(), 2)
+
+    def test_persist(self):
+        cache = ProbeCache(self.cachefile)
+        self.probe(cache)
+        cache.save()
+
+        cache = ProbeCache(self.cachefile)
+        self.assertEqual(self.probe(cache), 'version 1.0\n')
+        self.assertEqual(self.runs(), 1)
+
+    def test_persist_only_seen(self):
+        cache = ProbeCache(self.cachefile)
+        self.probe(cache)
+        cache.save()
+
+        ProbeCache(self.cachefile).save()
+        self.probe(ProbeCache(self.cachefile))
+        self.assertEqual(self.runs(), 2)
+
+    def test_stamp(self):
+        cache = ProbeCache()
+        args = [self.script, self.counter]
+        cache.check_output(sys.executable, args, stamp='1')
+        cache.check_output(sys.executable, args, stamp='1')
+        cache.check_output(sys.executable, args, stamp='2')
+        self.assertEqual(self.runs(), 2)
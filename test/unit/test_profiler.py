@@ -0,0 +1,140 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from six.moves import cStringIO as StringIO
+
+from bfg9000 import profiler
+from bfg9000.profiler import ImportProfiler, Profiler
+
+
+@unittest.skipIf(sys.version_info < (3, 4), 'requires PEP 451 import hooks')
+class TestImportProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        with open(os.path.join(self.tmpdir, 'profiled_outer.py'), 'w') as f:
+            f.write('import profiled_inner\n')
+        with open(os.path.join(self.tmpdir, 'profiled_inner.py'), 'w') as f:
+            f.write('x = 1\n')
+        sys.path.insert(0, self.tmpdir)
+
+    def tearDown(self):
+        sys.path.remove(self.tmpdir)
+        for i in ('profiled_outer', 'profiled_inner'):
+            sys.modules.pop(i, None)
+        shutil.rmtree(self.tmpdir)
+
+    def test_profile(self):
+        profiler = ImportProfiler()
+        profiler.start()
+        try:
+            import profiled_outer
+        finally:
+            profiler.stop()
+
+        self.assertNotIn(profiler, sys.meta_path)
+        self.assertEqual([i[0:2] for i in profiler.records],
+                         [(1, 'profiled_inner'), (0, 'profiled_outer')])
+        for depth, name, self_time, total in profiler.records:
+            self.assertGreaterEqual(total, self_time)
+
+        # Make sure the module doesn't know it was profiled.
+        self.assertNotIn('Timed', type(profiled_outer.__loader__).__name__)
+        self.assertEqual(profiled_outer.profiled_inner.x, 1)
+
+    def test_report(self):
+        profiler = ImportProfiler()
+        profiler.records = [(1, 'inner', 0.001, 0.001),
+                            (0, 'outer', 0.002, 0.003)]
+        out = StringIO()
+        profiler.report(out)
+        self.assertEqual(out.getvalue(), (
+            ' self (ms) | total (ms) | module\n'
+            '       1.0 |        1.0 |   inner\n'
+            '       2.0 |        3.0 | outer\n'
+            '           |        3.0 | (total)\n'
+        ))
+
+
+class TestProfiler(unittest.TestCase):
+    def test_span(self):
+        prof = Profiler()
+        with prof.span('phase', 'outer'):
+            with prof.span('builtin', 'inner'):
+                pass
+            with prof.span('builtin', 'inner'):
+                pass
+
+        self.assertEqual([i[0:2] for i in prof.events], [
+            ('builtin', 'inner'), ('builtin', 'inner'), ('phase', 'outer')
+        ])
+        inner = prof.events[0][3] + prof.events[1][3]
+        outer = prof.events[2]
+        self.assertAlmostEqual(outer[4], outer[3] - inner)
+
+    def test_span_exception(self):
+        prof = Profiler()
+
+        def fn():
+            with prof.span('phase', 'fail'):
+                raise ValueError()
+        self.assertRaises(ValueError, fn)
+        self.assertEqual([i[0:2] for i in prof.events], [('phase', 'fail')])
+
+    def test_summary(self):
+        prof = Profiler()
+        prof.events = [
+            ('builtin', 'foo', 0, 0.003, 0.001, 1),
+            ('builtin', 'foo', 0, 0.003, 0.001, 1),
+            ('phase', 'bar', 0, 0.010, 0.004, 1),
+        ]
+        self.assertEqual(prof.summary(), [
+            (('phase', 'bar'), [1, 0.004, 0.010]),
+            (('builtin', 'foo'), [2, 0.002, 0.006]),
+        ])
+
+        out = StringIO()
+        prof.report(out)
+        self.assertEqual(out.getvalue(), (
+            ' self (ms) | total (ms) |  calls | category   | name\n'
+            '       4.0 |       10.0 |      1 | phase      | bar\n'
+            '       2.0 |        6.0 |      2 | builtin    | foo\n'
+        ))
+
+    def test_write_trace(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            prof = Profiler()
+            with prof.span('phase', 'foo'):
+                pass
+            filename = os.path.join(tmpdir, 'trace.json')
+            prof.write_trace(filename)
+            with open(filename) as f:
+                events = json.load(f)['traceEvents']
+        finally:
+            shutil.rmtree(tmpdir)
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['name'], 'foo')
+        self.assertEqual(events[0]['cat'], 'phase')
+        self.assertEqual(events[0]['ph'], 'X')
+
+    def test_global(self):
+        self.assertFalse(profiler.enabled())
+        with profiler.span('phase', 'ignored'):
+            pass
+
+        prof = profiler.enable()
+        try:
+            self.assertTrue(profiler.enabled())
+            with profiler.span('phase', 'foo'):
+                pass
+            fn = profiler.wrap('builtin', 'bar', lambda x: x + 1)
+            self.assertEqual(fn(1), 2)
+        finally:
+            profiler.disable()
+        self.assertFalse(profiler.enabled())
+        self.assertEqual([i[0:2] for i in prof.events],
+                         [('phase', 'foo'), ('builtin', 'bar')])
@@ -53,3 +53,14 @@ class TestSafeStr(unittest.TestCase):
 
         s = join([escaped_str('foo'), 'bar'], ',')
         self.assertEqual(s.bits, (escaped_str('foo'), ',', 'bar'))
+
+        self.assertRaises(TypeError, join, ['foo', 123], ',')
+
+    def test_join_flat(self):
+        # Joining should build a single flat jbos in one go, rather than
+        # nesting (and re-flattening) one for each item.
+        n = 5000
+        s = join(['foo'] * n, ',')
+        self.assertIsInstance(s, jbos)
+        self.assertEqual(len(s.bits), 2 * n - 1)
+        self.assertFalse(any(isinstance(i, jbos) for i in s.bits))
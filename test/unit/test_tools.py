@@ -0,0 +1,40 @@
+import importlib
+import pkgutil
+import subprocess
+import sys
+import unittest
+
+from bfg9000 import tools
+from bfg9000.tools import hooks
+
+
+class TestToolModules(unittest.TestCase):
+    def test_modules(self):
+        # Make sure we know where every builder and tool is defined.
+        for _, name, _ in pkgutil.walk_packages(tools.__path__,
+                                                tools.__name__ + '.'):
+            importlib.import_module(name)
+
+        for registry, modules in ((hooks._builders, hooks._builder_modules),
+                                  (hooks._tools, hooks._tool_modules)):
+            for name, value in registry.items():
+                fn = value[0] if isinstance(value, tuple) else value
+                module = fn.__module__
+                if module.startswith(tools.__name__ + '.'):
+                    self.assertEqual(
+                        modules.get(name), module.rsplit('.', 1)[1]
+                    )
+
+    def test_lazy(self):
+        # Looking up a tool should only import the module that defines it.
+        script = ('import sys\n'
+                  'import bfg9000.driver\n'
+                  'from bfg9000.tools import hooks\n'
+                  "hooks._lookup('mkdir_p', hooks._tools, "
+                  'hooks._tool_modules)\n'
+                  "print(' '.join(sys.modules))\n")
+        modules = subprocess.check_output([sys.executable, '-c', script],
+                                          universal_newlines=True).split()
+        self.assertIn('bfg9000.tools.mkdir_p', modules)
+        self.assertNotIn('bfg9000.tools.cc', modules)
+        self.assertNotIn('bfg9000.builtins', modules)